@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark for the trajectory solvers: odeint on the fixed time grid of the
+default config (20000 points) compared to the adaptive solvers of
+solve_ivp. the adaptive solutions are compared to odeint at its last point
+and sampled for a window of [-3, 3] x [-3, 3] (Solution.refine).
+
+run from the pyplane directory:
+    python benchmarks/bench_adaptive.py
+"""
+
+from __future__ import division, print_function
+
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from core.Equation import Equation
+from core.Numerics import solve_trajectory
+
+
+def main():
+    systems = [("y", "(1-x**2)*y-x"),
+               ("y", "-x-0.1*y"),
+               ("x-x**3/3-y", "0.08*(x+0.7-0.8*y)")]
+    repeat = 5
+
+    for system in systems:
+        equation = Equation(system, parameters={})
+        print("x' = %s, y' = %s" % system)
+
+        reference = solve_trajectory(equation, [1., 0.5], 10., solver="odeint", step=0.0005)
+
+        for solver in ("odeint", "RK45", "DOP853", "LSODA"):
+            t0 = time.time()
+            for i in range(repeat):
+                solution = solve_trajectory(equation, [1., 0.5], 10., solver=solver,
+                                            step=0.0005, rtol=1e-6, atol=1e-9)
+            elapsed = (time.time() - t0) / repeat
+
+            t, z = solution.refine((-3., 3.), (-3., 3.))
+            # odeint ends one step before 10
+            if solution.dense is None:
+                end = solution.z[-1]
+            else:
+                end = solution.dense(reference.t[-1])
+            error = np.abs(end - reference.z[-1]).max()
+            print("  %-7s %8.2f ms  %6d points  %6d plotted  error %.1e"
+                  % (solver, 1000 * elapsed, len(solution.t), len(t), error))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark for the backends of the compiled system functions ([System]
+backend = numpy / numba): trajectory integration with odeint and
+evaluation on the 500x500 nullcline grid.
+
+run from the pyplane directory:
+    python benchmarks/bench_backends.py
+"""
+
+from __future__ import division, print_function
+
+import sys
+import os
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from scipy import integrate
+
+from core.Equation import Equation
+from core.Codegen import JitKernel
+
+library = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'library')
+
+
+def read_ppf(file_name):
+    with open(file_name, 'r') as sysfile:
+        xdot_string = sysfile.readline().strip()
+        ydot_string = sysfile.readline().strip()
+    return xdot_string, ydot_string
+
+
+def best_time(fct, number=1, repeat=3):
+    return min(timeit.repeat(fct, number=number, repeat=repeat)) / number
+
+
+def main():
+    # default trajectory settings: traj_integrationtime / traj_integrationstep
+    t = np.arange(0, 10., 0.0005)
+    X, Y = np.meshgrid(np.linspace(-10, 10, 500), np.linspace(-10, 10, 500))
+
+    print("%-18s %-8s %12s %14s %12s" % ("system", "backend", "compile", "trajectory", "grid"))
+    for ppf in ["van_der_pol.ppf", "duffing.ppf"]:
+        for backend in ["numpy", "numba"]:
+            t0 = time.time()
+            equation = Equation(read_ppf(os.path.join(library, ppf)), backend=backend)
+            t_compile = time.time() - t0
+
+            if backend == "numba" and not isinstance(equation.compiled_rhs.fused, JitKernel):
+                print("%-18s %-8s %s" % (ppf, backend, "not available"))
+                continue
+
+            rhs = equation.compiled_rhs.integrand()
+            t_traj = best_time(lambda: integrate.odeint(rhs, [0.1, 0.1], t, Dfun=equation.jacobian))
+            t_grid = best_time(lambda: equation.rhs([X, Y]), number=5)
+
+            print("%-18s %-8s %10.0fms %12.1fms %10.2fms" % (ppf, backend, t_compile * 1e3,
+                                                             t_traj * 1e3, t_grid * 1e3))
+
+
+if __name__ == '__main__':
+    main()
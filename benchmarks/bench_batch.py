@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark for solve_trajectories: 400 trajectories of the van der pol
+oscillator (20 x 20 grid of initial conditions, forward only) in one loop
+compared to process and thread pools of growing size.
+
+run from the pyplane directory:
+    python benchmarks/bench_batch.py
+"""
+
+from __future__ import division, print_function
+
+import sys
+import os
+import time
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from core.Equation import Equation
+from core.Numerics import solve_trajectory, solve_trajectories
+
+
+def main():
+    equation = Equation(("y", "(1-x**2)*y-x"), parameters={})
+    X, Y = np.meshgrid(np.linspace(-3, 3, 20), np.linspace(-3, 3, 20))
+    initial_conditions = np.column_stack((X.ravel(), Y.ravel()))
+    options = {"solver": "LSODA", "time": 20., "rtol": 1e-6, "atol": 1e-9}
+
+    t0 = time.time()
+    for initial_condition in initial_conditions:
+        solve_trajectory(equation, initial_condition, **options)
+    t_loop = time.time() - t0
+    print("%d cpus" % multiprocessing.cpu_count())
+    print("loop:            %7.3f s" % t_loop)
+
+    for pool in ("process", "thread"):
+        workers = 1
+        while workers <= max(multiprocessing.cpu_count(), 2):
+            t0 = time.time()
+            n = sum(1 for result in solve_trajectories(equation, initial_conditions, workers=workers,
+                                                       pool=pool, **options))
+            elapsed = time.time() - t0
+            assert n == len(initial_conditions)
+            print("%-7s x %2d:     %7.3f s  (x%.1f)" % (pool, workers, elapsed, t_loop / elapsed))
+            workers *= 2
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark for classify_equilibria: type, eigenvalues and eigenvectors of
+random jacobians, all at once against one by one (scipy.linalg.eig and
+python comparisons per jacobian, as EquilibriumHandler did before).
+
+run from the pyplane directory:
+    python benchmarks/bench_classify.py
+"""
+
+from __future__ import division, print_function
+
+import sys
+import os
+import time
+
+import numpy as np
+from scipy import linalg as LA
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.Numerics import classify_equilibria
+
+
+def classify_one(jacobian):
+    determinant = np.linalg.det(jacobian)
+    trace = np.trace(jacobian)
+    discriminant = trace ** 2 / 4
+    if determinant < 0:
+        code = 1
+    elif 0 < determinant < discriminant:
+        code = 2 if trace < 0 else 3
+    elif determinant > discriminant:
+        code = 4 if trace == 0 else (5 if trace < 0 else 6)
+    elif determinant == discriminant and determinant > 0:
+        code = 7 if trace < 0 else 8
+    else:
+        code = 0
+    eigenvalues, eigenvectors = LA.eig(jacobian)
+    return code, eigenvalues, eigenvectors
+
+
+def main(n=10000):
+    jacobians = np.random.RandomState(0).normal(size=(n, 2, 2))
+
+    t0 = time.time()
+    codes = [classify_one(jacobian)[0] for jacobian in jacobians]
+    loop = time.time() - t0
+
+    t0 = time.time()
+    classification = classify_equilibria(jacobians, 1e-8)
+    batched = time.time() - t0
+
+    print("%d jacobians: one by one %.1f ms, batched %.1f ms (%.0fx), same types: %s"
+          % (n, 1e3 * loop, 1e3 * batched, loop / batched,
+             (np.array(codes) == classification["type"]).all()))
+
+
+if __name__ == '__main__':
+    main()
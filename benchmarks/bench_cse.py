@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark for the joint, common-subexpression-eliminated evaluator of
+x_dot and y_dot compared to lambdifying both expressions separately, for
+every system in library/.
+
+run from the pyplane directory:
+    python benchmarks/bench_cse.py
+"""
+
+from __future__ import division, print_function
+
+import sys
+import os
+import glob
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import sympy as sp
+
+from core.Codegen import compile_exprs
+
+
+def read_ppf(file_name):
+    with open(file_name, 'r') as sysfile:
+        xdot_string = sysfile.readline().strip()
+        ydot_string = sysfile.readline().strip()
+    return xdot_string, ydot_string
+
+
+def best_time(fct, number, repeat=3):
+    return min(timeit.repeat(fct, number=number, repeat=repeat)) / number
+
+
+def main():
+    x, y = sp.symbols('x, y')
+
+    # nullcline grid (nc_gridPointsInX/Y) and a single point (odeint)
+    X, Y = np.meshgrid(np.linspace(-10, 10, 500), np.linspace(-10, 10, 500))
+    px, py = 0.3, -0.7
+
+    library = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'library')
+
+    print("%-26s %12s %12s %8s %12s %12s %8s" % ("system", "grid sep", "grid cse", "speedup",
+                                                  "point sep", "point cse", "speedup"))
+    for file_name in sorted(glob.glob(os.path.join(library, '*.ppf'))):
+        x_dot_expr, y_dot_expr = [sp.sympify(s) for s in read_ppf(file_name)]
+
+        x_dot = sp.lambdify((x, y), x_dot_expr, 'numpy')
+        y_dot = sp.lambdify((x, y), y_dot_expr, 'numpy')
+        joint = compile_exprs("rhs", (x, y), (x_dot_expr, y_dot_expr))
+
+        grid_sep = best_time(lambda: (x_dot(X, Y), y_dot(X, Y)), 20)
+        grid_cse = best_time(lambda: joint(X, Y), 20)
+        point_sep = best_time(lambda: (x_dot(px, py), y_dot(px, py)), 20000)
+        point_cse = best_time(lambda: joint(px, py), 20000)
+
+        print("%-26s %10.2fms %10.2fms %7.2fx %10.2fus %10.2fus %7.2fx" % (
+            os.path.basename(file_name),
+            grid_sep * 1e3, grid_cse * 1e3, grid_sep / grid_cse,
+            point_sep * 1e6, point_cse * 1e6, point_sep / point_cse))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark for solve_ensemble: 400 trajectories of the van der pol
+oscillator (20 x 20 grid of initial conditions, 10 s forward) integrated
+one by one (the integration done by TrajectoryHandler.plot_trajectory for
+every click) and as one ensemble.
+
+run from the pyplane directory:
+    python benchmarks/bench_ensemble.py
+"""
+
+from __future__ import division, print_function
+
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from core.Equation import Equation
+from core.Numerics import solve_trajectory
+from core.Ensemble import solve_ensemble
+
+
+def main():
+    equation = Equation(("y", "(1-x**2)*y-x"), parameters={})
+    X, Y = np.meshgrid(np.linspace(-3, 3, 20), np.linspace(-3, 3, 20))
+    initial_conditions = np.column_stack((X.ravel(), Y.ravel()))
+
+    # reference end points
+    reference = np.array([solve_trajectory(equation, z, 10., solver="DOP853", rtol=1e-10,
+                                           atol=1e-12).z[-1] for z in initial_conditions])
+
+    def loop(**options):
+        return np.array([solve_trajectory(equation, z, 10., **options).z[-1]
+                         for z in initial_conditions])
+
+    def ensemble(**options):
+        solution = solve_ensemble(equation, initial_conditions, 10., **options)
+        return solution.z[-1]
+
+    runs = [("loop odeint, step 0.0005", loop, {"solver": "odeint", "step": 0.0005}),
+            ("loop odeint, step 0.01", loop, {"solver": "odeint", "step": 0.01}),
+            ("loop LSODA", loop, {"solver": "LSODA", "rtol": 1e-6, "atol": 1e-9}),
+            ("ensemble RK4, step 0.01", ensemble, {"solver": "RK4", "step": 0.01}),
+            ("ensemble RK45", ensemble, {"solver": "RK45", "step": 0.01, "rtol": 1e-6,
+                                         "atol": 1e-9})]
+
+    for name, function, options in runs:
+        t0 = time.time()
+        end = function(**options)
+        elapsed = time.time() - t0
+        # odeint ends one step before 10
+        if options.get("solver") == "odeint":
+            print("%-26s %7.3f s" % (name, elapsed))
+        else:
+            print("%-26s %7.3f s  error %.1e" % (name, elapsed, np.abs(end - reference).max()))
+
+
+if __name__ == '__main__':
+    main()
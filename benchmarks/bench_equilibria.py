@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark for find_equilibria: all equilibria of the systems in library/
+in the window [-10, 10] x [-10, 10] (30 x 30 seeds), including the
+classification of the equilibria found.
+
+run from the pyplane directory:
+    python benchmarks/bench_equilibria.py
+"""
+
+from __future__ import division, print_function
+
+import sys
+import os
+import glob
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.Equation import Equation, parse_parameters
+from core.Numerics import find_equilibria, equilibrium_types
+
+
+def load(file_name):
+    with open(file_name, 'r') as sysfile:
+        x_dot_string = sysfile.readline().strip()
+        y_dot_string = sysfile.readline().strip()
+        parameters = parse_parameters(sysfile.read())
+    return Equation((x_dot_string, y_dot_string), parameters=parameters)
+
+
+def main():
+    directory = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "library")
+    total = 0.
+    for file_name in sorted(glob.glob(os.path.join(directory, "*.ppf"))):
+        equation = load(file_name)
+        # compiled kernels only
+        find_equilibria(equation, (-10., 10.), (-10., 10.), 30, 30)
+
+        t0 = time.time()
+        points, jacobians = find_equilibria(equation, (-10., 10.), (-10., 10.), 30, 30)
+        names = equilibrium_types(jacobians)
+        elapsed = time.time() - t0
+        total += elapsed
+
+        print("%-24s %6.1f ms  %d equilibria: %s" % (os.path.basename(file_name), 1e3 * elapsed,
+                                                     len(points), ", ".join(sorted(set(names)))))
+    print("total %.1f ms" % (1e3 * total))
+
+
+if __name__ == '__main__':
+    main()
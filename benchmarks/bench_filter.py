@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark for dropping the points above max_norm before plotting a
+trajectory: the former TrajectoryHandler.filter_values (norm of every point
+in a list comprehension, masked arrays) against core.Numerics.split_segments
+for trajectories of different lengths.
+
+run from the pyplane directory:
+    python benchmarks/bench_filter.py
+"""
+
+from __future__ import division, print_function
+
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from core.Numerics import split_segments
+
+
+def filter_values(xvalue, yvalue, max_norm):
+    # TrajectoryHandler.filter_values before split_segments
+    z = np.column_stack((xvalue, yvalue))
+    normed_z = np.array([np.linalg.norm(v) for v in z])
+    masked_normed_z = np.ma.masked_greater(normed_z, max_norm)
+    myMask = masked_normed_z.mask
+    xvalue = np.ma.array(xvalue, mask=myMask)
+    yvalue = np.ma.array(yvalue, mask=myMask)
+    return xvalue, yvalue
+
+
+def main():
+    max_norm = 1e5
+    for n in (1000, 10000, 100000):
+        t = np.linspace(0., 10., n)
+        # spiral leaving the valid region twice
+        z = np.column_stack((np.exp(t) * np.cos(5 * t), np.exp(t) * np.sin(5 * t))) * 5.
+        z[n // 2:n // 2 + n // 10] *= 1e5
+
+        repeat = max(1, 100000 // n)
+        t0 = time.time()
+        for i in range(repeat):
+            filter_values(z[:, 0], z[:, 1], max_norm)
+        old = (time.time() - t0) / repeat
+
+        t0 = time.time()
+        for i in range(repeat):
+            split_segments(t, z, max_norm)
+        new = (time.time() - t0) / repeat
+
+        print("%6d points: filter_values %8.3f ms, split_segments %7.3f ms (%.0fx)"
+              % (n, 1e3 * old, 1e3 * new, old / new))
+
+
+if __name__ == '__main__':
+    main()
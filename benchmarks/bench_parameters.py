@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark for changing a parameter of a system: set_parameters compared to
+submitting the system again with the value written into the equation (the
+only way before parameters existed; every new value is a new system, so
+neither the kernel cache nor the shared kernels help).
+
+Both paths evaluate the vector field grid, the nullcline grid and one
+trajectory with default settings afterwards. Creating the widgets of a new
+system tab (the rest of PyplaneMainWindow.submit) is not included.
+
+run from the pyplane directory:
+    python benchmarks/bench_parameters.py
+"""
+
+from __future__ import division, print_function
+
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from scipy import integrate
+
+from core.Equation import Equation
+
+
+def numeric_update(equation, vf_grid, nc_grid, t):
+    equation.rhs_grid(*vf_grid)
+    equation.rhs_grid(*nc_grid)
+    integrate.odeint(equation.integrand(), [0.5, 0.5], t, Dfun=equation.jacobian)
+
+
+def main():
+    vf_grid = np.meshgrid(np.linspace(-10, 10, 50), np.linspace(-10, 10, 25))
+    nc_grid = np.meshgrid(np.linspace(-10, 10, 500), np.linspace(-10, 10, 500))
+    t = np.arange(0, 10., 0.0005)
+    values = np.linspace(0.1, 3., 20)
+
+    # value written into the system strings
+    t_compile = 0.
+    t0 = time.time()
+    for mu in values:
+        # unique values, otherwise the kernel cache would hit
+        mu = float(mu) + 1e-9 * time.time()
+        t1 = time.time()
+        equation = Equation(("y", "%r*(1-x**2)*y-x" % mu))
+        t_compile += time.time() - t1
+        numeric_update(equation, vf_grid, nc_grid, t)
+    t_resubmit = (time.time() - t0) / len(values)
+    t_compile = t_compile / len(values)
+
+    # named parameter
+    equation = Equation(("y", "mu*(1-x**2)*y-x"), parameters={"mu": 1.})
+    t_set = 0.
+    t0 = time.time()
+    for mu in values:
+        t1 = time.time()
+        equation.set_parameters({"mu": mu})
+        t_set += time.time() - t1
+        numeric_update(equation, vf_grid, nc_grid, t)
+    t_parameter = (time.time() - t0) / len(values)
+    t_set = t_set / len(values)
+
+    print("                  %12s %12s" % ("system only", "total"))
+    print("resubmit system:  %10.3fms %10.1fms" % (t_compile * 1e3, t_resubmit * 1e3))
+    print("set_parameters:   %10.3fms %10.1fms" % (t_set * 1e3, t_parameter * 1e3))
+    print("speedup:          %11.0fx %11.1fx" % (t_compile / t_set, t_resubmit / t_parameter))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark for finding the trajectory next to a mouse click
+(TrajectoryStore.nearest): 2000 trajectories of the van der pol oscillator
+(10 s forward and backward, RK45 ensemble) in the window [-3, 3] x [-3, 3].
+The grid is built once after a change of the trajectories or the window,
+the lookups after that are compared to the distance to every stored
+segment.
+
+run from the pyplane directory:
+    python benchmarks/bench_pick.py
+"""
+
+from __future__ import division, print_function
+
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from core.Equation import Equation
+from core.Ensemble import solve_ensemble
+from core.Numerics import termination
+from core.TrajectoryStore import TrajectoryStore, trajectory_key
+
+
+def brute_force(store, point, window, radius):
+    # distance to every segment of every trajectory (window scaled)
+    (xmin, xmax), (ymin, ymax) = window
+    scale = np.array([xmax - xmin, ymax - ymin])
+    origin = np.array([xmin, ymin])
+    z = (np.asarray(point) - origin) / scale
+
+    best = (radius, None)
+    for key in store.keys():
+        for record in store.ids(key):
+            t, x, y = store.points(record)
+            points = (np.column_stack((x, y)) - origin) / scale
+            start, step = points[:-1], np.diff(points, axis=0)
+            length = (step ** 2).sum(axis=1)
+            s = np.clip(((z - start) * step).sum(axis=1) / np.where(length > 0, length, 1.), 0, 1)
+            distance = np.hypot(*(start + s[:, np.newaxis] * step - z).T)
+            if len(distance) and distance.min() <= best[0]:
+                best = (distance.min(), key)
+    return best[1]
+
+
+def main():
+    equation = Equation(("y", "(1-x**2)*y-x"), parameters={})
+    window = ((-3., 3.), (-3., 3.))
+    initial_conditions = np.random.RandomState(0).uniform(-3, 3, (2000, 2))
+    stop = termination(equation, window, stop=True)
+
+    store = TrajectoryStore()
+    for backward in (False, True):
+        ensemble = solve_ensemble(equation, initial_conditions, 10., backward=backward,
+                                  solver="RK45", stop=stop)
+        for initial_condition, solution in zip(initial_conditions, ensemble.solutions()):
+            store.add(initial_condition, solution)
+    print("%d trajectories, %d points" % (len(store), store.size))
+
+    clicks = np.random.RandomState(1).uniform(-3, 3, (200, 2))
+
+    t0 = time.time()
+    store.nearest(clicks[0], window, 0.01)
+    print("grid built in %.1f ms" % (1e3 * (time.time() - t0)))
+
+    t0 = time.time()
+    found = [store.nearest(click, window, 0.01) for click in clicks]
+    elapsed = (time.time() - t0) / len(clicks)
+    print("nearest:     %8.3f ms per click, %d hits" % (1e3 * elapsed,
+                                                        sum(key is not None for key in found)))
+
+    t0 = time.time()
+    expected = [brute_force(store, click, window, 0.01) for click in clicks[:10]]
+    elapsed = (time.time() - t0) / 10
+    print("brute force: %8.3f ms per click, same result: %s"
+          % (1e3 * elapsed, expected == found[:10]))
+
+    # removed trajectories are skipped, the grid is not built again
+    store.remove(trajectory_key(initial_conditions[0]))
+    t0 = time.time()
+    store.nearest(clicks[0], window, 0.01)
+    print("after removal: %.1f ms" % (1e3 * (time.time() - t0)))
+
+
+if __name__ == '__main__':
+    main()
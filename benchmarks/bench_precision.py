@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark for the precision modes of Equation (float32, float64 and
+longdouble): time and memory for the 500x500 nullcline grid, calls per
+second of the odeint integrand and the deviation from longdouble.
+
+run from the pyplane directory:
+    python benchmarks/bench_precision.py
+"""
+
+from __future__ import division, print_function
+
+import sys
+import os
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from core.Equation import Equation, precisions
+
+
+def best_time(fct, number, repeat=3):
+    return min(timeit.repeat(fct, number=number, repeat=repeat)) / number
+
+
+def main():
+    system = ("3*x-y-x*(x**2+y**2)", "-x+3*y-y*(x**2+y**2)")
+    X, Y = np.meshgrid(np.linspace(-10, 10, 500), np.linspace(-10, 10, 500))
+    z = np.array([0.3, -0.7])
+
+    reference = Equation(system, precision="longdouble", grid_precision="longdouble").rhs_grid(X, Y)
+
+    print("%-11s %10s %10s %14s %12s" % ("precision", "grid", "memory", "integrand", "max rel err"))
+    for name in ["float32", "float64", "longdouble"]:
+        equation = Equation(system, precision=name, grid_precision=name)
+        integrand = equation.integrand()
+
+        t_grid = best_time(lambda: equation.rhs_grid(X, Y), 10)
+        result = equation.rhs_grid(X, Y)
+        # grid inputs and result in the chosen precision
+        memory = 2 * X.size * np.dtype(precisions[name]).itemsize + result.nbytes
+        cps = 1. / best_time(lambda: integrand(z, 0.), 20000)
+
+        error = np.abs(result - reference) / np.maximum(np.abs(reference), 1e-300)
+        print("%-11s %8.2fms %8.1fMB %10.0f/s %12.1e" % (name, t_grid * 1e3, memory / 2.**20,
+                                                         cps, float(error.max())))
+
+
+if __name__ == '__main__':
+    main()
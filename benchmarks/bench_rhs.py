@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+"""
+Micro-benchmark for the right hand side of a system: calls per second of
+the previous Equation.rhs implementation compared to the compiled rhs.
+
+run from the pyplane directory:
+    python benchmarks/bench_rhs.py
+"""
+
+from __future__ import division, print_function
+
+import sys
+import os
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import sympy as sp
+
+from core.Equation import Equation
+
+
+def legacy_rhs(equation, z, t=0.):
+    """ Equation.rhs as it was before CompiledRhs was introduced (x_dot and
+        y_dot lambdified separately)
+    """
+    norm_z = np.linalg.norm(z)
+
+    if norm_z > equation.max_norm:
+        z2 = (z / norm_z) * equation.max_norm
+        x, y = z2
+    else:
+        x, y = z
+
+    xx_dot = equation.legacy_x_dot(x, y)
+    yy_dot = equation.legacy_y_dot(x, y)
+
+    return np.array([xx_dot, yy_dot])
+
+
+def calls_per_second(fct, number=20000, repeat=3):
+    best = min(timeit.repeat(fct, number=number, repeat=repeat))
+    return number / best
+
+
+def main():
+    equation = Equation(("3*x-y-x*(x**2+y**2)", "-x+3*y-y*(x**2+y**2)"))
+    equation.legacy_x_dot = sp.lambdify((equation.x, equation.y), equation.x_dot_expr, 'numpy')
+    equation.legacy_y_dot = sp.lambdify((equation.x, equation.y), equation.y_dot_expr, 'numpy')
+    z = np.array([0.3, -0.7])
+    out = np.empty(2)
+    integrand = equation.compiled_rhs.integrand()
+
+    results = [("legacy rhs", calls_per_second(lambda: legacy_rhs(equation, z))),
+               ("Equation.rhs", calls_per_second(lambda: equation.rhs(z))),
+               ("compiled rhs, out buffer", calls_per_second(lambda: equation.compiled_rhs(z, 0., out))),
+               ("odeint integrand", calls_per_second(lambda: integrand(z, 0.)))]
+
+    reference = results[0][1]
+    for name, cps in results:
+        print("%-28s %12.0f calls/s  (x%.2f)" % (name, cps, cps / reference))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark for find_roots: 30 x 30 seeds in [-10, 10] x [-10, 10] for the
+systems in library/, damped newton's method without fallback, with the
+batched levenberg-marquardt fallback and with scipy's hybr seed by seed.
+for every variant the time, the converged seeds and the most iterations
+of a seed are printed.
+
+run from the pyplane directory:
+    python benchmarks/bench_roots.py
+"""
+
+from __future__ import division, print_function
+
+import sys
+import os
+import glob
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_equilibria import load
+from core.Numerics import find_roots
+
+
+def main():
+    directory = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "library")
+    X, Y = np.meshgrid(np.linspace(-10., 10., 30), np.linspace(-10., 10., 30))
+    seeds = np.column_stack((X.ravel(), Y.ravel()))
+
+    fallbacks = (None, "lm", "hybr")
+    total = dict.fromkeys(fallbacks, 0.)
+    for file_name in sorted(glob.glob(os.path.join(directory, "*.ppf"))):
+        equation = load(file_name)
+        # compiled kernels only
+        find_roots(equation, seeds[:1])
+
+        columns = []
+        for fallback in fallbacks:
+            t0 = time.time()
+            roots = find_roots(equation, seeds, fallback=fallback)
+            elapsed = time.time() - t0
+            total[fallback] += elapsed
+            columns.append("%7.1f ms %4d %4d" % (1e3 * elapsed, roots["converged"].sum(),
+                                                 roots["iterations"].max()))
+
+        print("%-24s %s" % (os.path.basename(file_name), " | ".join(columns)))
+    print("total %s" % " | ".join("%s %.1f ms" % (fallback, 1e3 * total[fallback])
+                                  for fallback in fallbacks))
+
+
+if __name__ == '__main__':
+    main()
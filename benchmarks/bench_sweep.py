@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark for ParameterSweep: trajectories of a damped oscillator and the
+nullcline grid for 1000 values of the damping coefficient, compared to a
+loop over Equation.set_parameters.
+
+run from the pyplane directory:
+    python benchmarks/bench_sweep.py
+"""
+
+from __future__ import division, print_function
+
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from scipy import integrate
+
+from core.Equation import Equation
+from core.ParameterSweep import ParameterSweep
+
+
+def main():
+    equation = Equation(("y", "-x-c*y"), parameters={"c": 0.})
+    values = np.linspace(0., 2., 1000)
+    t = np.arange(0, 10., 0.01)
+    X, Y = np.meshgrid(np.linspace(-10, 10, 100), np.linspace(-10, 10, 100))
+
+    t0 = time.time()
+    for c in values:
+        equation.set_parameters({"c": c})
+        integrate.odeint(equation.integrand(), [1., 0.], t, Dfun=equation.jacobian)
+    t_loop_traj = time.time() - t0
+
+    t0 = time.time()
+    for c in values:
+        equation.set_parameters({"c": c})
+        equation.rhs_grid(X, Y)
+    t_loop_grid = time.time() - t0
+
+    sweep = ParameterSweep(equation, "c", values)
+
+    t0 = time.time()
+    solutions = sweep.trajectories([1., 0.], t)
+    t_sweep_traj = time.time() - t0
+
+    t0 = time.time()
+    fields = sweep.rhs_grid(X, Y)
+    t_sweep_grid = time.time() - t0
+
+    print("%d values, trajectories %s, grids %s" % (len(values), solutions.shape, fields.shape))
+    print("%-14s %12s %12s" % ("", "loop", "sweep"))
+    print("%-14s %10.0fms %10.0fms  (x%.1f)" % ("trajectories", t_loop_traj * 1e3, t_sweep_traj * 1e3,
+                                                 t_loop_traj / t_sweep_traj))
+    print("%-14s %10.0fms %10.0fms  (x%.1f)" % ("grid", t_loop_grid * 1e3, t_sweep_grid * 1e3,
+                                                 t_loop_grid / t_sweep_grid))
+
+
+if __name__ == '__main__':
+    main()
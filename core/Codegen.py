@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2016
+#    by Klemens Fritzsche, pyplane@leckstrom.de
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Module that turns sympy expressions into python functions.
+
+Instead of lambdifying every expression on its own, all expressions of a
+system are put into one function. Common subexpressions (e.g. x**2+y**2 in
+hopf.ppf) are computed only once per call.
+
+The generated source is either executed as is ("numpy" backend) or
+compiled with numba ("numba" backend, optional).
+"""
+
+from __future__ import division
+
+__author__ = 'Klemens Fritzsche'
+
+import sympy as sp
+import numpy as np
+from sympy.printing.lambdarepr import NumPyPrinter
+
+from core.Logging import myLogger
+
+# available backends for compiled system functions ([System] backend)
+backends = ["numpy", "numba"]
+
+# has to be increased whenever the generated source changes (invalidates
+# core.KernelCache entries)
+codegen_version = 2
+
+
+def generate_source(name, args, exprs):
+    """ this function returns the source code of a function name(*args) that
+        returns a tuple with the values of exprs
+    """
+    replacements, reduced = sp.cse(list(exprs), symbols=sp.numbered_symbols('_cse'))
+    printer = NumPyPrinter()
+
+    # from __future__ import division: rationals are printed as 1/3
+    lines = ["from __future__ import division",
+             "",
+             "def %s(%s):" % (name, ", ".join(str(arg) for arg in args))]
+
+    for symbol, expr in replacements:
+        lines.append("    %s = %s" % (symbol, printer.doprint(expr)))
+
+    values = [printer.doprint(expr) for expr in reduced]
+    lines.append("    return (%s,)" % ", ".join(values))
+
+    return "\n".join(lines) + "\n"
+
+
+def compile_source(name, source, namespace=None):
+    """ this function executes the source generated by generate_source and
+        returns the function
+    """
+    if namespace is None:
+        namespace = {}
+
+    # depending on the sympy version, functions are printed as numpy.sin(x)
+    # or as sin(x), so both have to be available
+    exec("from numpy import *", namespace)
+    namespace["numpy"] = np
+
+    code = compile(source, "<pyplane %s>" % name, "exec")
+    exec(code, namespace)
+
+    return namespace[name]
+
+
+def generate_loop_source(name, args, n_exprs):
+    """ this function returns the source code of a function that calls the
+        function name for every element of 1d-arrays args and writes the
+        results into the rows of _out
+    """
+    loop_args = ", ".join(str(arg) for arg in args)
+
+    lines = ["def %s_loop(%s, _out):" % (name, loop_args),
+             "    for _i in range(_out.shape[1]):",
+             "        _values = %s(%s)" % (name, ", ".join("%s[_i]" % arg for arg in args))]
+
+    for i in range(n_exprs):
+        lines.append("        _out[%i, _i] = _values[%i]" % (i, i))
+
+    return "\n".join(lines) + "\n"
+
+
+class JitKernel(object):
+    """ function compiled with numba. single points are passed to the jitted
+        scalar function, arrays to a jitted loop over every point. both are
+        evaluated in float64 (numba has no long double)
+    """
+    def __init__(self, scalar, loop, n_exprs):
+        self.scalar = scalar
+        self.loop = loop
+        self.n_exprs = n_exprs
+
+    def __call__(self, *args):
+        if not any(np.ndim(arg) for arg in args):
+            return self.scalar(*[float(arg) for arg in args])
+
+        arrays = np.broadcast_arrays(*[np.asarray(arg, dtype=float) for arg in args])
+        out = np.empty((self.n_exprs,) + arrays[0].shape)
+        flat_args = [np.ascontiguousarray(arr).ravel() for arr in arrays]
+        self.loop(*(flat_args + [out.reshape(self.n_exprs, -1)]))
+
+        return tuple(out)
+
+
+def jit_kernel(name, args, n_exprs, source):
+    """ this function compiles source with numba. it returns None if numba
+        is not installed or cannot compile the expressions
+    """
+    try:
+        import numba
+    except ImportError:
+        myLogger.warn_message("numba is not installed, using numpy backend")
+        return None
+
+    try:
+        # error_model="numpy": division by zero gives inf/nan like numpy
+        jit = numba.njit(error_model="numpy")
+
+        scalar = jit(compile_source(name, source))
+        loop = jit(compile_source(name + "_loop",
+                                  generate_loop_source(name, args, n_exprs),
+                                  {name: scalar}))
+
+        # numba compiles lazily: force compilation now to be able to fall back
+        kernel = JitKernel(scalar, loop, n_exprs)
+        kernel(*[0.5] * len(args))
+        kernel(*[np.array([0.5])] * len(args))
+    except Exception as error:
+        myLogger.warn_message("numba could not compile the system, using numpy backend")
+        myLogger.debug_message(str(error))
+        return None
+
+    return kernel
+
+
+def compile_generated(name, args, n_exprs, source, backend="numpy"):
+    """ this function compiles the source of generate_source with the given
+        backend
+    """
+    if backend == "numba":
+        kernel = jit_kernel(name, args, n_exprs, source)
+        if kernel is not None:
+            return kernel
+    elif backend != "numpy":
+        myLogger.warn_message("unknown backend " + str(backend) + ", using numpy backend")
+
+    return compile_source(name, source)
+
+
+def compile_exprs(name, args, exprs, backend="numpy"):
+    """ this function returns a function name(*args) evaluating all exprs
+        in one call
+    """
+    exprs = list(exprs)
+    source = generate_source(name, args, exprs)
+
+    return compile_generated(name, args, len(exprs), source, backend)
@@ -18,7 +18,11 @@
 #    along with this program.  If not, see <http://www.gnu.org/licenses/>.
 ##############################################################################
 
-import ConfigParser
+try:
+    import ConfigParser
+except ImportError:
+    # python 3
+    import configparser as ConfigParser
 import os
 import ast
 
@@ -29,12 +33,16 @@ class ConfigHandler(object):
     """ this class handles the read and write methods for config
     """
 
-    def __init__(self):
+    def __init__(self, filepath=None):
         self.config = ConfigParser.ConfigParser()
         self.config.optionxform = str
 
+        # another config file can be given for headless use (see
+        # core.Numerics)
         __dir__ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        filepath = os.path.abspath(os.path.join(__dir__, 'config/default'))
+        if filepath is None:
+            filepath = os.path.abspath(os.path.join(__dir__, 'config/default'))
+        self.filepath = filepath
 
         try:
             data = self.config.read(filepath)
@@ -47,13 +55,13 @@ class ConfigHandler(object):
         # read config-descriptions from dictionary
         self.descr = {}
 
-        with open('core/config_description.py', 'r') as dict:
+        with open(os.path.join(__dir__, 'core/config_description.py'), 'r') as dict:
             data = dict.read()
             self.descr = ast.literal_eval(data)
 
 
     def cancle_and_reload(self):
-        self.__init__()
+        self.__init__(self.filepath)
 
 
     def write(self, section, variable, new_value):
@@ -81,7 +89,7 @@ class ConfigHandler(object):
             value = self.config.getboolean(str(section), str(variable))
             myLogger.debug_message(str(variable) + "\": " + str(value) + " (config)")
             return value
-        elif str(variable) in self.decr:
+        elif str(variable) in self.descr:
         #self.descr.has_key(str(variable)):
             # fallback value
             value = self.descr[str(variable)][1]
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2016
+#    by Klemens Fritzsche, pyplane@leckstrom.de
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Integration of many trajectories at once
+
+All initial conditions form one state array of shape (n, 2), every stage
+of the runge-kutta method evaluates the compiled system once for all
+trajectories that are still running. Trajectories stop (and are left out
+of the following steps) when they blow up, stall at an equilibrium or
+leave the window of a Termination.
+"""
+
+from __future__ import division
+
+__author__ = 'Klemens Fritzsche'
+
+import numpy as np
+
+from core.ConfigHandler import myConfig
+from core.Numerics import Solution
+
+# butcher tableau of dormand and prince (RK45, the systems are autonomous,
+# so c is not needed), the last row of a are the weights of the 5th order
+# solution, e the difference to the 4th order
+dopri_a = [[],
+           [1 / 5],
+           [3 / 40, 9 / 40],
+           [44 / 45, -56 / 15, 32 / 9],
+           [19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729],
+           [9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656],
+           [35 / 384, 0., 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84]]
+dopri_e = np.array([71 / 57600, 0., -71 / 16695, 71 / 1920, -17253 / 339200, 22 / 525, -1 / 40])
+
+
+class EnsembleSolution(object):
+    """ trajectories of solve_ensemble: the common times t, the points z
+        with shape (len(t), n, 2) (nan after a trajectory stopped), the index
+        of the last point of every trajectory and the reasons (see
+        core.Numerics.termination_messages)
+    """
+    def __init__(self, t, z, last, reasons, backward=False, solver="RK4"):
+        self.t = t
+        self.z = z
+        self.last = last
+        self.reasons = reasons
+        self.backward = backward
+        self.solver = solver
+
+    def solutions(self):
+        """ this function returns a Solution for every trajectory
+        """
+        return [Solution(self.t[:n + 1], self.z[:n + 1, i], self.backward, self.solver,
+                         reason=self.reasons[i])
+                for i, n in enumerate(self.last)]
+
+
+class EnsembleRhs(object):
+    """ right hand side for states of shape (n, 2)
+    """
+    def __init__(self, equation, direction):
+        self.compiled_rhs = equation.compiled_rhs
+        self.precision = equation.precision
+        self.direction = direction
+
+    def __call__(self, z):
+        f = self.compiled_rhs((z[:, 0], z[:, 1]), dtype=self.precision).T
+        if self.direction != 1:
+            f = self.direction * f
+        return np.asarray(f, dtype=float)
+
+
+def solve_ensemble(equation, initial_conditions, time=None, backward=False, solver="RK4",
+                   step=None, rtol=None, atol=None, stop=None):
+    """ this function integrates all initial_conditions (shape (n, 2)) at
+        once and returns an EnsembleSolution.
+
+        RK4 uses the fixed step ([Trajectories] traj_ensembleStep), RK45
+        (dormand-prince) adapts a common step to the tolerances rtol and
+        atol of the worst trajectory. stop is a core.Numerics.Termination,
+        its window and speed are used (no periodic orbits), trajectories
+        always stop above max_norm
+    """
+    if time is None:
+        time = myConfig.read("Trajectories", "traj_integrationtime")
+    if step is None:
+        step = myConfig.read("Trajectories", "traj_ensembleStep")
+    time = float(time)
+    step = float(step)
+    if solver == "RK45":
+        if rtol is None:
+            rtol = myConfig.read("Trajectories", "traj_rtol")
+        if atol is None:
+            atol = myConfig.read("Trajectories", "traj_atol")
+        rtol = float(rtol)
+        atol = float(atol)
+
+    f = EnsembleRhs(equation, -1. if backward else 1.)
+    max_norm = equation.max_norm
+    window = stop.window if stop is not None else None
+    speed = stop.speed if stop is not None else None
+
+    z = np.array(initial_conditions, dtype=float).reshape(-1, 2)
+    n = len(z)
+
+    # running trajectories: their indices, state and right hand side
+    index = np.arange(n)
+    k1 = f(z)
+
+    ts = [0.]
+    rows = [z.copy()]
+    last = np.zeros(n, dtype=int)
+    reasons = np.array(["time"] * n, dtype=object)
+
+    def finish(stopped, reason):
+        reasons[index[stopped]] = reason
+        return ~stopped
+
+    t = 0.
+    h = step
+    while len(index) > 0 and t < time * (1 - 1e-12):
+        # stalled trajectories end in their last point
+        if speed is not None:
+            keep = finish(np.hypot(k1[:, 0], k1[:, 1]) < speed, "equilibrium")
+            index, z, k1 = index[keep], z[keep], k1[keep]
+            if len(index) == 0:
+                break
+
+        h = min(h, time - t)
+        if solver == "RK4":
+            k2 = f(z + h / 2 * k1)
+            k3 = f(z + h / 2 * k2)
+            k4 = f(z + h * k3)
+            z_new = z + h / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+            k_new = f(z_new)
+            h_next = step
+        elif solver == "RK45":
+            k = [k1]
+            for a in dopri_a[1:]:
+                k.append(f(z + h * sum(a_j * k_j for a_j, k_j in zip(a, k) if a_j != 0)))
+            z_new = z + h * sum(a_j * k_j for a_j, k_j in zip(dopri_a[-1], k) if a_j != 0)
+            k_new = f(z_new)
+            k.append(k_new)
+
+            scale = atol + rtol * np.maximum(np.abs(z), np.abs(z_new))
+            error = h * sum(e_j * k_j for e_j, k_j in zip(dopri_e, k) if e_j != 0) / scale
+            finite = np.isfinite(error).all(axis=1)
+            error = np.sqrt((error[finite] ** 2).mean(axis=1)).max() if finite.any() else 0.
+
+            # step size control as in scipy.integrate.RK45
+            factor = 10. if error == 0 else min(10., max(0.2, 0.9 * error ** -0.2))
+            if error > 1:
+                h = h * factor
+                continue
+            h_next = h * factor
+        else:
+            raise ValueError("unknown ensemble solver " + solver)
+
+        t += h
+        h = h_next
+
+        row = np.full((n, 2), np.nan)
+        row[index] = z_new
+        ts.append(t)
+        rows.append(row)
+        last[index] = len(ts) - 1
+
+        # blown up trajectories and trajectories outside of the window end
+        # in the new point
+        blown_up = ~(np.hypot(z_new[:, 0], z_new[:, 1]) < max_norm)
+        keep = finish(blown_up, "max_norm")
+        if window is not None:
+            (xmin, xmax), (ymin, ymax) = window
+            outside = ~((xmin <= z_new[:, 0]) & (z_new[:, 0] <= xmax) &
+                        (ymin <= z_new[:, 1]) & (z_new[:, 1] <= ymax))
+            keep &= finish(outside & keep, "window")
+
+        index, z, k1 = index[keep], z_new[keep], k_new[keep]
+
+    return EnsembleSolution(np.array(ts), np.array(rows), last, list(reasons), backward, solver)
@@ -20,43 +20,309 @@ from __future__ import division
 
 __author__ = 'Klemens Fritzsche'
 
+import math
+import weakref
+from collections import OrderedDict
+
 import sympy as sp
-import pylab as pl
 import numpy as np
 
 from core.Logging import myLogger
 from core.ConfigHandler import myConfig
+from core.Codegen import generate_source, compile_generated
+from core.KernelCache import myKernelCache, kernel_key
+
+# floating point types for the evaluation of a system ([System]
+# grid_precision and integration_precision)
+precisions = {"float32": np.float32,
+              "float64": np.float64,
+              "longdouble": np.longdouble}
+
+
+class CompiledRhs(object):
+    """ right hand side of the system, compiled once in Equation.set_rhs
+
+        both components are evaluated in one call of the fused function
+        (see core.Codegen).
+        z can either be a single point or a pair of grids (np.meshgrid). if
+        an output buffer is given, the result is written into it. dtype sets
+        the precision of the evaluation (numpy backend only, numba kernels
+        always evaluate in float64).
+        params holds the values of the system parameters, they are passed to
+        the fused function after x and y.
+    """
+    def __init__(self, fused, max_norm, params=()):
+        self.fused = fused
+        self.max_norm = max_norm
+        self.params = tuple(params)
+
+    def __call__(self, z, t=0., out=None, dtype=np.float64):
+        # numpy scalar for single points, array for grids
+        x = dtype(z[0])
+        y = dtype(z[1])
+
+        # in case of finite escape time: points with norm(z) > max_norm are
+        # scaled back onto the circle with radius max_norm (scale is 1 for
+        # every other point)
+        scale = self.max_norm / np.maximum(np.hypot(x, y), self.max_norm)
+
+        if out is None:
+            out = np.empty((2,) + np.shape(scale), dtype=dtype)
+        out[0], out[1] = self.fused(x * scale, y * scale, *self.params)
+
+        return out
+
+    def integrand(self, direction=1., dtype=np.float64):
+        """ this function returns f(z, t) for odeint. it only handles single
+            points, so the clamp is done on python floats, and every call
+            writes into the same buffer (odeint copies the result).
+            for other precisions than float64 the system is evaluated in
+            dtype and the result is rounded to float64 (odeint is limited to
+            double precision). the parameter values are fixed when f is
+            created
+        """
+        buf = np.empty(2)
+        # jitted kernels: the scalar function directly, without the
+        # dispatch of JitKernel.__call__ (see core.Codegen)
+        fused = getattr(self.fused, "scalar", self.fused)
+        max_norm = self.max_norm
+        params = self.params
+
+        if np.dtype(dtype) == np.float64:
+            def f(z, t=0.):
+                x, y = z.tolist()
+                scale = max_norm / max(math.hypot(x, y), max_norm)
+                x_dot, y_dot = fused(x * scale, y * scale, *params)
+                buf[0] = direction * x_dot
+                buf[1] = direction * y_dot
+                return buf
+        else:
+            # JitKernel casts to float64 (numba has no long double)
+            fused = self.fused
+            max_norm = dtype(max_norm)
+
+            def f(z, t=0.):
+                x, y = z.astype(dtype)
+                scale = max_norm / max(np.hypot(x, y), max_norm)
+                x_dot, y_dot = fused(x * scale, y * scale, *params)
+                buf[0] = direction * x_dot
+                buf[1] = direction * y_dot
+                return buf
+
+        return f
+
+
+def generate_kernels(x_dot_string, y_dot_string, names=()):
+    """ this function does the symbolic part: it returns the source code of
+        the right hand side and the jacobian (entry of the kernel cache) and
+        the sympy expressions of the system.
+        every symbol except x and y is a parameter of the system, parameters
+        are additional arguments of the compiled functions. names are parsed
+        as symbols even if sympy knows them as functions (e.g. beta, gamma)
+    """
+    x, y = sp.symbols('x, y')
+    symbols = dict((name, sp.Symbol(name)) for name in names)
+    x_dot_expr = sp.sympify(x_dot_string, locals=symbols)
+    y_dot_expr = sp.sympify(y_dot_string, locals=symbols)
+    jacobian_expr = sp.Matrix([x_dot_expr, y_dot_expr]).jacobian([x, y])
+
+    free_symbols = (x_dot_expr.free_symbols | y_dot_expr.free_symbols) - set([x, y])
+    parameters = sorted(free_symbols, key=str)
+    args = [x, y] + parameters
+
+    # one function for both components, common subexpressions are
+    # computed once
+    entry = {"x_dot": sp.srepr(x_dot_expr),
+             "y_dot": sp.srepr(y_dot_expr),
+             "parameters": [str(p) for p in parameters],
+             "rhs": generate_source("rhs", args, (x_dot_expr, y_dot_expr)),
+             "jacobian": generate_source("jacobian", args, list(jacobian_expr))}
+
+    return entry, (x_dot_expr, y_dot_expr, jacobian_expr)
+
+
+class SystemKernels(object):
+    """ compiled functions of a system. instances are shared by every
+        Equation with the same system and must not be changed
+    """
+    def __init__(self, entry, backend, exprs=None):
+        self.backend = backend
+        self.x_dot_srepr = entry["x_dot"]
+        self.y_dot_srepr = entry["y_dot"]
+        self.parameters = tuple(entry["parameters"])
+
+        args = ("x", "y") + self.parameters
+        self.rhs = compile_generated("rhs", args, 2, entry["rhs"], backend)
+        self.jacobian = compile_generated("jacobian", args, 4, entry["jacobian"], backend)
+
+        # sympy expressions are only created again if they are needed
+        if exprs is None:
+            exprs = (None, None, None)
+        self._x_dot_expr, self._y_dot_expr, self._jacobian_expr = exprs
+
+    @property
+    def x_dot_expr(self):
+        if self._x_dot_expr is None:
+            self._x_dot_expr = sp.sympify(self.x_dot_srepr)
+        return self._x_dot_expr
+
+    @property
+    def y_dot_expr(self):
+        if self._y_dot_expr is None:
+            self._y_dot_expr = sp.sympify(self.y_dot_srepr)
+        return self._y_dot_expr
+
+    @property
+    def jacobian_expr(self):
+        """ exact jacobian as sympy matrix
+        """
+        if self._jacobian_expr is None:
+            system = sp.Matrix([self.x_dot_expr, self.y_dot_expr])
+            self._jacobian_expr = system.jacobian(sp.symbols('x, y'))
+        return self._jacobian_expr
+
+
+# compiled systems that are in use, the entries vanish as soon as the last
+# equation using them is deleted (e.g. by closing its tab)
+interned_kernels = weakref.WeakValueDictionary()
+
+
+def compile_system(x_dot_string, y_dot_string, backend="numpy", names=()):
+    """ this function returns the SystemKernels of a system: the instance
+        that is in use already, otherwise it is compiled from the kernel
+        cache or generated from scratch. names are the parameter names
+    """
+    key = kernel_key(x_dot_string, y_dot_string, backend, names)
+
+    kernels = interned_kernels.get(key)
+    if kernels is not None:
+        return kernels
+
+    exprs = None
+    entry = myKernelCache.load(key)
+    if entry is None:
+        entry, exprs = generate_kernels(x_dot_string, y_dot_string, names)
+        myKernelCache.store(key, entry)
+
+    kernels = SystemKernels(entry, backend, exprs)
+    interned_kernels[key] = kernels
+
+    return kernels
+
+
+def parse_parameters(parameter_string):
+    """ this function reads parameters like "mu = 1.5, a = -2" (separated by
+        commas or newlines) and returns them as OrderedDict
+    """
+    parameters = OrderedDict()
+    for item in parameter_string.replace("\n", ",").split(","):
+        if item.strip() != "":
+            name, value = item.split("=")
+            parameters[name.strip()] = float(value)
+    return parameters
+
+
+def format_parameters(parameters, separator=", "):
+    return separator.join("%s = %s" % (name, repr(value)) for name, value in parameters.items())
+
 
 class Equation(object):
     """ this class defines the differential equation system and contains
         methods to use it
     """
-    def __init__(self, equation=(None,None)):
+    def __init__(self, equation=(None,None), backend=None, precision=None, grid_precision=None,
+                 parameters=None, max_norm=None):
         self.x_dot_string, self.y_dot_string = equation
         #~ assert isinstance(x_dot_string, str)
         #~ assert isinstance(y_dot_string, str)
 
         self.x, self.y = sp.symbols('x, y')
 
-        self.x_dot_expr = sp.sympify(self.x_dot_string)
-        self.y_dot_expr = sp.sympify(self.y_dot_string)
+        # settings which are not given are read from the config
+        if max_norm is None:
+            max_norm = myConfig.read("System", "max_norm")
+        self.max_norm = float(max_norm)
+
+        # "numpy" or "numba", see core.Codegen
+        if backend is None:
+            backend = myConfig.read("System", "backend")
+        self.backend = backend
 
-        self.x_dot = sp.lambdify((self.x, self.y), self.x_dot_expr, 'numpy')
-        self.y_dot = sp.lambdify((self.x, self.y), self.y_dot_expr, 'numpy')
+        # "float32", "float64" or "longdouble": precision is used for
+        # integration and newton's method, grid_precision for vector field,
+        # streamlines and nullclines
+        if precision is None:
+            precision = myConfig.read("System", "integration_precision")
+        if grid_precision is None:
+            grid_precision = myConfig.read("System", "grid_precision")
+        self.precision_name = str(precision)
+        self.grid_precision_name = str(grid_precision)
+        self.precision = precisions[self.precision_name]
+        self.grid_precision = precisions[self.grid_precision_name]
 
-        self.max_norm = float(myConfig.read("System", "max_norm"))
+        # values of the system parameters (name: value)
+        self.parameters = OrderedDict()
+        if parameters is not None:
+            self.parameters.update(parameters)
 
         self.set_rhs(self.x_dot_string, self.y_dot_string)
 
+    def __reduce__(self):
+        """ equations are pickled with their settings only, the compiled
+            functions are restored by compile_system (e.g. in the processes
+            of core.Numerics.solve_trajectories)
+        """
+        return (Equation, ((self.x_dot_string, self.y_dot_string), self.backend,
+                           self.precision_name, self.grid_precision_name,
+                           self.parameters, self.max_norm))
+
     def set_rhs(self, x_dot_string, y_dot_string):
-        """ this function sets the differential equations
-            --> osoblete!
+        """ this function sets the differential equations. the compiled
+            functions are shared with every other equation of the same
+            system (see compile_system)
         """
-        self.x_dot_expr = sp.sympify(x_dot_string)
-        self.y_dot_expr = sp.sympify(y_dot_string)
+        self.kernels = compile_system(x_dot_string, y_dot_string, self.backend,
+                                      list(self.parameters))
 
-        self.x_dot = sp.lambdify((self.x, self.y), self.x_dot_expr, 'numpy')
-        self.y_dot = sp.lambdify((self.x, self.y), self.y_dot_expr, 'numpy')
+        self.compiled_rhs = CompiledRhs(self.kernels.rhs, self.max_norm)
+        # entries in the order J11, J12, J21, J22
+        self.compiled_jacobian = self.kernels.jacobian
+        # single points (Equation.jacobian), jitted scalar function if any
+        self.scalar_jacobian = getattr(self.kernels.jacobian, "scalar", self.kernels.jacobian)
+
+        self.set_parameters(self.parameters)
+
+    def set_parameters(self, parameters):
+        """ this function changes the values of the system parameters. the
+            system is not compiled again
+        """
+        values = OrderedDict()
+        for name in self.kernels.parameters:
+            if name in parameters:
+                values[name] = float(parameters[name])
+            elif name in self.parameters:
+                values[name] = self.parameters[name]
+            else:
+                myLogger.warn_message("no value for parameter " + name + ", using 1.0")
+                values[name] = 1.
+
+        self.parameters = values
+        self.compiled_rhs.params = tuple(values.values())
+
+    def parameter_values(self):
+        return self.compiled_rhs.params
+
+    @property
+    def x_dot_expr(self):
+        return self.kernels.x_dot_expr
+
+    @property
+    def y_dot_expr(self):
+        return self.kernels.y_dot_expr
+
+    @property
+    def jacobian_expr(self):
+        return self.kernels.jacobian_expr
 
     def what_is_my_system(self):
         """ this function returns the current system
@@ -66,36 +332,48 @@ class Equation(object):
     def rhs(self, z, t=0.):
         """ this function represents the system
         """
-        # falls endliche fluchtzeit:
-        # abfrage ob norm(x)>10**5
-        norm_z = pl.norm(z)
-
-        if norm_z > self.max_norm:
-            myLogger.debug_message("norm(z) exceeds " + str(self.max_norm) + ": norm(z) = " + str(norm_z))
-            z2 = (z / norm_z) * self.max_norm
-            self.x, self.y = z2
-        else:
-            self.x, self.y = z
+        return self.compiled_rhs(z, t, dtype=self.precision)
 
-        xx_dot = self.x_dot(self.x, self.y)
-        yy_dot = self.y_dot(self.x, self.y)
+    def n_rhs(self, z, t=0):
+        """ this function is used for backward integration
+        """
+        return -self.compiled_rhs(z, t, dtype=self.precision)
 
-        zDot = xx_dot, yy_dot
+    def integrand(self, direction=1.):
+        """ this function returns the right hand side for odeint (direction
+            -1 for backward integration)
+        """
+        return self.compiled_rhs.integrand(direction, self.precision)
 
-        #         norm_zDot = norm(zDot)
-        #
-        #         if norm_zDot>self.max_norm*1e3:
-        #             myLogger.debug_message("norm(z dot) exceeds 1e10: norm(z')="+str(norm_zDot))
+    def rhs_grid(self, X, Y):
+        """ this function evaluates the system on a grid in grid precision
+            (usually lower than for integration)
+        """
+        return self.compiled_rhs([X, Y], dtype=self.grid_precision)
 
-        return np.array([xx_dot, yy_dot])
+    def jacobian(self, z, t=0.):
+        """ this function returns the exact jacobian evaluated in z. it can
+            be used as Dfun for odeint
+        """
+        jac = np.empty((2, 2))
+        jac[0, 0], jac[0, 1], jac[1, 0], jac[1, 1] = self.scalar_jacobian(float(z[0]), float(z[1]),
+                                                                         *self.parameter_values())
+        return jac
 
-    def n_rhs(self, z, t=0):
-        """ this function is used for backward integration
+    def n_jacobian(self, z, t=0.):
+        """ jacobian of n_rhs (backward integration)
         """
-        solution = self.rhs(z, t)
-        n_solution = [x * (-1) for x in solution]
+        return -self.jacobian(z, t)
 
-        return n_solution
+    def jacobian_array(self, x, y):
+        """ this function evaluates the jacobian for arrays of points at
+            once. the result has the shape x.shape + (2, 2)
+        """
+        shape = np.broadcast(x, y).shape
+        jac = np.empty(shape + (2, 2))
+        jac[..., 0, 0], jac[..., 0, 1], jac[..., 1, 0], jac[..., 1, 1] = \
+            self.compiled_jacobian(x, y, *self.parameter_values())
+        return jac
 
 #     def jacobian(self, X, t=0):
 #         """ return the jacobian matrix evaluated in X. """
@@ -20,31 +20,24 @@ __author__ = 'Klemens Fritzsche'
 
 import ast
 import numpy as np
-from scipy import linalg as LA
 from core.Logging import myLogger
 from core.ConfigHandler import myConfig
-from core.Canvas import Canvas
-from core.Container import Container
+from core.EquilibriumTable import EquilibriumTable
+from core.Numerics import newton, find_roots, find_equilibria, classify_equilibria, equilibrium_names
 
 
 class EquilibriumHandler(object):
     def __init__(self, parent):
         self.myWidget = parent
         self.tgl = False
-        # this should be an attribute of the elements in self.stack
-        self.jacobians = {}
-        self.stack = []
-
-        # counter for unique identifiers
-        self.cnt_unclassified = 0
-        self.cnt_saddle = 0
-        self.cnt_nodalsink = 0
-        self.cnt_nodalsource = 0
-        self.cnt_center = 0
-        self.cnt_spiralsink = 0
-        self.cnt_spiralsource = 0
-        self.cnt_sink = 0
-        self.cnt_source = 0
+        # equilibria within eq_tolerance are the same point
+        self.table = EquilibriumTable(myConfig.read("Equilibria", "eq_tolerance"))
+        # artists of every equilibrium (see the column artist of self.table)
+        self.artists = []
+
+        # counter for unique identifiers, one per type of equilibrium (see
+        # core.Numerics.equilibrium_names)
+        self.counts = np.zeros(len(equilibrium_names), dtype=int)
 
     def toggle(self):
         self.tgl = not self.tgl
@@ -53,91 +46,54 @@ class EquilibriumHandler(object):
         self.myWidget.Plot.canvas.draw()
 
     def clear_stack(self):
-        self.stack = []
+        self.table.clear()
+        self.artists = []
 
     def list_equilibria(self):
-        eq_list = []
-        for i in xrange(len(self.stack)):
-            eq_list.append(self.stack[i].coordinates)
-        return eq_list
+        return self.table.points().tolist()
 
     def list_characterized_equilibria(self):
-        character_list = []
-        for i in xrange(len(self.stack)):
-            character_list.append(self.stack[i].character)
-        return character_list
+        return self.table.labels()
 
     def get_equilibrium_by_character_identifier(self, character_identifier):
-        for i in xrange(len(self.stack)):
-            if self.stack[i].character == character_identifier:
-                return self.stack[i]
-        return None
+        """ this function returns the id of the equilibrium with the label
+            character_identifier (e.g. "Saddle 0") or None
+        """
+        return self.table.find(character_identifier)
 
     def approx_ep_jacobian(self, equilibrium):
         """ this function returns the jacobian for an equilibrium with a slight numerical error.
             use this function instead of self.jacobian(equilibrium)!
         """
-        if self.is_equilibrium(equilibrium):
-            true_equilibrium = self.return_true_equilibrium(equilibrium)
-            jac = self.jacobian(true_equilibrium)
-            return jac
-        else:
-            return None
+        return self.jacobian(self.table.nearest(equilibrium))
 
     def get_linearized_equation(self, equilibrium):
         pass
 
-    def characterize_equilibrium(self, jacobian):
+    def characterize_equilibrium(self, jacobian, code=None):
+        """ this function returns the type of the equilibrium with its
+            number, e.g. "Saddle 0". code is the type if it is known already
+            (see core.Numerics.classify_equilibria)
+        """
         # NOTE: jacobian is evaluated at a specific equilibrium point
-        determinant = jacobian[0,0]*jacobian[1,1] - jacobian[1,0]*jacobian[0,1]
-        trace = jacobian[0,0] + jacobian[1,1]
-
-        ep_character = ""
-
-        if trace==0 and determinant==0:
-            ep_character = "Unclassified " + str(self.cnt_unclassified) # should not happen
-            self.cnt_unclassified = self.cnt_unclassified + 1
-
-        elif determinant < 0:
-            ep_character = "Saddle " + str(self.cnt_saddle) 
-            self.cnt_saddle = self.cnt_saddle + 1
-
-        elif (determinant > 0) and (determinant < ((trace**2)/4)):
-            if trace < 0:
-                ep_character = "Nodal Sink " + str(self.cnt_nodalsink) 
-                self.cnt_nodalsink = self.cnt_nodalsink + 1
-            elif trace > 0:
-                ep_character = "Nodal Source " + str(self.cnt_nodalsource) 
-                self.cnt_nodalsource = self.cnt_nodalsource + 1
-
-        elif determinant > ((trace**2)/4):
-            if trace == 0:
-                ep_character = "Center " + str(self.cnt_center) 
-                self.cnt_center = self.cnt_center + 1
-            elif trace < 0:
-                ep_character = "Spiral Sink " + str(self.cnt_spiralsink) 
-                self.cnt_spiralsink = self.cnt_spiralsink + 1
-            elif trace > 0:
-                ep_character = "Spiral Source " + str(self.cnt_spiralsource) 
-                self.cnt_spiralsource = self.cnt_spiralsource + 1
-        elif determinant == ((trace**2)/4):
-            if trace < 0:
-                ep_character = "Sink " + str(self.cnt_sink) 
-                self.cnt_sink = self.cnt_sink + 1
-            elif trace > 0:
-                ep_character = "Source " + str(self.cnt_source) 
-                self.cnt_source = self.cnt_source + 1
-
-        return ep_character
+        if code is None:
+            code = classify_equilibria(jacobian)["type"][0]
+
+        number = self.counts[code]
+        self.counts[code] += 1
+
+        return equilibrium_names[code] + " " + str(number)
 
     def get_eigenval_eigenvec(self, equilibrium):
         # eigenvalues, eigenvectors
-        jac = self.approx_ep_jacobian(equilibrium)
-        eigenvalues, eigenvectors = LA.eig(jac)
-        return eigenvalues, eigenvectors
-
-    def plot_equilibrium(self, z_equilibrium, jacobian):
-        """ this function plots an equilibrium point
+        classification = classify_equilibria(self.approx_ep_jacobian(equilibrium))[0]
+        return classification["eigenvalues"], classification["eigenvectors"]
+
+    def plot_equilibrium(self, z_equilibrium, jacobian, classification=None, update=True):
+        """ this function plots an equilibrium point and stores it in
+            self.table. classification is its entry of
+            core.Numerics.classify_equilibria if known already, with
+            update=False the plots are not drawn
         """
         self.eq_plot = self.myWidget.Plot.canvas.axes.plot(z_equilibrium[0],
                                               z_equilibrium[1],
@@ -157,198 +113,159 @@ class EquilibriumHandler(object):
         else:
             tmax = 0
 
+        artists = list(self.eq_plot)
+
         # equilibrium line from tmin to tmax
         if not(tmin==0 and tmax==0):
-            self.myWidget.mySystem.Txy.Plot.canvas.axes.plot([z_equilibrium[0],z_equilibrium[0]],
+            artists += self.myWidget.mySystem.Txy.Plot.canvas.axes.plot([z_equilibrium[0],z_equilibrium[0]],
                                                             [z_equilibrium[1],z_equilibrium[1]],
                                                             [tmin, tmax], linestyle="dashed", color="r")
         # marker t=0:
-        self.myWidget.mySystem.Txy.Plot.canvas.axes.plot([z_equilibrium[0]],
+        artists += self.myWidget.mySystem.Txy.Plot.canvas.axes.plot([z_equilibrium[0]],
                                                             [z_equilibrium[1]],
                                                             [0],
                                                             'o',
                                                             color="r")
-        self.myWidget.mySystem.Txy.Plot.update()
 
-        #~ self.stack[str(z_equilibrium)] = self.eq_plot
-        equilibrium_point = Container()
-        equilibrium_point.coordinates = z_equilibrium
-        equilibrium_point.plot = self.eq_plot
-        equilibrium_point.character = self.characterize_equilibrium(jacobian)
-        self.stack.append(equilibrium_point)
+        if classification is None:
+            classification = classify_equilibria(jacobian)[0]
+        character = self.characterize_equilibrium(jacobian, classification["type"])
+        self.table.add(z_equilibrium, jacobian, character, len(self.artists), classification)
+        self.artists.append(artists)
 
         # label equilibrium point
-        self.myWidget.Plot.canvas.axes.text(z_equilibrium[0], z_equilibrium[1], equilibrium_point.character, fontsize=10)
+        artists.append(self.myWidget.Plot.canvas.axes.text(z_equilibrium[0], z_equilibrium[1],
+                                                           character, fontsize=10))
+
+        if not update:
+            return
 
+        self.myWidget.mySystem.Txy.Plot.update()
         self.update_equilibria()
 
         # TODO: this call probably move somewhere else:
-        if len(self.stack) > 0: self.myWidget.show_linearization_objects()
+        if len(self.table) > 0: self.myWidget.show_linearization_objects()
 
         myLogger.message("Equilibrium Point found at: " + str(z_equilibrium))
         myLogger.message("jacobian:\n" + str(jacobian))
 
-    def jacobian(self, equilibrium):
-        #~ from PyQt4 import QtCore
-        #~ from IPython import embed
-        #~ QtCore.pyqtRemoveInputHook()
-        #~ embed()
-        if str(equilibrium) in self.jacobians.keys():
-            return self.jacobians[str(equilibrium)]
+    def recompute(self):
+        """ this function searches the stored equilibria again after the
+            parameters of the system changed (see core.Numerics.find_roots,
+            starting at the old points). equilibria which are left are
+            plotted and classified again, all others are removed
+        """
+        points = self.table.points()
+        for artists in self.artists:
+            for artist in artists:
+                try:
+                    artist.remove()
+                except (ValueError, NotImplementedError):
+                    # the axes were cleared already
+                    pass
+        self.clear_stack()
+        self.counts[:] = 0
+
+        equation = self.myWidget.mySystem.equation
+        if len(points) > 0:
+            roots = find_roots(equation, points)
+            points = np.column_stack((roots["x"], roots["y"]))[roots["converged"]]
+            jacobians = equation.jacobian_array(points[:, 0], points[:, 1])
+            for z_equilibrium, jacobian, classification in zip(points.tolist(), jacobians,
+                                                               classify_equilibria(jacobians)):
+                if self.calculated_before(z_equilibrium):
+                    self.plot_equilibrium(z_equilibrium, jacobian, classification, update=False)
+
+        self.myWidget.mySystem.Txy.Plot.update()
+        self.update_equilibria()
+        if len(self.table) > 0:
+            self.myWidget.show_linearization_objects()
         else:
+            self.myWidget.hide_linearization_objects()
+
+    def jacobian(self, equilibrium_id):
+        """ this function returns the jacobian of the equilibrium with the id
+            equilibrium_id or None
+        """
+        if equilibrium_id not in self.table:
             return None
+        return self.table.jacobian(equilibrium_id)
 
     def find_equilibrium(self, z_init):
-        """ hopf2.ppf has problems with this algorithm -> TODO: debug!!!
+        """ this function searches an equilibrium starting at z_init (damped
+            newton's method, see core.Numerics.find_roots) and plots it
         """
         # TODO: this try-loop is too long!
         try:
             if self.tgl:
                 # newton's method to find equilibrium points
-                iterlimit = 50
-                iter = 0
-                h = .000001
-
-                z_next = z_init
-
-                functionf = self.myWidget.mySystem.equation.rhs(z_init)
-
-                # allow for large/small solutions
-                errorlim = np.linalg.norm(functionf, np.inf) * 0.000001
-
-                while ((np.linalg.norm(functionf, np.inf) > errorlim) & (iter < iterlimit)):
-                    iter = iter + 1
-
-                    # now we calculate the jacobian
-                    jacobian = np.eye(2)
-
-                    for i in range(0, 2):
-                        sav = z_next[i]
-                        z_next[i] = z_next[i] + h
-                        functionfhj = self.myWidget.mySystem.equation.rhs(z_next)
-                        jac = (functionfhj - functionf) / h
-
-                        jacobian[0, i] = jac[0]
-                        jacobian[1, i] = jac[1]
-
-                        z_next[i] = sav
-                    z_next = z_next - np.linalg.solve(jacobian, functionf)
-                    functionf = self.myWidget.mySystem.equation.rhs(z_next)
-
-                if iter > (iterlimit - 1):
-                    fLag = [0, 0]
-                else:
-                    fLag = [1, 1]
-
-                    # TODO: this for loop is used twice: why not put it in a function?
-                    for i in range(0, 2):
-                        sav = z_next[i]
-                        z_next[i] = z_next[i] + h
-                        functionfhj = self.myWidget.mySystem.equation.rhs(z_next)
-                        jac = (functionfhj - functionf) / h
-
-                        jacobian[0, i] = jac[0]
-                        jacobian[1, i] = jac[1]
-
-                        z_next[i] = sav
+                z_next, jacobian, converged = newton(self.myWidget.mySystem.equation, z_init)
+                if not converged:
+                    # e.g. a minimum of |f| which is no equilibrium
+                    myLogger.message("No equilibrium found near " + str(list(z_init)))
+                    return None
 
                 #TODO: use list instead of array and safe casting
                 z_next = list(z_next)
 
-                # due to numerical errors, this is not sufficient and
-                # there could be multiple equilibria plotted where
-                # only one should be:
-                # calculate the distance to all existing equilibrium points
-                # if the distance is smaller than a certain value epsilon, it is
-                # assumed that this equilibrium point is already calculated
-                epsilon = 1e-4
-
-                if len(self.stack) == 0:
+                # due to numerical errors, the same equilibrium point is
+                # found at slightly different coordinates: points closer
+                # than eq_tolerance to an existing one are not plotted
+                if not self.calculated_before(z_next):
+                    myLogger.debug_message("Equilibrium Point already there!")
+                else:
                     self.plot_equilibrium(z_next, jacobian)
-                    self.jacobians[str(z_next)] = jacobian
                     return z_next
-
-                else:
-                    # there are equilibria already
-                    # if the distance to an existing equilibrium point is less
-                    # than epsilon, do not plot
-
-                    if not self.calculated_before(z_next):
-                        myLogger.debug_message("Equilibrium Point already there!")
-                    else:
-                        self.plot_equilibrium(z_next, jacobian)
-                        # add to jacobians
-                        self.jacobians[str(z_next)] = jacobian
-                        return z_next
-
-                        # d_norm = []  # list with distance to equ. pts
-                        #
-                        # for ep in self.eqp_stack.keys():
-                        #     ep = ast.literal_eval(ep)
-                        #     x_val = z_next[0] - ep[0]
-                        #     y_val = z_next[1] - ep[1]
-                        #
-                        #     d_norm.append(np.sqrt(x_val ** 2 + y_val ** 2))
-                        #
-                        # if any(d < epsilon for d in d_norm):
-                        #     myLogger.debug_message("Equilibrium Point already there!")
-                        #
-                        # else:
-                        #     self.plot_equilibrium(z_next, jacobian)
-                        #     # add to jacobians
-                        #     self.jacobians[str(z_next)] = jacobian
         except Exception as error:
             myLogger.error_message("Something strange happened while calculating the equilibrium")
             if myConfig.read("Logging", "log_showDbg"):
                 myLogger.debug_message(error)
 
+    def find_all_equilibria(self):
+        """ this function searches every equilibrium in the window of the
+            phase plane (see core.Numerics.find_equilibria) and plots the new
+            ones
+        """
+        xmin, xmax, ymin, ymax = self.myWidget.Plot.canvas.axes.axis()
+        points, jacobians = find_equilibria(self.myWidget.mySystem.equation,
+                                            (xmin, xmax), (ymin, ymax))
+        classifications = classify_equilibria(jacobians)
+
+        found = 0
+        for z_equilibrium, jacobian, classification in zip(points.tolist(), jacobians,
+                                                           classifications):
+            if self.calculated_before(z_equilibrium):
+                self.plot_equilibrium(z_equilibrium, jacobian, classification, update=False)
+                found += 1
+
+        if found > 0:
+            self.myWidget.mySystem.Txy.Plot.update()
+            self.update_equilibria()
+            self.myWidget.show_linearization_objects()
+        myLogger.message("%d equilibria in the window, %d new" % (len(points), found))
+
+        return points
+
     def is_equilibrium(self, equilibrium):
         """ this function returns True if delivered point was calculated as an equilibrium point before
             and False if it wasn't calculated. due to numerical errors two equilibrium points are
-            understood as identical if the distance between these points is less than epsilon
+            understood as identical if the distance between these points is less than eq_tolerance
         """
         # equilibrium is of type list [xval, yval]
-        d_norm = []  # list with distance to equ. pts
-        epsilon = 1e-4
-
-        # for ep in true_eq_values:
-        for ep in self.list_equilibria():
-            #~ ep = ast.literal_eval(ep)
-            x_val = equilibrium[0] - ep[0]
-            y_val = equilibrium[1] - ep[1]
-
-            distance = np.sqrt(x_val ** 2 + y_val ** 2)
-
-            d_norm.append(distance)
-
-        if any(d < epsilon for d in d_norm):
-            return True
-        else:
-            return False
+        return self.table.nearest(equilibrium) is not None
 
     def return_true_equilibrium(self, equilibrium):
         """ due to numerical errors a point might be very close to the calculated and stacked equilibrium.
-            instead of recalculating within an epsilon area around a calculated equilibrium point, this
+            instead of recalculating within an eq_tolerance area around a calculated equilibrium point, this
             function returns the already calculated equilibrium. that is especially helpful when asking
             for its jacobian.
         """
         # equilibrium is of type list [xval, yval]
-        # check every single key if its distance is less than epsilon, if yes return true value
-        epsilon = 1e-4
-
-        for ep in self.list_equilibria():
-            ep_num = ep
-            #~ ep_num = ast.literal_eval(ep)
-            x_val = equilibrium[0] - ep_num[0]
-            y_val = equilibrium[1] - ep_num[1]
-
-            distance = np.sqrt(x_val ** 2 + y_val ** 2)
-
-            if distance < epsilon:
-                true_equilibrium = ep
-                return true_equilibrium
+        equilibrium_id = self.table.nearest(equilibrium)
+        if equilibrium_id is None:
+            return False
 
-        return False
+        return self.table.point(equilibrium_id)
 
     def calculated_before(self, equilibrium):
         """ this function essentially does the same as self.is_equilibrium. instead, it is used to check
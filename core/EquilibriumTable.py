@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2016
+#    by Klemens Fritzsche, pyplane@leckstrom.de
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Storage of equilibria (no widgets needed)
+
+Every equilibrium is a row of one structured array: its coordinates, the
+entries of its jacobian, its eigenvalues and type (see
+core.Numerics.classify_equilibria), its label (e.g. "Saddle 0") and the
+index of its artist in the list of EquilibriumHandler. The id of an
+equilibrium is its row. Points closer than the tolerance are the same
+equilibrium (see core.PointIndex).
+
+Example:
+
+    table = EquilibriumTable()
+    i = table.add([0., 0.], equation.jacobian([0., 0.]), "Saddle 0")
+    table.jacobian(i)
+    table.table()       # all rows, e.g. for np.save
+"""
+
+from __future__ import division
+
+__author__ = 'Klemens Fritzsche'
+
+import numpy as np
+
+from core.PointIndex import PointIndex
+from core.Numerics import classify_equilibria
+
+# one row per equilibrium: coordinates, jacobian [[J11, J12], [J21, J22]],
+# eigenvalues, type code (see core.Numerics.equilibrium_names), label and
+# artist index (-1: not plotted)
+equilibrium_dtype = np.dtype([("x", float), ("y", float),
+                              ("J11", float), ("J12", float), ("J21", float), ("J22", float),
+                              ("eigenvalues", complex, (2,)), ("type", np.int8),
+                              ("label", "U20"), ("artist", int)])
+
+
+class EquilibriumTable(object):
+    """ this class stores equilibria by id, equilibria within tolerance of
+        an existing one are not added again
+    """
+    def __init__(self, tolerance=1e-4, capacity=16):
+        self.rows = np.zeros(capacity, dtype=equilibrium_dtype)
+        self.count = 0
+        self.index = PointIndex(tolerance)
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, equilibrium_id):
+        return equilibrium_id is not None and 0 <= equilibrium_id < self.count
+
+    def add(self, point, jacobian, label="", artist=-1, classification=None):
+        """ this function stores an equilibrium and returns its id, or the id
+            of the stored one within the tolerance. classification is its
+            entry of core.Numerics.classify_equilibria (computed if missing)
+        """
+        equilibrium_id, new = self.index.insert(point)
+        if not new:
+            return equilibrium_id
+
+        if classification is None:
+            classification = classify_equilibria(jacobian)[0]
+
+        if self.count == len(self.rows):
+            rows = np.zeros(2 * len(self.rows), dtype=equilibrium_dtype)
+            rows[:self.count] = self.rows[:self.count]
+            self.rows = rows
+
+        # ids of the index are the rows (nothing is removed)
+        assert equilibrium_id == self.count
+        jacobian = np.asarray(jacobian, dtype=float)
+        self.rows[equilibrium_id] = (point[0], point[1], jacobian[0, 0], jacobian[0, 1],
+                                     jacobian[1, 0], jacobian[1, 1], classification["eigenvalues"],
+                                     classification["type"], label, artist)
+        self.count += 1
+
+        return equilibrium_id
+
+    def row(self, equilibrium_id):
+        return self.rows[equilibrium_id]
+
+    def nearest(self, point):
+        """ this function returns the id of the equilibrium within the
+            tolerance of point or None
+        """
+        return self.index.nearest(point)
+
+    def find(self, label):
+        """ this function returns the id of the equilibrium with the label or
+            None
+        """
+        ids = np.flatnonzero(self.rows["label"][:self.count] == label)
+        if len(ids) == 0:
+            return None
+        return int(ids[0])
+
+    def point(self, equilibrium_id):
+        row = self.rows[equilibrium_id]
+        return [float(row["x"]), float(row["y"])]
+
+    def jacobian(self, equilibrium_id):
+        row = self.rows[equilibrium_id]
+        return np.array([[row["J11"], row["J12"]], [row["J21"], row["J22"]]])
+
+    def points(self):
+        """ this function returns the coordinates of all equilibria (shape
+            (n, 2))
+        """
+        return np.column_stack((self.rows["x"][:self.count], self.rows["y"][:self.count]))
+
+    def jacobians(self):
+        """ this function returns the jacobians of all equilibria (shape
+            (n, 2, 2))
+        """
+        rows = self.rows[:self.count]
+        return np.stack((rows["J11"], rows["J12"], rows["J21"], rows["J22"]),
+                        axis=-1).reshape(-1, 2, 2)
+
+    def labels(self):
+        return [str(label) for label in self.rows["label"][:self.count]]
+
+    def clear(self):
+        self.__init__(self.index.tolerance, len(self.rows))
+
+    def table(self):
+        """ this function returns a copy of all rows (structured array), e.g.
+            for np.save
+        """
+        return self.rows[:self.count].copy()
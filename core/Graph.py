@@ -248,6 +248,7 @@ class PhasePlot(Plot):
         self.myWidget.VF.update()
         self.myWidget.SL.update()
         self.myWidget.Nullclines.update()
+        self.myWidget.mySystem.Trajectories.refine()
 
     def onclick(self, event):
         """
@@ -269,6 +270,12 @@ class PhasePlot(Plot):
                     forward, backward = self.myWidget.trajectory_direction()
                     if self.myWidget.mySystem.Trajectories.plot_trajectory([event.xdata, event.ydata], forward, backward):
                         myLogger.message("New initial condition: " + str(event.xdata) + ", " + str(event.ydata))
+                elif event1 and event2 and event.button == 3:
+                    # right click: remove the trajectory next to the mouse
+                    initial_condition = self.myWidget.mySystem.Trajectories.pick([event.xdata, event.ydata])
+                    if initial_condition is not None:
+                        self.myWidget.mySystem.Trajectories.remove(initial_condition)
+                        myLogger.message("Trajectory removed: " + str(initial_condition[0]) + ", " + str(initial_condition[1]))
                 else:
                     pass
             else:
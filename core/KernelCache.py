@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2016
+#    by Klemens Fritzsche, pyplane@leckstrom.de
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Module implementing a persistent cache for compiled systems
+
+Every entry holds the generated source (see core.Codegen) of a system and
+is stored as a json file named after the hash of the system strings and
+the backend. Reopening a system therefore skips sympify, cse and diff.
+The least recently used entries are deleted if the cache exceeds its size.
+"""
+
+__author__ = 'Klemens Fritzsche'
+
+import os
+import json
+import hashlib
+
+import sympy as sp
+
+from core.Logging import myLogger
+from core.ConfigHandler import myConfig
+from core.Codegen import codegen_version
+
+
+def kernel_key(x_dot_string, y_dot_string, backend, names=()):
+    """ this function returns the hash of a system. whitespace in the
+        strings is ignored. names are the parameter names (they change the
+        parsing, see core.Equation.generate_kernels)
+    """
+    x_dot_string = "".join(str(x_dot_string).split())
+    y_dot_string = "".join(str(y_dot_string).split())
+
+    key = "\n".join([x_dot_string, y_dot_string, str(backend), ",".join(sorted(names)),
+                     str(codegen_version), sp.__version__])
+
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+class KernelCache(object):
+    """ this class handles the read and write methods for the kernel cache
+    """
+    # file name extension of the entries
+    extension = ".json"
+
+    def __init__(self, directory=None, max_size=None):
+        __dir__ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+        if directory is None:
+            directory = myConfig.read("System", "cache_directory")
+        if max_size is None:
+            max_size = myConfig.read("System", "cache_maxsize")
+
+        self.directory = os.path.join(__dir__, str(directory))
+        # in kB, 0 disables the cache
+        self.max_size = float(max_size) * 1024
+
+    def enabled(self):
+        return self.max_size > 0
+
+    def path(self, key):
+        return os.path.join(self.directory, key + self.extension)
+
+    def load(self, key):
+        """ this function returns the cached entry or None
+        """
+        if not self.enabled():
+            return None
+
+        path = self.path(key)
+        try:
+            with open(path, 'r') as cachefile:
+                entry = json.load(cachefile)
+            # mark as recently used
+            os.utime(path, None)
+        except (IOError, OSError, ValueError):
+            return None
+
+        myLogger.debug_message("kernel cache hit: " + key)
+        return entry
+
+    def store(self, key, entry):
+        if not self.enabled():
+            return
+
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+
+            with open(self.path(key), 'w') as cachefile:
+                json.dump(entry, cachefile)
+
+            self.evict()
+        except (IOError, OSError) as error:
+            myLogger.debug_message("could not write kernel cache: " + str(error))
+
+    def evict(self):
+        """ this function deletes the least recently used entries until the
+            cache is smaller than max_size
+        """
+        entries = []
+        total_size = 0
+        for file_name in os.listdir(self.directory):
+            if file_name.endswith(self.extension):
+                path = os.path.join(self.directory, file_name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total_size += stat.st_size
+
+        entries.sort()
+        while total_size > self.max_size and len(entries) > 0:
+            mtime, size, path = entries.pop(0)
+            os.remove(path)
+            total_size -= size
+
+    def clear(self):
+        if os.path.isdir(self.directory):
+            for file_name in os.listdir(self.directory):
+                if file_name.endswith(self.extension):
+                    os.remove(os.path.join(self.directory, file_name))
+
+
+# prepare kernel cache for importing
+myKernelCache = KernelCache()
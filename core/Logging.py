@@ -20,13 +20,21 @@ __author__ = 'Klemens Fritzsche'
 
 """
 Module implementing logging capabilities
+
+Without PyQt4 (headless use of core, see core.Numerics) messages are only
+written to the log file and to an optional output function.
 """
 
+import os
 import time
 
-from PyQt4 import QtCore, QtGui
+try:
+    from PyQt4 import QtGui
+except ImportError:
+    QtGui = None
 
-defaultLogFileName = 'config/logmessages.txt'
+__dir__ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+defaultLogFileName = os.path.join(__dir__, 'config', 'logmessages.txt')
 
 
 class Logger(object):
@@ -44,7 +52,10 @@ class Logger(object):
         self.msg_list = []
 
         self.err_flag = False
-        self.signalemitter = QtCore.QObject()
+
+        # QTextEdit (see register_output) and/or function f(msg)
+        self.ppTerminal = None
+        self.output = None
 
         # TODO Read This from Config
         self.dbg_verbosity_level = 5
@@ -77,6 +88,12 @@ class Logger(object):
         assert isinstance(terminal, QtGui.QTextEdit)
         self.ppTerminal = terminal
 
+    def set_output(self, output):
+        """ output is called with every message, e.g. print for scripts or
+            batch jobs. None turns it off
+        """
+        self.output = output
+
     def sec_to_string(self, sec):
         """
         converts a given number (seconds) to a string
@@ -94,23 +111,26 @@ class Logger(object):
         return string
 
     def message(self, msg, color='white'):
-
-        # set text color
-        if color == 'white':
-            self.ppTerminal.setTextColor(QtGui.QColor(255, 255, 255, 255))
-        elif color == 'red':
-            self.ppTerminal.setTextColor(QtGui.QColor(221, 30, 47, 255))
-        elif color == 'gray':
-            self.ppTerminal.setTextColor(QtGui.QColor(105, 105, 105, 255))
-        else:
-            # gray, too
-            self.ppTerminal.setTextColor(QtGui.QColor(105, 105, 105, 255))
-
         t = time.time() - self.t_zero
 
         msg = "%s: %s" % (self.sec_to_string(t), msg)
 
-        self.ppTerminal.append(msg)
+        if self.ppTerminal is not None:
+            # set text color
+            if color == 'white':
+                self.ppTerminal.setTextColor(QtGui.QColor(255, 255, 255, 255))
+            elif color == 'red':
+                self.ppTerminal.setTextColor(QtGui.QColor(221, 30, 47, 255))
+            elif color == 'gray':
+                self.ppTerminal.setTextColor(QtGui.QColor(105, 105, 105, 255))
+            else:
+                # gray, too
+                self.ppTerminal.setTextColor(QtGui.QColor(105, 105, 105, 255))
+
+            self.ppTerminal.append(msg)
+
+        if self.output is not None:
+            self.output(msg)
 
         #msg=time.ctime()+" "+msg
         self.msg_list.append(msg)
@@ -132,10 +152,16 @@ class Logger(object):
 
     def create_file(self):
         # erase all
-        thefile = open(self.fname, 'w')
-        thefile.close()
+        try:
+            thefile = open(self.fname, 'w')
+            thefile.close()
+        except IOError:
+            # e.g. read-only installation: no log file
+            self.fname = None
 
     def append_to_file(self, msg):
+        if self.fname is None:
+            return
         # open in append mode
         with open(self.fname, 'a') as thefile:
             thefile.writelines(msg + '\n')
@@ -18,14 +18,13 @@
 
 __author__ = 'Klemens Fritzsche'
 
-import numpy as np
 import sympy as sp
 from sympy.solvers import solve
 import matplotlib.pyplot as pyplot
 
 from core.Logging import myLogger
 from core.ConfigHandler import myConfig
-from core.Canvas import Canvas
+from core.Numerics import nullcline_grid
 
 
 class NullclineHandler(object):
@@ -53,18 +52,13 @@ class NullclineHandler(object):
             # get axis limits
             xmin, xmax, ymin, ymax = self.myWidget.Plot.canvas.axes.axis()
 
-            pts_in_x = int(myConfig.read("Nullclines", "nc_gridPointsInX"))
-            pts_in_y = int(myConfig.read("Nullclines", "nc_gridPointsInY"))
             nc_color_xdot = myConfig.read("Nullclines", "nc_color_xdot")
             nc_color_ydot = myConfig.read("Nullclines", "nc_color_ydot")
             nc_linewidth = float(myConfig.read("Nullclines", "nc_linewidth"))
 
-            a = np.arange(xmin, xmax, (xmax - xmin) / pts_in_x)
-            b = np.arange(ymin, ymax, (xmax - xmin) / pts_in_y)
-            X1, Y1 = np.meshgrid(a, b)
-
             try:
-                DX1, DY1 = self.myWidget.mySystem.equation.rhs([X1, Y1])
+                X1, Y1, DX1, DY1 = nullcline_grid(self.myWidget.mySystem.equation,
+                                                  (xmin, xmax), (ymin, ymax))
 
                 nullclines_xdot = self.myWidget.Plot.canvas.axes.contour(X1, Y1, DX1,
                                                             levels=[0],
@@ -0,0 +1,929 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2016
+#    by Klemens Fritzsche, pyplane@leckstrom.de
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Numerical part of pyplane without any widgets
+
+Every function takes an Equation and returns numpy arrays, the handlers of
+the gui only turn these into matplotlib artists. Settings which are not
+given are read from myConfig, messages go to myLogger (see
+Logger.set_output). Example:
+
+    from core.api import Equation, trajectory, integration_time
+    equation = Equation(("y", "mu*(1-x**2)*y-x"), parameters={"mu": 1.})
+    z = trajectory(equation, [1., 0.], integration_time(10., 0.01))
+"""
+
+from __future__ import division
+
+__author__ = 'Klemens Fritzsche'
+
+import copy
+import math
+import functools
+import multiprocessing
+from multiprocessing.pool import ThreadPool
+
+import numpy as np
+from scipy import integrate
+from scipy.optimize import brentq
+from matplotlib.figure import Figure
+
+from core.ConfigHandler import myConfig
+from core.PointIndex import PointIndex
+
+
+def integration_time(time=None, step=None):
+    """ this function returns the time vector for trajectories
+        ([Trajectories] traj_integrationtime and traj_integrationstep)
+    """
+    if time is None:
+        time = myConfig.read("Trajectories", "traj_integrationtime")
+    if step is None:
+        step = myConfig.read("Trajectories", "traj_integrationstep")
+    return np.arange(0, float(time), float(step))
+
+
+def trajectory(equation, initial_condition, time, backward=False):
+    """ this function integrates the system from initial_condition. the
+        result has the shape (len(time), 2), backward trajectories are
+        integrated in -time
+    """
+    if backward:
+        rhs = equation.integrand(-1.)
+        jacobian = equation.n_jacobian
+    else:
+        rhs = equation.integrand()
+        jacobian = equation.jacobian
+
+    return integrate.odeint(rhs, list(initial_condition), time, Dfun=jacobian)
+
+
+# solvers of scipy.integrate (solve_ivp methods) for [Trajectories]
+# traj_solver, the implicit ones get the exact jacobian
+adaptive_solvers = ("RK23", "RK45", "DOP853", "LSODA", "Radau", "BDF")
+implicit_solvers = ("LSODA", "Radau", "BDF")
+
+# why the integration of a trajectory ended (Solution.reason)
+termination_messages = {"time": "integration time reached",
+                        "window": "left the window",
+                        "max_norm": "norm exceeded max_norm",
+                        "equilibrium": "converged to an equilibrium",
+                        "periodic": "closed a periodic orbit",
+                        "failed": "solver failed",
+                        "cancelled": "cancelled"}
+
+
+class Termination(object):
+    """ this class checks after every step of an adaptive solver if the
+        trajectory can be stopped early:
+
+        - it is outside of window ((xmin, xmax), (ymin, ymax), None: no check)
+        - its norm exceeds max_norm (the system is clamped there)
+        - its speed is less than speed (equilibrium, None: no check)
+        - it crosses the line through the initial condition (perpendicular
+          to the flow) twice at nearly the same point: the distance of both
+          crossings is less than periodic times the length of the orbit in
+          between (None: no check). the length makes the difference to
+          spirals into an equilibrium, where both get small
+    """
+    def __init__(self, max_norm, window=None, speed=None, periodic=None):
+        self.max_norm = max_norm
+        self.window = window
+        self.speed = speed
+        self.periodic = periodic
+
+    def start(self, z, f):
+        """ this function resets the checks for a trajectory starting in z
+            with the right hand side f
+        """
+        self.x, self.y = self.point = [float(v) for v in z]
+        norm = math.hypot(f[0], f[1])
+        self.normal = (f[0] / norm, f[1] / norm) if norm > 0 else None
+        # distance to the line through the initial condition, last crossing
+        # and length of the orbit since then
+        self.g = 0.
+        self.crossing = None
+        self.length = 0.
+
+    def check(self, t0, t1, z, f, dense):
+        """ this function returns the reason to stop after the step from t0
+            to t1 or None. z and f are the point and the right hand side at
+            t1, dense is the continuous solution of the step
+        """
+        x, y = z[0], z[1]
+        x0, y0 = self.x, self.y
+        self.x, self.y = x, y
+
+        if math.hypot(x, y) >= self.max_norm:
+            return "max_norm"
+
+        if self.window is not None:
+            (xmin, xmax), (ymin, ymax) = self.window
+            if not (xmin <= x <= xmax and ymin <= y <= ymax):
+                return "window"
+
+        if self.speed is not None and math.hypot(f[0], f[1]) < self.speed:
+            return "equilibrium"
+
+        if self.periodic is not None and self.normal is not None:
+            self.length += math.hypot(x - x0, y - y0)
+
+            (px, py), (nx, ny) = self.point, self.normal
+            g0 = self.g
+            self.g = (x - px) * nx + (y - py) * ny
+            if g0 < 0 <= self.g:
+                def g(t):
+                    zt = dense(t)
+                    return (zt[0] - px) * nx + (zt[1] - py) * ny
+
+                crossing = dense(brentq(g, t0, t1))
+                if self.crossing is not None:
+                    distance = math.hypot(crossing[0] - self.crossing[0],
+                                          crossing[1] - self.crossing[1])
+                    if distance < self.periodic * self.length:
+                        return "periodic"
+                self.crossing = crossing
+                self.length = 0.
+
+        return None
+
+
+class HermiteDense(object):
+    """ cubic hermite interpolation of the points z and their derivatives f
+        at the times t. it replaces the dense output of the solvers in
+        pickled solutions (much smaller), the result has the same shape
+    """
+    def __init__(self, t, z, f):
+        self.t = t
+        self.z = z
+        self.f = f
+
+    def __call__(self, t):
+        t = np.asarray(t, dtype=float)
+        i = np.clip(np.searchsorted(self.t, t, side="right") - 1, 0, len(self.t) - 2)
+
+        h = self.t[i + 1] - self.t[i]
+        s = ((t - self.t[i]) / h)[..., np.newaxis]
+        h = h[..., np.newaxis]
+        z = ((1 + 2 * s) * (1 - s) ** 2 * self.z[i] + s * (1 - s) ** 2 * h * self.f[i] +
+             s ** 2 * (3 - 2 * s) * self.z[i + 1] + s ** 2 * (s - 1) * h * self.f[i + 1])
+
+        return z.T
+
+
+class Solution(object):
+    """ integrated trajectory: times t (always counting up from 0, also for
+        backward trajectories) and points z with shape (len(t), 2).
+        adaptive solvers only return their steps, dense is the continuous
+        solution between them (None for odeint) and f holds the right hand
+        side in every step
+    """
+    def __init__(self, t, z, backward=False, solver="odeint", dense=None, reason="time", f=None):
+        self.t = t
+        self.z = z
+        self.backward = backward
+        self.solver = solver
+        self.dense = dense
+        # key of termination_messages
+        self.reason = reason
+        self.f = f
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        if self.f is not None:
+            state["dense"] = HermiteDense(self.t, self.z, self.f)
+        return state
+
+    def refine(self, xlim, ylim, resolution=500, max_pieces=100):
+        """ this function returns (t, z) for plotting in the window xlim x
+            ylim: every step that is visible and longer than
+            1/resolution of the window is divided into pieces of about this
+            length using the dense output
+        """
+        if self.dense is None or len(self.t) < 2:
+            return self.t, self.z
+
+        z = self.z
+        (xmin, xmax), (ymin, ymax) = xlim, ylim
+
+        pixel = np.array([xmax - xmin, ymax - ymin]) / resolution
+        pieces = np.ceil((np.abs(np.diff(z, axis=0)) / pixel).max(axis=1))
+
+        # steps crossing the window (bounding box of both ends)
+        low = np.minimum(z[:-1], z[1:])
+        high = np.maximum(z[:-1], z[1:])
+        visible = ((high[:, 0] >= xmin) & (low[:, 0] <= xmax) &
+                   (high[:, 1] >= ymin) & (low[:, 1] <= ymax))
+        pieces = np.where(visible, np.clip(pieces, 1, max_pieces), 1).astype(int)
+
+        # k-th of pieces[i] times in step i
+        step = np.repeat(np.arange(len(pieces)), pieces)
+        k = np.arange(len(step)) - np.repeat(np.cumsum(pieces) - pieces, pieces)
+        t = self.t[step] + (self.t[step + 1] - self.t[step]) * k / pieces[step]
+        t = np.append(t, self.t[-1])
+
+        return t, self.dense(t).T
+
+
+def valid_segments(z, max_norm):
+    """ this function returns the slices of the contiguous runs of finite
+        points in z (shape (n, 2)) with a norm up to max_norm
+    """
+    z = np.asarray(z, dtype=float)
+    with np.errstate(invalid="ignore"):
+        valid = np.hypot(z[:, 0], z[:, 1]) <= max_norm
+
+    # +1 where a run starts, -1 after its last point
+    edges = np.diff(np.concatenate(([0], valid.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    stops = np.flatnonzero(edges == -1)
+
+    return [slice(start, stop) for start, stop in zip(starts, stops)]
+
+
+def split_segments(t, z, max_norm):
+    """ this function drops the invalid points of a trajectory (see
+        valid_segments) and returns (t, z) for plotting: the segments are
+        separated by a row of nan, where matplotlib interrupts the line
+    """
+    segments = valid_segments(z, max_norm)
+    if len(segments) == 1 and segments[0].start == 0 and segments[0].stop == len(z):
+        return t, z
+
+    # index of every valid point, -1 for the separators
+    index = np.full(sum(segment.stop - segment.start for segment in segments) +
+                    max(len(segments) - 1, 0), -1, dtype=int)
+    position = 0
+    for segment in segments:
+        if position:
+            position += 1
+        index[position:position + segment.stop - segment.start] = np.arange(segment.start,
+                                                                             segment.stop)
+        position += segment.stop - segment.start
+
+    separator = index < 0
+    t = np.where(separator, np.nan, np.asarray(t, dtype=float)[index])
+    z = np.where(separator[:, np.newaxis], np.nan, np.asarray(z, dtype=float)[index])
+
+    return t, z
+
+
+def termination(equation, window=None, stop=None):
+    """ this function returns the Termination for the settings in [Trajectories]
+        (None if traj_stopEarly is off and stop is not given). window is
+        enlarged by traj_windowMargin on every side
+    """
+    if stop is None:
+        stop = myConfig.get_boolean("Trajectories", "traj_stopEarly")
+    if not stop:
+        return None
+
+    if window is not None:
+        margin = float(myConfig.read("Trajectories", "traj_windowMargin"))
+        (xmin, xmax), (ymin, ymax) = window
+        dx = margin * (xmax - xmin)
+        dy = margin * (ymax - ymin)
+        window = ((xmin - dx, xmax + dx), (ymin - dy, ymax + dy))
+
+    return Termination(equation.max_norm, window,
+                       float(myConfig.read("Trajectories", "traj_stopSpeed")),
+                       float(myConfig.read("Trajectories", "traj_periodicTolerance")))
+
+
+# options of solve_trajectory read from [Trajectories] (see
+# trajectory_options): name -> (config key, type)
+trajectory_settings = {"solver": ("traj_solver", str),
+                       "time": ("traj_integrationtime", float),
+                       "step": ("traj_integrationstep", float),
+                       "rtol": ("traj_rtol", float),
+                       "atol": ("traj_atol", float)}
+
+
+def trajectory_options(options):
+    """ this function adds the settings for solve_trajectory from
+        [Trajectories] to the dict options (where they are not given). it is
+        used before the integration is handed to other threads or processes,
+        complete options are not read from the config again
+    """
+    for name, (key, kind) in trajectory_settings.items():
+        if name not in options:
+            options[name] = kind(myConfig.read("Trajectories", key))
+    return options
+
+
+def solve_trajectory(equation, initial_condition, time=None, backward=False, solver=None,
+                     step=None, rtol=None, atol=None, stop=None, callback=None):
+    """ this function integrates the system from initial_condition for the
+        given time and returns a Solution. odeint uses a fixed time grid
+        with the given step, the adaptive solvers only keep the points they
+        need for the tolerances rtol and atol.
+        with a Termination as stop the adaptive solvers end as soon as the
+        trajectory leaves the window, blows up, converges to an equilibrium
+        or closes a periodic orbit (odeint always integrates the full time).
+        callback(t, z) is called after every step of the adaptive solvers
+        with the new point, if it returns False the integration is cancelled
+    """
+    if solver is None:
+        solver = str(myConfig.read("Trajectories", "traj_solver"))
+
+    if solver == "odeint":
+        t = integration_time(time, step)
+        return Solution(t, trajectory(equation, initial_condition, t, backward), backward)
+    if solver not in adaptive_solvers:
+        raise ValueError("unknown solver " + solver)
+
+    if time is None:
+        time = myConfig.read("Trajectories", "traj_integrationtime")
+    if rtol is None:
+        rtol = myConfig.read("Trajectories", "traj_rtol")
+    if atol is None:
+        atol = myConfig.read("Trajectories", "traj_atol")
+
+    if backward:
+        f = equation.integrand(-1.)
+        jacobian = equation.n_jacobian
+    else:
+        f = equation.integrand()
+        jacobian = equation.jacobian
+
+    # integrand writes into the same buffer every call, the solvers keep the
+    # result of the last step
+    def rhs(t, z):
+        return f(z, t).copy()
+
+    options = {}
+    if solver in implicit_solvers:
+        options["jac"] = lambda t, z: jacobian(z, t)
+
+    # same as solve_ivp, but the steps are checked one by one
+    z = np.array(initial_condition, dtype=float)
+    ode = getattr(integrate, solver)(rhs, 0., z, float(time), rtol=float(rtol),
+                                     atol=float(atol), **options)
+    if stop is not None:
+        stop.start(z, f(z, 0.))
+
+    ts = [0.]
+    zs = [z]
+    fs = [rhs(0., z)]
+    interpolants = []
+    reason = "time"
+    while ode.status == "running":
+        ode.step()
+        if ode.status == "failed":
+            reason = "failed"
+            break
+
+        interpolant = ode.dense_output()
+        ts.append(ode.t)
+        zs.append(ode.y.copy())
+        fs.append(rhs(ode.t, ode.y))
+        interpolants.append(interpolant)
+
+        if stop is not None:
+            reason = stop.check(ts[-2], ts[-1], zs[-1].tolist(), fs[-1], interpolant)
+            if reason is not None:
+                break
+            reason = "time"
+
+        if callback is not None and callback(ode.t, zs[-1]) is False:
+            reason = "cancelled"
+            break
+
+    if not interpolants:
+        return Solution(np.array(ts), np.array(zs), backward, solver, None, reason)
+
+    return Solution(np.array(ts), np.array(zs), backward, solver,
+                    integrate.OdeSolution(ts, interpolants), reason, np.array(fs))
+
+
+# equation of a worker process of solve_trajectories
+worker_equation = None
+
+
+def init_worker(equation):
+    global worker_equation
+    worker_equation = equation
+
+
+def solve_job(job, equation=None):
+    index, initial_condition, backward, options = job
+    if equation is None:
+        equation = worker_equation
+
+    # a Termination keeps the state of one trajectory
+    if options.get("stop") is not None:
+        options = dict(options, stop=copy.copy(options["stop"]))
+
+    return index, solve_trajectory(equation, initial_condition, backward=backward, **options)
+
+
+def solve_trajectories(equation, initial_conditions, backward=False, workers=None, pool=None,
+                       **options):
+    """ this function integrates trajectories for an array of initial
+        conditions (shape (n, 2)) in a pool of workers. backward is a single
+        direction or one per initial condition. it yields (i, Solution) in
+        the order the trajectories are finished, i is the index of the
+        initial condition.
+
+        pool is "process" or "thread" ([Trajectories] traj_pool), workers
+        the size of the pool ([Trajectories] traj_workers, 0: one per cpu).
+        the other options are passed to solve_trajectory, settings which
+        are not given are read from the config here (the processes get the
+        same values)
+    """
+    if pool is None:
+        pool = str(myConfig.read("Trajectories", "traj_pool"))
+    if workers is None:
+        workers = int(myConfig.read("Trajectories", "traj_workers"))
+    if workers <= 0:
+        workers = multiprocessing.cpu_count()
+
+    # settings from the config of this process
+    trajectory_options(options)
+
+    initial_conditions = np.asarray(initial_conditions, dtype=float).reshape(-1, 2)
+    backward = np.broadcast_to(backward, len(initial_conditions))
+    jobs = [(i, initial_conditions[i].tolist(), bool(backward[i]), options)
+            for i in range(len(initial_conditions))]
+
+    if pool == "thread":
+        executor = ThreadPool(workers)
+        job = functools.partial(solve_job, equation=equation)
+    elif pool == "process":
+        # every process compiles the equation once (see Equation.__reduce__)
+        executor = multiprocessing.Pool(workers, init_worker, (equation,))
+        job = solve_job
+    else:
+        raise ValueError("unknown pool " + pool)
+
+    # a few chunks per worker: less communication, results still stream
+    chunksize = max(1, len(jobs) // (8 * workers))
+
+    try:
+        for result in executor.imap_unordered(job, jobs, chunksize):
+            yield result
+    finally:
+        executor.terminate()
+        executor.join()
+
+
+# one entry per seed of find_roots: the point reached, iterations (newton
+# and fallback), residual |f| there, convergence and the method of the
+# last iteration ("newton", "lm", a method of scipy.optimize.root or
+# "" for seeds that left max_norm)
+root_dtype = np.dtype([("x", float), ("y", float), ("iterations", int), ("residual", float),
+                       ("converged", bool), ("method", "U8")])
+
+
+def find_roots(equation, seeds, iterlimit=50, ftol=1e-10, xtol=1e-12, steptol=1e-6, fallback="lm"):
+    """ this function searches roots of the system (equilibria) for an array
+        of seeds (shape (n, 2)) at once. damped newton's method halves its
+        steps until the residual decreases (with the jacobian of the current
+        point), seeds where it fails (singular jacobian, no decrease,
+        iterlimit) continue with fallback: "lm" (levenberg-marquardt, batched
+        as well), another method of scipy.optimize.root (seed by seed) or
+        None. seeds leaving max_norm are dropped. at multiple roots newton's
+        method converges linearly only, components of the steps shrinking
+        by a constant ratio q are extrapolated to the root (step / (1 - q),
+        aitken's method).
+
+        a seed converged if its residual is at most ftol times |f| at the
+        seed (at least 1) and newton's step is below xtol relative to the
+        point, or below steptol if it does not decrease the residual any
+        more (stall, e.g. rounding errors at multiple roots). a small
+        residual alone is not enough: near a multiple root it is reached
+        far from the root. seeds whose steps are below xtol (rounding) with a
+        residual of at most ftol times the size of f around the point (see
+        rounding_limit) converged as well. it returns a structured array
+        (root_dtype) with one entry per seed
+    """
+    seeds = np.array(seeds, dtype=float).reshape(-1, 2)
+    n = len(seeds)
+    roots = np.zeros(n, dtype=root_dtype)
+    x = seeds[:, 0].copy()
+    y = seeds[:, 1].copy()
+
+    def extrapolation(q, last_q):
+        # linear convergence: constant ratio q of the steps
+        linear = (0.1 < q) & (q < 0.95) & (np.abs(q - last_q) <= 0.05 * q)
+        return np.where(linear, 1 / (1 - q), 1.)
+
+    def evaluate(x, y):
+        f = np.asarray(equation.compiled_rhs((x, y), dtype=equation.precision), dtype=float)
+        return f[0] * np.ones_like(x), f[1] * np.ones_like(x)
+
+    # diverging seeds overflow or hit singular jacobians
+    with np.errstate(all="ignore"):
+        fx, fy = evaluate(x, y)
+        residual = np.hypot(fx, fy)
+        # limits of every seed, not of the whole grid: the largest |f| of a
+        # grid grows with the window and would accept minima of |f|
+        small = ftol * np.maximum(1., np.maximum(np.abs(fx), np.abs(fy)))
+
+        iterations = np.zeros(n, dtype=int)
+        method = np.array(["newton"] * n, dtype="U8")
+        converged = residual == 0
+        # last newton steps and their ratios to the ones before
+        last_dx, last_dy = np.full(n, np.inf), np.full(n, np.inf)
+        last_qx, last_qy = np.zeros(n), np.zeros(n)
+        method[~np.isfinite(residual)] = ""
+        # seeds still iterating and seeds for the fallback
+        active = np.flatnonzero(~converged & np.isfinite(residual))
+        failed = []
+
+        for iteration in range(iterlimit):
+            if len(active) == 0:
+                break
+            iterations[active] += 1
+            jac = equation.jacobian_array(x[active], y[active])
+
+            # newton step: solve jac * step = -f (2 x 2, cramer's rule)
+            det = jac[:, 0, 0] * jac[:, 1, 1] - jac[:, 0, 1] * jac[:, 1, 0]
+            dx = (jac[:, 0, 1] * fy[active] - jac[:, 1, 1] * fx[active]) / det
+            dy = (jac[:, 1, 0] * fx[active] - jac[:, 0, 0] * fy[active]) / det
+            # singular jacobians (e.g. at multiple roots after an
+            # extrapolated step): least squares step of the pseudo inverse
+            rank = np.flatnonzero(~(np.isfinite(dx) & np.isfinite(dy)) &
+                                  np.isfinite(jac).all(axis=(1, 2)))
+            if len(rank) > 0:
+                seed = active[rank]
+                pinv = np.linalg.pinv(jac[rank])
+                dx[rank] = -(pinv[:, 0, 0] * fx[seed] + pinv[:, 0, 1] * fy[seed])
+                dy[rank] = -(pinv[:, 1, 0] * fx[seed] + pinv[:, 1, 1] * fy[seed])
+            singular = ~(np.isfinite(dx) & np.isfinite(dy)) | ((dx == 0) & (dy == 0))
+            dx[singular] = dy[singular] = 0.
+
+            # multiple roots: extrapolated steps (see extrapolation)
+            qx, qy = dx / last_dx[active], dy / last_dy[active]
+            sx = dx * extrapolation(qx, last_qx[active])
+            sy = dy * extrapolation(qy, last_qy[active])
+            last_dx[active], last_dy[active], last_qx[active], last_qy[active] = dx, dy, qx, qy
+
+            # damping: halve the steps until the residual decreases,
+            # extrapolated steps fall back to newton's step first
+            damping = np.ones(len(active))
+            accepted = np.zeros(len(active), dtype=bool)
+            trying = np.flatnonzero(~singular)
+            for halving in range(10):
+                if len(trying) == 0:
+                    break
+                seed = active[trying]
+                tx = x[seed] + damping[trying] * sx[trying]
+                ty = y[seed] + damping[trying] * sy[trying]
+                tfx, tfy = evaluate(tx, ty)
+                tr = np.hypot(tfx, tfy)
+                better = tr <= (1 - 1e-4 * damping[trying]) * residual[seed]
+                done = trying[better]
+                seed = seed[better]
+                x[seed], y[seed], fx[seed], fy[seed], residual[seed] = \
+                    tx[better], ty[better], tfx[better], tfy[better], tr[better]
+                accepted[done] = True
+                trying = trying[~better]
+                extrapolated = (sx[trying] != dx[trying]) | (sy[trying] != dy[trying])
+                sx[trying], sy[trying] = dx[trying], dy[trying]
+                damping[trying[~extrapolated]] /= 2
+
+            # steps of the order of rounding errors (singular seeds did not
+            # step at all)
+            tiny = (np.abs(damping * sx) <= xtol * (1 + np.abs(x[active]))) & \
+                (np.abs(damping * sy) <= xtol * (1 + np.abs(y[active]))) & ~singular
+            size = 1 + np.maximum(np.abs(x[active]), np.abs(y[active]))
+            short = (np.hypot(dx, dy) <= xtol * size) & ~singular
+            stalled = ~accepted & (np.hypot(dx, dy) <= steptol * size) & ~singular
+            rounding = rounding_limit(jac, x[active], y[active], ftol)
+            converged[active] = ((residual[active] <= small[active]) & (short | stalled)) | \
+                (residual[active] == 0) | (tiny & (residual[active] <= rounding))
+            outside = np.hypot(x[active], y[active]) >= equation.max_norm
+            method[active[outside & ~converged[active]]] = ""
+
+            remaining = ~converged[active] & ~outside
+            failed.append(active[remaining & (~accepted | tiny)])
+            active = active[remaining & accepted & ~tiny]
+        failed.append(active)
+        failed = np.sort(np.concatenate(failed)).astype(int)
+
+        if fallback == "lm":
+            levenberg_marquardt(equation, evaluate, failed, x, y, fx, fy, residual, iterations,
+                                converged, iterlimit, small, ftol, xtol)
+            method[failed] = "lm"
+        elif fallback is not None:
+            from scipy.optimize import root
+
+            def function(z):
+                return np.array(evaluate(z[0], z[1])).ravel()
+
+            for seed in failed:
+                result = root(function, [x[seed], y[seed]], jac=equation.jacobian, method=fallback)
+                z = np.asarray(result.x, dtype=float)
+                r = float(np.hypot(*function(z)))
+                if r <= residual[seed]:
+                    x[seed], y[seed], residual[seed] = z[0], z[1], r
+                iterations[seed] += int(getattr(result, "nit", result.nfev))
+                rounding = rounding_limit(equation.jacobian_array(x[seed], y[seed]), x[seed],
+                                          y[seed], ftol)
+                converged[seed] = residual[seed] <= max(small[seed], rounding[0])
+                method[seed] = fallback
+
+    roots["x"], roots["y"] = x, y
+    roots["iterations"] = iterations
+    roots["residual"] = residual
+    roots["converged"] = converged & np.isfinite(residual)
+    roots["method"] = method
+    return roots
+
+
+def rounding_limit(jacobians, x, y, ftol):
+    """ this function returns the residuals of find_roots which are left by
+        rounding errors: ftol times the change of f over the size of the
+        points (at least ftol)
+    """
+    size = np.abs(jacobians).reshape(-1, 4).max(axis=1) * (1 + np.abs(x) + np.abs(y))
+    return ftol * np.maximum(1., size)
+
+
+def merge_roots(equation, points, radius, limits=None, ftol=1e-10, samples=8):
+    """ this function returns which roots (shape (n, 2)) are kept: the first
+        of roots closer than radius whose connecting segment keeps |f| below
+        the residual limit of find_roots (limits of the roots, at least
+        rounding_limit) are the same root. the distance alone is no test:
+        near multiple roots converged points scatter more than rounding
+        errors, distinct roots may be close
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    n = len(points)
+    label = np.arange(n)
+
+    first, second = np.triu_indices(n, 1)
+    near = np.hypot(*(points[first] - points[second]).T) <= radius
+    first, second = first[near], second[near]
+    if len(first) > 0:
+        jacobians = equation.jacobian_array(points[:, 0], points[:, 1])
+        limit = rounding_limit(jacobians, points[:, 0], points[:, 1], ftol)
+        if limits is not None:
+            limit = np.maximum(limit, limits)
+
+        # inner points of the segments (shape (pairs, samples))
+        s = np.linspace(0., 1., samples + 2)[1:-1]
+        x = points[first, 0, None] + s * (points[second, 0] - points[first, 0])[:, None]
+        y = points[first, 1, None] + s * (points[second, 1] - points[first, 1])[:, None]
+        with np.errstate(all="ignore"):
+            f = np.asarray(equation.compiled_rhs((x, y), dtype=equation.precision), dtype=float)
+        same = np.hypot(f[0], f[1]).max(axis=1) <= np.maximum(limit[first], limit[second])
+
+        # groups of the same root get the label of their first root
+        for i, j in zip(first[same], second[same]):
+            label[label == label[j]] = label[i]
+
+    return label == np.arange(n)
+
+
+def levenberg_marquardt(equation, evaluate, seeds, x, y, fx, fy, residual, iterations, converged,
+                        iterlimit, small, ftol, xtol):
+    """ this function continues find_roots with the levenberg-marquardt method
+        for the seeds (indices), the arrays are updated in place. the step
+        solves (J^T J + mu I) step = -J^T f, mu shrinks after successful
+        steps and grows after failed ones
+    """
+    active = np.asarray(seeds, dtype=int)
+    mu = None
+    for iteration in range(iterlimit):
+        if len(active) == 0:
+            break
+        iterations[active] += 1
+        jac = equation.jacobian_array(x[active], y[active])
+        a = jac[:, 0, 0] ** 2 + jac[:, 1, 0] ** 2
+        b = jac[:, 0, 0] * jac[:, 0, 1] + jac[:, 1, 0] * jac[:, 1, 1]
+        c = jac[:, 0, 1] ** 2 + jac[:, 1, 1] ** 2
+        gx = jac[:, 0, 0] * fx[active] + jac[:, 1, 0] * fy[active]
+        gy = jac[:, 0, 1] * fx[active] + jac[:, 1, 1] * fy[active]
+        if mu is None:
+            mu = 1e-3 * np.maximum(a, c) + 1e-12
+
+        det = (a + mu) * (c + mu) - b ** 2
+        dx = -((c + mu) * gx - b * gy) / det
+        dy = -((a + mu) * gy - b * gx) / det
+        tx = x[active] + dx
+        ty = y[active] + dy
+        tfx, tfy = evaluate(tx, ty)
+        tr = np.hypot(tfx, tfy)
+
+        better = np.isfinite(tr) & (tr < residual[active])
+        seed = active[better]
+        x[seed], y[seed], fx[seed], fy[seed], residual[seed] = \
+            tx[better], ty[better], tfx[better], tfy[better], tr[better]
+        mu = np.where(better, mu / 3, mu * 4)
+
+        # tiny steps end the search. steps shrink in flat valleys of the
+        # residual as well (large mu or nearly singular J^T J), converged
+        # seeds need a short newton step (distance to the root) too, see
+        # find_roots for the limits of the residual
+        tiny = (np.abs(dx) <= xtol * (1 + np.abs(x[active]))) & \
+            (np.abs(dy) <= xtol * (1 + np.abs(y[active]))) & np.isfinite(det)
+        jdet = jac[:, 0, 0] * jac[:, 1, 1] - jac[:, 0, 1] * jac[:, 1, 0]
+        nx = (jac[:, 1, 1] * fx[active] - jac[:, 0, 1] * fy[active]) / jdet
+        ny = (jac[:, 0, 0] * fy[active] - jac[:, 1, 0] * fx[active]) / jdet
+        short = (np.abs(nx) <= xtol * (1 + np.abs(x[active]))) & \
+            (np.abs(ny) <= xtol * (1 + np.abs(y[active])))
+        rounding = rounding_limit(jac, x[active], y[active], ftol)
+        converged[active] = (tiny & short &
+                             (residual[active] <= np.maximum(small[active], rounding))) | \
+            (residual[active] == 0)
+        # minima of the residual which are no roots
+        stuck = ~np.isfinite(mu) | (mu > 1e16) | (tiny & ~better)
+        outside = np.hypot(x[active], y[active]) >= equation.max_norm
+
+        keep = ~converged[active] & ~stuck & ~outside
+        active = active[keep]
+        mu = mu[keep]
+
+
+def newton(equation, z_init, iterlimit=50):
+    """ this function searches an equilibrium with newton's method starting
+        at z_init (see find_roots). it returns the point, the jacobian in
+        this point and whether the iteration converged
+    """
+    root = find_roots(equation, [z_init], iterlimit)[0]
+    z_next = np.array([root["x"], root["y"]])
+
+    # jacobian in the final point
+    return z_next, equation.jacobian(z_next), bool(root["converged"])
+
+
+def find_equilibria(equation, xlim, ylim, points_in_x=None, points_in_y=None, iterlimit=50,
+                    tolerance=None, fallback="lm"):
+    """ this function searches all equilibria in the window xlim x ylim:
+        find_roots runs for a grid of points_in_x x points_in_y seeds at
+        once, the converged points in the window are merged if they are
+        closer than tolerance (see core.PointIndex) or if they are the same
+        root (see merge_roots, within half the distance of the seeds). it
+        returns the equilibria (shape (n, 2)) and their jacobians (shape (n,
+        2, 2))
+    """
+    if tolerance is None:
+        tolerance = myConfig.read("Equilibria", "eq_tolerance")
+    if points_in_x is None:
+        points_in_x = myConfig.read("Equilibria", "eq_gridPointsInX")
+    if points_in_y is None:
+        points_in_y = myConfig.read("Equilibria", "eq_gridPointsInY")
+
+    (xmin, xmax), (ymin, ymax) = xlim, ylim
+    X, Y = np.meshgrid(np.linspace(xmin, xmax, int(points_in_x)),
+                       np.linspace(ymin, ymax, int(points_in_y)))
+    seeds = np.column_stack((X.ravel(), Y.ravel()))
+    roots = find_roots(equation, seeds, iterlimit, fallback=fallback)
+    x, y = roots["x"], roots["y"]
+
+    inside = (xmin <= x) & (x <= xmax) & (ymin <= y) & (y <= ymax)
+    found = roots["converged"] & inside
+    points = np.column_stack((x, y))[found]
+
+    # merge equal roots, residual limits of find_roots at the seeds
+    index = PointIndex(tolerance)
+    new = [index.insert(point)[1] for point in points.tolist()]
+    with np.errstate(all="ignore"):
+        f = np.abs(np.asarray(equation.compiled_rhs(seeds[found].T, dtype=equation.precision),
+                              dtype=float))
+    limits = 1e-10 * np.maximum(1., f.max(axis=0))
+    points, limits = points[new].reshape(-1, 2), limits[new]
+    spacing = min((xmax - xmin) / max(int(points_in_x) - 1, 1),
+                  (ymax - ymin) / max(int(points_in_y) - 1, 1))
+    points = points[merge_roots(equation, points, spacing / 2, limits)]
+
+    return points, equation.jacobian_array(points[:, 0], points[:, 1])
+
+
+# names of the types of equilibria, the index is the type code (see
+# classify_equilibria). sink and source have two equal eigenvalues
+equilibrium_names = np.array(["Unclassified", "Saddle", "Nodal Sink", "Nodal Source", "Center",
+                              "Spiral Sink", "Spiral Source", "Sink", "Source"])
+
+# one entry per equilibrium of classify_equilibria, the eigenvectors are
+# the columns
+classification_dtype = np.dtype([("type", np.int8), ("eigenvalues", complex, (2,)),
+                                 ("eigenvectors", complex, (2, 2))])
+
+
+def classify_equilibria(jacobians, tolerance=None):
+    """ this function classifies equilibria by the determinant and trace of
+        their jacobians (shape (n, 2, 2)) and returns a structured array
+        (classification_dtype) with the type codes (see equilibrium_names),
+        eigenvalues and eigenvectors.
+
+        the boundaries between the types are widened by tolerance relative
+        to the largest entry of the jacobian (squared for the determinant):
+        a determinant within it is 0 (not isolated, unclassified), a trace
+        within it is 0 (center) and a determinant within it of trace**2 / 4
+        means two equal eigenvalues (sink or source)
+    """
+    if tolerance is None:
+        tolerance = float(myConfig.read("Equilibria", "eq_typeTolerance"))
+
+    jacobians = np.asarray(jacobians, dtype=float).reshape(-1, 2, 2)
+    classification = np.zeros(len(jacobians), dtype=classification_dtype)
+    if len(jacobians) == 0:
+        return classification
+
+    determinant = jacobians[:, 0, 0] * jacobians[:, 1, 1] - jacobians[:, 1, 0] * jacobians[:, 0, 1]
+    trace = jacobians[:, 0, 0] + jacobians[:, 1, 1]
+    # distance of the determinant to equal eigenvalues: < 0 real, > 0 complex
+    delta = determinant - trace ** 2 / 4
+
+    scale = np.abs(jacobians).reshape(-1, 4).max(axis=1)
+    zero = np.abs(determinant) <= tolerance * scale ** 2
+    equal = np.abs(delta) <= tolerance * scale ** 2
+    node = delta < 0
+    conditions = [zero, determinant < 0,
+                  equal & (trace < 0), equal & (trace > 0),
+                  node & (trace < 0), node & (trace > 0),
+                  np.abs(trace) <= tolerance * scale, trace < 0, trace > 0]
+    classification["type"] = np.select(conditions, [0, 1, 7, 8, 2, 3, 4, 5, 6], 0)
+
+    finite = np.isfinite(jacobians).reshape(-1, 4).all(axis=1)
+    classification["eigenvalues"][~finite] = np.nan
+    classification["eigenvectors"][~finite] = np.nan
+    classification["eigenvalues"][finite], classification["eigenvectors"][finite] = \
+        np.linalg.eig(jacobians[finite])
+
+    return classification
+
+
+def equilibrium_types(jacobians, tolerance=None):
+    """ this function returns the names of the types of equilibria (see
+        classify_equilibria)
+    """
+    return equilibrium_names[classify_equilibria(jacobians, tolerance)["type"]]
+
+
+def vectorfield(equation, xlim, ylim, points_in_x=None, points_in_y=None):
+    """ this function returns the grid (X, Y) and the normalized directions
+        (U, V) of the vector field in the window xlim x ylim
+    """
+    if points_in_x is None:
+        points_in_x = myConfig.read("Vectorfield", "vf_gridPointsInX")
+    if points_in_y is None:
+        points_in_y = myConfig.read("Vectorfield", "vf_gridPointsInY")
+    N = int(points_in_x)
+    M = int(points_in_y)
+
+    xmin, xmax = xlim
+    ymin, ymax = ylim
+    a = np.linspace(xmin - xmin / N, xmax - xmax / N, N)
+    b = np.linspace(ymin - ymin / M, ymax - ymax / M, M)
+    X, Y = np.meshgrid(a, b)
+
+    DX, DY = equation.rhs_grid(X, Y)
+    norm = np.hypot(DX, DY)
+    norm[norm == 0] = 1.
+
+    return X, Y, DX / norm, DY / norm
+
+
+def nullcline_grid(equation, xlim, ylim, points_in_x=None, points_in_y=None):
+    """ this function returns the grid (X, Y) and both components of the
+        system on it (DX, DY). the nullclines are the zero contours of DX
+        and DY
+    """
+    if points_in_x is None:
+        points_in_x = myConfig.read("Nullclines", "nc_gridPointsInX")
+    if points_in_y is None:
+        points_in_y = myConfig.read("Nullclines", "nc_gridPointsInY")
+
+    xmin, xmax = xlim
+    ymin, ymax = ylim
+    a = np.arange(xmin, xmax, (xmax - xmin) / int(points_in_x))
+    b = np.arange(ymin, ymax, (ymax - ymin) / int(points_in_y))
+    X, Y = np.meshgrid(a, b)
+
+    DX, DY = equation.rhs_grid(X, Y)
+
+    return X, Y, DX, DY
+
+
+def nullclines(equation, xlim, ylim, points_in_x=None, points_in_y=None):
+    """ this function returns the x- and y-nullclines in the window xlim x
+        ylim, each as list of (n, 2) arrays (one array per curve)
+    """
+    X, Y, DX, DY = nullcline_grid(equation, xlim, ylim, points_in_x, points_in_y)
+
+    # contours are computed by matplotlib, the figure is never shown
+    axes = Figure().add_subplot(111)
+    x_nullclines = axes.contour(X, Y, DX, levels=[0]).allsegs[0]
+    y_nullclines = axes.contour(X, Y, DY, levels=[0]).allsegs[0]
+
+    return list(x_nullclines), list(y_nullclines)
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2016
+#    by Klemens Fritzsche, pyplane@leckstrom.de
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Module for evaluating a compiled system for many values of one parameter
+at once (no widgets needed)
+
+Example: trajectories of a damped oscillator for 1000 damping values
+
+    equation = Equation(("y", "-x-c*y"), parameters={"c": 0.})
+    sweep = ParameterSweep(equation, "c", np.linspace(0, 2, 1000))
+    solutions = sweep.trajectories([1., 0.], np.arange(0, 10, 0.01))
+"""
+
+from __future__ import division
+
+__author__ = 'Klemens Fritzsche'
+
+import numpy as np
+from scipy import integrate
+
+
+class ParameterSweep(object):
+    """ this class evaluates the system of an Equation for an array of values
+        of the parameter name. every other parameter keeps its value. the
+        results are stacked along the first axis (one entry per value)
+    """
+    def __init__(self, equation, name, values):
+        if name not in equation.parameters:
+            raise ValueError("system has no parameter " + str(name))
+
+        self.equation = equation
+        self.name = name
+        self.values = np.asarray(values, dtype=float).ravel()
+
+    def params(self, ndim):
+        """ this function returns the parameter arguments of the kernels, the
+            swept parameter is shaped to broadcast against ndim-dimensional
+            states
+        """
+        shape = (-1,) + (1,) * ndim
+        return [self.values.reshape(shape) if name == self.name else value
+                for name, value in self.equation.parameters.items()]
+
+    def clamp(self, x, y):
+        """ same as in CompiledRhs: points with norm(z) > max_norm are
+            scaled back onto the circle with radius max_norm
+        """
+        max_norm = self.equation.max_norm
+        scale = max_norm / np.maximum(np.hypot(x, y), max_norm)
+        return x * scale, y * scale
+
+    def rhs_grid(self, X, Y):
+        """ this function evaluates the system on a grid (np.meshgrid) for
+            every value, e.g. to recompute vector fields or nullclines. the
+            result has the shape (len(values), 2) + X.shape
+        """
+        dtype = self.equation.grid_precision
+        X = np.asarray(X, dtype=dtype)
+        Y = np.asarray(Y, dtype=dtype)
+
+        x, y = self.clamp(X, Y)
+        x_dot, y_dot = self.equation.kernels.rhs(x, y, *self.params(X.ndim))
+
+        out = np.empty((len(self.values), 2) + X.shape, dtype=dtype)
+        out[:, 0] = x_dot
+        out[:, 1] = y_dot
+
+        return out
+
+    def banded_jacobian(self, z, direction=1., band=None):
+        """ this function returns the jacobian of the interleaved system of
+            trajectories (see trajectories) in the banded form of odeint:
+            band[i - j + 1, j] = d rhs_i / d z_j, only the 2x2 blocks on the
+            diagonal are not zero
+        """
+        if band is None:
+            band = np.zeros((3, len(z)))
+
+        j11, j12, j21, j22 = self.equation.kernels.jacobian(z[0::2], z[1::2], *self.params(0))
+        band[1, 0::2] = j11
+        band[0, 1::2] = j12
+        band[2, 0::2] = j21
+        band[1, 1::2] = j22
+        np.multiply(band, direction, out=band)
+        return band
+
+    def trajectories(self, initial_condition, time, backward=False):
+        """ this function integrates the system for every value with odeint.
+            all trajectories are solved together as one system with
+            interleaved states [x0, y0, x1, y1, ...], its jacobian is banded.
+            initial_condition is either one point or one point per value.
+            the result has the shape (len(values), len(time), 2)
+        """
+        n_values = len(self.values)
+        z_init = np.broadcast_to(np.asarray(initial_condition, dtype=float), (n_values, 2))
+        z_init = z_init.ravel().copy()
+
+        kernels = self.equation.kernels
+        params = self.params(0)
+        direction = -1. if backward else 1.
+
+        buf = np.empty((n_values, 2))
+
+        def rhs(z, t=0.):
+            x, y = self.clamp(z[0::2], z[1::2])
+            buf[:, 0], buf[:, 1] = kernels.rhs(x, y, *params)
+            np.multiply(buf, direction, out=buf)
+            return buf.ravel()
+
+        band = np.zeros((3, 2 * n_values))
+
+        def jacobian(z, t=0.):
+            return self.banded_jacobian(z, direction, band)
+
+        solution = integrate.odeint(rhs, z_init, time, Dfun=jacobian, ml=1, mu=1)
+
+        return solution.reshape(len(time), n_values, 2).transpose(1, 0, 2)
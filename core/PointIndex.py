@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2016
+#    by Klemens Fritzsche, pyplane@leckstrom.de
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Spatial index for points in the phase plane (e.g. equilibria)
+
+Due to numerical errors the same point is found at slightly different
+coordinates, two points closer than the tolerance are treated as one.
+The points are sorted into square cells of the size of the tolerance (a
+dict of cells), so every point within the tolerance is in the 3 x 3
+cells around the query and lookups do not depend on the number of points.
+Every point keeps its id until it is removed.
+
+Example:
+
+    index = PointIndex(1e-4)
+    i, new = index.insert([1., 0.])
+    index.nearest([1. + 1e-6, 0.])      # i
+"""
+
+from __future__ import division
+
+__author__ = 'Klemens Fritzsche'
+
+import math
+
+
+class PointIndex(object):
+    """ this class stores points with ids, points within tolerance of each
+        other are the same point
+    """
+    def __init__(self, tolerance=1e-4):
+        self.tolerance = float(tolerance)
+        # id -> (x, y)
+        self.points = {}
+        # cell -> ids
+        self.cells = {}
+        # next id
+        self.count = 0
+
+    def __len__(self):
+        return len(self.points)
+
+    def __contains__(self, point_id):
+        return point_id in self.points
+
+    def ids(self):
+        return sorted(self.points)
+
+    def point(self, point_id):
+        return self.points[point_id]
+
+    def cell(self, point):
+        return (int(math.floor(point[0] / self.tolerance)),
+                int(math.floor(point[1] / self.tolerance)))
+
+    def nearest(self, point):
+        """ this function returns the id of the closest point within the
+            tolerance or None
+        """
+        x, y = float(point[0]), float(point[1])
+        cx, cy = self.cell((x, y))
+
+        nearest = None
+        distance = self.tolerance
+        for i in (cx - 1, cx, cx + 1):
+            for j in (cy - 1, cy, cy + 1):
+                for point_id in self.cells.get((i, j), ()):
+                    px, py = self.points[point_id]
+                    d = math.hypot(px - x, py - y)
+                    if d < distance:
+                        nearest = point_id
+                        distance = d
+
+        return nearest
+
+    def insert(self, point):
+        """ this function adds a point unless there is one within the
+            tolerance already. it returns the id of the point and whether it
+            is new
+        """
+        point_id = self.nearest(point)
+        if point_id is not None:
+            return point_id, False
+
+        point_id = self.count
+        self.count += 1
+        self.points[point_id] = (float(point[0]), float(point[1]))
+        self.cells.setdefault(self.cell(point), []).append(point_id)
+
+        return point_id, True
+
+    def remove(self, point_id):
+        point = self.points.pop(point_id)
+        cell = self.cell(point)
+        self.cells[cell].remove(point_id)
+        if not self.cells[cell]:
+            del self.cells[cell]
+
+    def clear(self):
+        """ this function removes every point, the ids are not used again
+        """
+        self.points = {}
+        self.cells = {}
@@ -56,7 +56,7 @@ class StreamlineHandler(object):
             X1, Y1 = np.meshgrid(a, b)
 
             try:
-                DX1, DY1 = self.myWidget.mySystem.equation.rhs([X1, Y1])
+                DX1, DY1 = self.myWidget.mySystem.equation.rhs_grid(X1, Y1)
                 streamplot = self.myWidget.Plot.canvas.axes.streamplot(X1, Y1, DX1, DY1,
                                                           density=stream_density,
                                                           linewidth=stream_linewidth,
@@ -22,12 +22,11 @@ __author__ = 'Klemens Fritzsche'
 
 from PyQt4 import QtGui
 
-import sympy as sp
 import pylab as pl
 import numpy as np
 
 from core.Logging import myLogger
-from core.Equation import Equation
+from core.Equation import Equation, format_parameters
 from core.ConfigHandler import myConfig
 from gui.Widgets import SystemTabWidget, PhaseplaneWidget, ZoomWidgetSimple, ThreeDWidget
 from core.TrajectoryHandler import TrajectoryHandler
@@ -44,10 +43,10 @@ class Container(object):
 class System(object):
     """ Class that bundles everything after submitting a new system
     """
-    def __init__(self, parent, equation=None, name=None, linear=False):
+    def __init__(self, parent, equation=None, name=None, linear=False, parameters=None):
         #~ assert isinstance(parent, PyplaneMainWindow)
         self.myPyplane = parent
-        self.equation = Equation(equation)
+        self.equation = Equation(equation, parameters=parameters)
 
         self.linear = linear
         self._tab_index = self.myPyplane.tabWidget.currentIndex() # what was this for again?
@@ -101,16 +100,8 @@ class System(object):
 
     def plot_eigenvectors(self, equilibrium):
         if self.linear:
-            # system is linear -> calculate jacobian
-            x, y = sp.symbols("x, y")
-            xdot = self.equation.x_dot_expr
-            ydot = self.equation.y_dot_expr
-
-            A11 = xdot.diff(x)
-            A12 = xdot.diff(y)
-            A21 = ydot.diff(x)
-            A22 = ydot.diff(y)
-            jac = np.array([[A11,A12],[A21,A22]], dtype=float)
+            # system is linear -> jacobian is constant
+            jac = self.equation.jacobian(equilibrium)
 
             eigenvalues, eigenvectors = np.linalg.eig(jac)
             eigvec0 = eigenvectors[:,0]
@@ -156,6 +147,19 @@ class System(object):
 
             #~ return eigvec0, eigvec1
 
+    def set_parameters(self, parameters):
+        """ this function changes the parameter values of the system. only
+            the numerical parts (vector field, streamlines, nullclines,
+            trajectories and equilibria) are computed again
+        """
+        self.equation.set_parameters(parameters)
+
+        self.Phaseplane.Plot.refresh()
+        self.Trajectories.recompute()
+        self.Phaseplane.Equilibria.recompute()
+
+        myLogger.message("parameters changed: " + format_parameters(self.equation.parameters))
+
     def update(self):
         self.Phaseplane.Plot.update()
         self.Xt.Plot.update()
@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2016
+#    by Klemens Fritzsche, pyplane@leckstrom.de
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Module implementing a cache for integrated trajectories
+
+Solutions are stored under the hash of everything they depend on: the
+compiled system (see core.KernelCache.kernel_key), its parameters,
+precision and max_norm, the initial condition, the direction and the
+settings of the solver (including the early termination). The least
+recently used solutions are kept in memory, solutions dropped from memory
+are written to a directory (pickled, see core.Numerics.Solution) with its
+own size limit. Integrating the same trajectory again, e.g. after closing
+and reopening a system, only loads the solution.
+
+The cache is used from the thread of core.TrajectoryWorker, it does not
+log: its methods take a function message for debug messages instead
+(e.g. myLogger.debug_message in the gui thread or a queued signal).
+"""
+
+__author__ = 'Klemens Fritzsche'
+
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
+try:
+    import cPickle as pickle
+except ImportError:
+    # python 3
+    import pickle
+
+from core.ConfigHandler import myConfig
+from core.KernelCache import KernelCache, kernel_key
+from core.Equation import format_parameters
+from core.Numerics import solve_trajectory, trajectory_options, trajectory_settings
+
+
+def solution_key(equation, initial_condition, backward, options):
+    """ this function returns the hash of a trajectory. options are the
+        complete options of solve_trajectory (see
+        core.Numerics.trajectory_options)
+    """
+    solver = str(options["solver"])
+    settings = [kernel_key(equation.x_dot_string, equation.y_dot_string, equation.backend,
+                           list(equation.parameters)),
+                equation.precision_name, repr(float(equation.max_norm)),
+                format_parameters(equation.parameters),
+                repr([float(value) for value in initial_condition]), repr(bool(backward)),
+                solver, repr(float(options["time"]))]
+
+    if solver == "odeint":
+        # fixed grid, no early termination
+        settings.append(repr(float(options["step"])))
+    else:
+        settings += [repr(float(options["rtol"])), repr(float(options["atol"]))]
+        stop = options.get("stop")
+        if stop is not None:
+            window = stop.window
+            if window is not None:
+                window = [float(limit) for limits in window for limit in limits]
+            settings.append(repr((float(stop.max_norm), window, stop.speed, stop.periodic)))
+
+    return hashlib.sha1("\n".join(settings).encode("utf-8")).hexdigest()
+
+
+class SolutionSpill(KernelCache):
+    """ directory of the solutions dropped from memory
+    """
+    extension = ".pickle"
+
+    def load(self, key):
+        if not self.enabled():
+            return None
+
+        try:
+            with open(self.path(key), 'rb') as cachefile:
+                return pickle.load(cachefile)
+        except (IOError, OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def store(self, key, solution, message=None):
+        if not self.enabled():
+            return
+
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+
+            with open(self.path(key), 'wb') as cachefile:
+                pickle.dump(solution, cachefile, pickle.HIGHEST_PROTOCOL)
+
+            self.evict()
+        except (IOError, OSError) as error:
+            if message is not None:
+                message("could not write trajectory cache: " + str(error))
+
+
+class TrajectoryCache(object):
+    """ this class keeps the max_entries least recently used solutions in
+        memory (0 disables the cache), older ones are spilled to directory
+        (up to max_size kB, 0: no spill). it can be used from several threads
+    """
+    def __init__(self, max_entries=None, directory=None, max_size=None):
+        if max_entries is None:
+            max_entries = myConfig.read("Trajectories", "traj_cacheSize")
+        if directory is None:
+            directory = myConfig.read("Trajectories", "traj_cacheDirectory")
+        if max_size is None:
+            max_size = myConfig.read("Trajectories", "traj_cacheDiskSize")
+
+        self.max_entries = int(max_entries)
+        self.spill = SolutionSpill(directory, max_size)
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, message=None):
+        """ this function returns the cached solution or None. message is
+            called with debug messages (see above)
+        """
+        if self.max_entries <= 0:
+            return None
+
+        with self.lock:
+            solution = self.memory.pop(key, None)
+            if solution is None:
+                solution = self.spill.load(key)
+                if solution is None:
+                    return None
+                if message is not None:
+                    message("trajectory loaded from cache: " + key)
+
+            # most recently used
+            self.memory[key] = solution
+            self.shrink(message)
+            return solution
+
+    def put(self, key, solution, message=None):
+        """ this function stores a solution (cancelled ones are ignored)
+        """
+        if self.max_entries <= 0 or solution.reason == "cancelled":
+            return
+
+        with self.lock:
+            self.memory.pop(key, None)
+            self.memory[key] = solution
+            self.shrink(message)
+
+    def shrink(self, message=None):
+        while len(self.memory) > self.max_entries:
+            key, solution = self.memory.popitem(last=False)
+            self.spill.store(key, solution, message)
+
+    def clear(self):
+        with self.lock:
+            self.memory.clear()
+            self.spill.clear()
+
+    def solve(self, equation, initial_condition, backward=False, callback=None, message=None,
+              **options):
+        """ this function returns the cached solution of solve_trajectory
+            (same arguments) or integrates and caches it. message is called
+            with debug messages (see above)
+        """
+        # options of TrajectoryWorker are complete: no config reads in its
+        # thread
+        if any(name not in options for name in trajectory_settings):
+            options = trajectory_options(options)
+        key = solution_key(equation, initial_condition, backward, options)
+
+        solution = self.get(key, message)
+        if solution is None:
+            solution = solve_trajectory(equation, initial_condition, backward=backward,
+                                        callback=callback, **options)
+            self.put(key, solution, message)
+
+        return solution
+
+
+# prepare trajectory cache for importing
+myTrajectoryCache = TrajectoryCache()
@@ -18,12 +18,20 @@
 
 __author__ = 'Klemens Fritzsche'
 
+from itertools import chain
+
 import numpy as np
-import pylab as pl
-from scipy import integrate
+
+from PyQt4 import QtCore
 
 from core.Logging import myLogger
 from core.ConfigHandler import myConfig
+from core.Numerics import solve_trajectories, split_segments, termination, termination_messages, \
+    trajectory_options
+from core.Ensemble import solve_ensemble
+from core.TrajectoryStore import TrajectoryStore, trajectory_key
+from core.TrajectoryCache import myTrajectoryCache, solution_key
+from core.TrajectoryWorker import TrajectoryWorker
 
 
 class TrajectoryHandler(object):
@@ -33,21 +41,29 @@ class TrajectoryHandler(object):
         # the second value contains the matplotlib-data (y(x),x(t) and y(t)) as a stack list)
 
         self.traj_dict = {}
+        # the solutions of the trajectories (same keys as traj_dict), the
+        # artists are drawn from them (see draw_trajectory)
+        self.store = TrajectoryStore()
+        # record id of the store -> line in the phase plane (adaptive
+        # solvers are sampled again with the dense output after zooming,
+        # see refine)
+        self.traj_lines = {}
+
+        # trajectories integrated in the background (see queue_trajectory):
+        # settings, placeholder artists and the lines drawn while
+        # integrating (by direction), same keys as traj_dict
+        self.pending = {}
+        self.worker = None
 
     def clear_stack(self):
         self.traj_dict = {}
+        self.traj_lines = {}
+        self.store.clear()
 
     def plot_trajectory(self, initial_condition, forward=None, backward=None):
         """
             This function plots the solution of the differential equation
-            depending on the initial condition.
-
-            In general, the trajectory consists of three elements:
-            the forward trajectory, the backward trajectory and the marker for
-            the initial condition, while each element can be turned off in the
-            config file / settings tab.
-            The elements are stored in a list. A dictionary stores this data
-            with the initalCondition as its key, and the list as the value.
+            depending on the initial condition (see add_trajectory).
 
             Input variables:    - initialCondition (list with x and y
                                     coordinate)
@@ -58,43 +74,254 @@ class TrajectoryHandler(object):
             myLogger.warn_message("Please select forward and/or backward integration!")
             return False
 
-        else:
-            traj_stack = []
-
-            traj_integrationtime = float(myConfig.read("Trajectories", "traj_integrationtime"))
-            traj_integrationstep = float(myConfig.read("Trajectories", "traj_integrationstep"))
-            time = pl.arange(0, traj_integrationtime, traj_integrationstep)
-
-            if forward:
-                # while integrate.ode.successful():
-                # self.mySystem.jacobian(initialCondition)
-
-                assert isinstance(initial_condition, list)
-                self.x = integrate.odeint(self.mySystem.equation.rhs, initial_condition, time)
-                                          #, full_output=1, printmessg=1,       mxstep=20000)
-
-                xvalue = self.x[:, 0]  # extract the x vector
-                yvalue = self.x[:, 1]  # extract the dx/dt vector
-
-                # masking xvalue (deleting invalid entries)
-                #                 xvalue = np.ma.masked_outside(xvalue,-1*self.mySystem.max_norm,
-                #                                               self.mySystem.max_norm)
-                #                 myMask = xvalue.mask
-                #                 new_time = np.ma.array(self.t, mask=myMask).compressed()
-                #                 yvalue = np.ma.array(yvalue, mask=myMask).compressed()
-                #                 xvalue = xvalue.compressed()
-                #                 QtCore.pyqtRemoveInputHook()
-                #                 embed()
-                # masking yvalue
-                #                 yvalue = np.ma.masked_outside(yvalue,-1*self.mySystem.max_norm,
-                #                                               self.mySystem.max_norm)
-                #                 myMask = yvalue.mask
-                #                 new_time = np.ma.array(self.t, mask=myMask).compressed()
-                #                 xvalue = np.ma.array(xvalue, mask=myMask)
-                #                 yvalue = yvalue.compressed()
-
-                #                 QtCore.pyqtRemoveInputHook()
-                #                 embed()
+        assert isinstance(initial_condition, list)
+
+        if myConfig.get_boolean("Trajectories", "traj_background"):
+            return self.queue_trajectory(initial_condition, forward, backward)
+
+        xmin, xmax, ymin, ymax = self.mySystem.Phaseplane.Plot.canvas.axes.axis()
+        stop = termination(self.mySystem.equation, ((xmin, xmax), (ymin, ymax)))
+
+        solutions = []
+        if forward:
+            solutions.append(myTrajectoryCache.solve(self.mySystem.equation, initial_condition,
+                                                     message=myLogger.debug_message, stop=stop))
+        if backward:
+            solutions.append(myTrajectoryCache.solve(self.mySystem.equation, initial_condition,
+                                                     backward=True, message=myLogger.debug_message,
+                                                     stop=stop))
+
+        self.add_trajectory(initial_condition, solutions)
+
+    def queue_trajectory(self, initial_condition, forward, backward):
+        """ this function hands the integration of a trajectory to the
+            worker thread and marks the initial condition with a placeholder
+            (showing the progress) until the trajectory is done
+        """
+        key = trajectory_key(initial_condition)
+        if key in self.pending:
+            return False
+
+        xmin, xmax, ymin, ymax = self.mySystem.Phaseplane.Plot.canvas.axes.axis()
+        options = trajectory_options({"stop": termination(self.mySystem.equation,
+                                                          ((xmin, xmax), (ymin, ymax)))})
+        directions = [direction for direction, selected in ((False, forward), (True, backward))
+                      if selected]
+
+        axes = self.mySystem.Phaseplane.Plot.canvas.axes
+        marker = axes.plot(initial_condition[0], initial_condition[1], 'x', color="0.5")
+        label = axes.text(initial_condition[0], initial_condition[1], " 0%", fontsize=8,
+                          color="0.5")
+        self.pending[key] = ((initial_condition, forward, backward), [marker[0], label], {})
+        self.mySystem.Phaseplane.Plot.canvas.draw_idle()
+
+        if self.worker is None:
+            self.worker = TrajectoryWorker()
+            self.worker.trajectory_done.connect(self.trajectory_done)
+            self.worker.progress.connect(self.trajectory_progress)
+            self.worker.chunk.connect(self.trajectory_chunk)
+            # messages of the worker thread are logged in the gui thread
+            self.worker.message.connect(myLogger.debug_message, QtCore.Qt.QueuedConnection)
+        # chunks (and redraws) per second
+        self.worker.interval = 1. / float(myConfig.read("Trajectories", "traj_frameRate"))
+        self.worker.add(key, self.mySystem.equation, initial_condition, directions, options)
+
+        return True
+
+    def trajectory_done(self, key, solutions):
+        """ slot for trajectories of the worker thread
+        """
+        if key not in self.pending:
+            # cancelled
+            return
+
+        (initial_condition, forward, backward), placeholder, partial = self.pending.pop(key)
+        for artist in placeholder:
+            artist.remove()
+
+        self.add_trajectory(initial_condition, solutions)
+
+    def trajectory_chunk(self, key, backward, t, z):
+        """ slot for the points of a running trajectory: they are appended
+            to lines in the phase plane, x(t), y(t) and 3d plot, which are
+            replaced by the trajectory when it is done
+        """
+        if key not in self.pending:
+            return
+        settings, placeholder, partial = self.pending[key]
+
+        if backward not in partial:
+            if backward:
+                color = myConfig.read("Trajectories", "traj_ppBackwardColor")
+            else:
+                color = myConfig.read("Trajectories", "traj_ppForwardColor")
+            traj_x_tColor = myConfig.read("Trajectories", "traj_x_tColor")
+            traj_y_tColor = myConfig.read("Trajectories", "traj_y_tColor")
+
+            lines = [self.mySystem.Phaseplane.Plot.canvas.axes.plot([], [], color=color)[0],
+                     self.mySystem.Xt.Plot.canvas.axes.plot([], [], color=traj_x_tColor)[0],
+                     self.mySystem.Yt.Plot.canvas.axes.plot([], [], color=traj_y_tColor)[0],
+                     self.mySystem.Txy.Plot.canvas.axes.plot([], [], [], color=color)[0]]
+            placeholder.extend(lines)
+            partial[backward] = [lines, t[:0], z[:0]]
+
+        lines, t_all, z_all = partial[backward]
+        t_all = np.concatenate((t_all, t))
+        z_all = np.concatenate((z_all, z))
+        partial[backward][1:] = t_all, z_all
+
+        time = -t_all if backward else t_all
+        lines[0].set_data(z_all[:, 0], z_all[:, 1])
+        lines[1].set_data(time, z_all[:, 0])
+        lines[2].set_data(time, z_all[:, 1])
+        lines[3].set_data(z_all[:, 0], z_all[:, 1])
+        lines[3].set_3d_properties(time)
+
+        # the worker sends chunks at most with [Trajectories] traj_frameRate
+        for widget in (self.mySystem.Phaseplane, self.mySystem.Xt, self.mySystem.Yt,
+                       self.mySystem.Txy):
+            widget.Plot.canvas.draw_idle()
+
+    def trajectory_progress(self, key, fraction):
+        """ slot for the progress of the worker thread
+        """
+        if key in self.pending:
+            self.pending[key][1][1].set_text(" %d%%" % (100 * fraction))
+            self.mySystem.Phaseplane.Plot.canvas.draw_idle()
+
+    def cancel(self):
+        """ this function cancels the trajectories of the worker thread and
+            returns their settings
+        """
+        if self.worker is not None:
+            self.worker.cancel()
+
+        settings = []
+        for key in list(self.pending):
+            setting, placeholder, partial = self.pending.pop(key)
+            for artist in placeholder:
+                artist.remove()
+            settings.append(setting)
+
+        return settings
+
+    def stop_worker(self):
+        """ this function ends the worker thread (e.g. when the tab is closed)
+        """
+        self.cancel()
+        if self.worker is not None:
+            self.worker.stop()
+            self.worker = None
+
+    def plot_trajectories(self, initial_conditions, forward=None, backward=None):
+        """ this function integrates and plots the trajectories of an array
+            of initial conditions (shape (n, 2)) in a pool of processes or
+            threads (see core.Numerics.solve_trajectories). every trajectory
+            is drawn as soon as all its directions are finished.
+            with [Trajectories] traj_pool = ensemble all trajectories of a
+            direction are integrated at once (see core.Ensemble)
+        """
+        if not forward and not backward:
+            myLogger.warn_message("Please select forward and/or backward integration!")
+            return False
+
+        initial_conditions = np.asarray(initial_conditions, dtype=float).reshape(-1, 2)
+        directions = [direction for direction, selected in ((False, forward), (True, backward))
+                      if selected]
+        n = len(directions)
+
+        xmin, xmax, ymin, ymax = self.mySystem.Phaseplane.Plot.canvas.axes.axis()
+        stop = termination(self.mySystem.equation, ((xmin, xmax), (ymin, ymax)))
+
+        if str(myConfig.read("Trajectories", "traj_pool")) == "ensemble":
+            solver = str(myConfig.read("Trajectories", "traj_ensembleSolver"))
+            ensembles = [solve_ensemble(self.mySystem.equation, initial_conditions, backward=direction,
+                                        solver=solver, stop=stop).solutions()
+                         for direction in directions]
+            for index, solutions in enumerate(zip(*ensembles)):
+                self.add_trajectory(initial_conditions[index].tolist(), list(solutions), update=False)
+
+            self.mySystem.update()
+            myLogger.message("%d trajectories done" % len(initial_conditions))
+            return True
+
+        # job i is initial condition i // n in direction i % n
+        jobs = np.repeat(initial_conditions, n, axis=0)
+        job_directions = np.tile(directions, len(initial_conditions))
+
+        # cached jobs are not integrated again
+        options = trajectory_options({"stop": stop})
+        keys = [solution_key(self.mySystem.equation, job, direction, options)
+                for job, direction in zip(jobs, job_directions)]
+        cached = [(i, myTrajectoryCache.get(key, myLogger.debug_message))
+                  for i, key in enumerate(keys)]
+        missing = [i for i, solution in cached if solution is None]
+
+        def solve_missing():
+            if not missing:
+                return
+            for j, solution in solve_trajectories(self.mySystem.equation, jobs[missing],
+                                                  job_directions[missing], **options):
+                myTrajectoryCache.put(keys[missing[j]], solution, myLogger.debug_message)
+                yield missing[j], solution
+
+        finished = {}
+        for i, solution in chain((item for item in cached if item[1] is not None),
+                                 solve_missing()):
+            index = i // n
+            finished.setdefault(index, []).append(solution)
+            if len(finished[index]) == n:
+                solutions = sorted(finished.pop(index), key=lambda solution: solution.backward)
+                self.add_trajectory(initial_conditions[index].tolist(), solutions, update=False)
+
+        self.mySystem.update()
+        myLogger.message("%d trajectories done" % len(initial_conditions))
+        return True
+
+    def add_trajectory(self, initial_condition, solutions, update=True):
+        """ this function stores the solutions (forward and/or backward) of
+            a trajectory and plots them (see draw_trajectory)
+        """
+        key = trajectory_key(initial_condition)
+        for solution in solutions:
+            self.report(solution)
+            self.store.add(initial_condition, solution)
+
+        self.draw_trajectory(key)
+
+        if update:
+            self.mySystem.update()
+
+    def draw_trajectory(self, key):
+        """
+            This function plots the stored solutions (forward and/or backward)
+            of a trajectory.
+
+            In general, the trajectory consists of three elements:
+            the forward trajectory, the backward trajectory and the marker for
+            the initial condition, while each element can be turned off in the
+            config file / settings tab.
+            The elements are stored in a list. A dictionary stores this data
+            with the initalCondition as its key, and the list as the value.
+        """
+        traj_stack = []
+        initial_condition = self.store.initial_condition(key)
+
+        # adaptive solvers: points for the current window
+        xmin, xmax, ymin, ymax = self.mySystem.Phaseplane.Plot.canvas.axes.axis()
+
+        max_norm = self.mySystem.equation.max_norm
+
+        for record in self.store.ids(key):
+            solution = self.store.solution(record)
+
+            time, z = solution.refine((xmin, xmax), (ymin, ymax))
+            # points above max_norm are left out, the lines are interrupted there
+            time, z = split_segments(time, z, max_norm)
+            xvalue = z[:, 0]
+            yvalue = z[:, 1]
+
+            if not solution.backward:
                 # plot solution in phase plane:
                 traj_ppForwardColor = myConfig.read("Trajectories", "traj_ppForwardColor")
                 plot1 = self.mySystem.Phaseplane.Plot.canvas.axes.plot(xvalue, yvalue, traj_ppForwardColor)
@@ -112,28 +339,6 @@ class TrajectoryHandler(object):
                     plot3d_forward_projxy = self.mySystem.Txy.Plot.canvas.axes.plot(xvalue, yvalue, 0, "0.75")
                     traj_stack.append(plot3d_forward_projxy)
 
-                # numpy array with both x and y values in pairs
-                # TODO: might be faster if xvalues or yvalues greater than self.mySystem.max_norm
-                # are masked before calculating the norm
-
-                xvalue, yvalue = self.filter_values(xvalue, yvalue)
-
-                # THIS HAS BEEN COMMENTED
-                #                 z = np.column_stack((xvalue,yvalue))
-                #
-                #                 # put norm of each pair in numpy array
-                #                 normed_z = np.array([np.linalg.norm(v) for v in z])
-                #
-                #                 # masking
-                #                 max_norm = self.mySystem.max_norm
-                #                 masked_normed_z = np.ma.masked_greater(normed_z, max_norm)
-                #                 myMask = masked_normed_z.mask
-                #
-                #                 # new xvalue and yvalue
-                #                 xvalue = np.ma.array(xvalue, mask=myMask)
-                #                 yvalue = np.ma.array(yvalue, mask=myMask)
-                # UNTIL HERE!
-
                 # plot solution in x(t):
                 traj_x_tColor = myConfig.read("Trajectories", "traj_x_tColor")
                 plot2 = self.mySystem.Xt.Plot.canvas.axes.plot(time, xvalue, color=traj_x_tColor)
@@ -147,92 +352,70 @@ class TrajectoryHandler(object):
                 traj_stack.append(plot2)
                 traj_stack.append(plot3)
                 traj_stack.append(plot3d_forward)
+                self.traj_lines[record] = plot1[0]
 
             # backward in time --------------------------------------------
-            if backward:
-                self.x_bw = integrate.odeint(self.mySystem.equation.n_rhs, initial_condition, time)
-                #, full_output=1, printmessg=1)#, mxstep=5000)
-                # self.x_bw, infodict2 = integrate.odeint(self.mySystem.n_rhs,
-                # initialCondition, self.t)#, full_output=1, printmessg=1)#, mxstep=5000)
-
-                xvalue_bw = self.x_bw[:, 0]
-                yvalue_bw = self.x_bw[:, 1]
-
-                #                 # masking xvalue_bw (deleting invalid entries)
-                #                 xvalue_bw = np.ma.masked_outside(xvalue_bw,1*self.mySystem.max_norm,
-                #                                                  self.mySystem.max_norm)
-                #                 yvalue_bw = np.ma.array(yvalue_bw, mask=xvalue_bw.mask)
-                #                 xvalue_bw = xvalue_bw.compressed()
-                #
-                #                 # masking yvalue_bw
-                #                 yvalue_bw = np.ma.masked_outside(yvalue_bw,1*self.mySystem.max_norm,
-                #                                                  self.mySystem.max_norm)
-                #                 xvalue = np.ma.array(xvalue, mask=yvalue.mask)
-                #                 yvalue_bw = yvalue_bw.compressed()
-
-                #                 xvalue, yvalue = self.filter_values(xvalue,yvalue)
-
+            else:
                 # plot in phase plane:
                 traj_ppBackwardColor = myConfig.read("Trajectories", "traj_ppBackwardColor")
-                plot4 = self.mySystem.Phaseplane.Plot.canvas.axes.plot(xvalue_bw, yvalue_bw, color=traj_ppBackwardColor)
-                plot3d_backward = self.mySystem.Txy.Plot.canvas.axes.plot(xvalue_bw, yvalue_bw,  -time, traj_ppForwardColor)
+                plot4 = self.mySystem.Phaseplane.Plot.canvas.axes.plot(xvalue, yvalue, color=traj_ppBackwardColor)
+                plot3d_backward = self.mySystem.Txy.Plot.canvas.axes.plot(xvalue, yvalue,  -time, traj_ppBackwardColor)
 
                 zero_arrayx = np.array([10]*len(time))
                 zero_arrayy = np.array([-10]*len(time))
                 if myConfig.get_boolean("3d-plot", "3d_showXProjection"):
-                    plot3d_backward_projx = self.mySystem.Txy.Plot.canvas.axes.plot(xvalue_bw, zero_arrayx, -time, "0.75")
+                    plot3d_backward_projx = self.mySystem.Txy.Plot.canvas.axes.plot(xvalue, zero_arrayx, -time, "0.75")
                     traj_stack.append(plot3d_backward_projx)
                 if myConfig.get_boolean("3d-plot", "3d_showYProjection"):
-                    plot3d_backwardprojy = self.mySystem.Txy.Plot.canvas.axes.plot(zero_arrayy, yvalue_bw, -time, "0.75")
+                    plot3d_backwardprojy = self.mySystem.Txy.Plot.canvas.axes.plot(zero_arrayy, yvalue, -time, "0.75")
                     traj_stack.append(plot3d_backwardprojy)
                 if myConfig.get_boolean("3d-plot", "3d_showYXProjection"):
-                    plot3d_backward_projxy = self.mySystem.Txy.Plot.canvas.axes.plot(xvalue_bw, yvalue_bw, 0, "0.75")
+                    plot3d_backward_projxy = self.mySystem.Txy.Plot.canvas.axes.plot(xvalue, yvalue, 0, "0.75")
                     traj_stack.append(plot3d_backward_projxy)
 
                 traj_stack.append(plot4)
                 traj_stack.append(plot3d_backward)
-
-            #                self.myLogger.message("backward trajectory
-            #                                       done for initial condition "+str(initialCondition))
-
+                self.traj_lines[record] = plot4[0]
+
+        #                self.myLogger.message("backward trajectory
+        #                                       done for initial condition "+str(initialCondition))
+
+        # mark init:
+        if myConfig.get_boolean("Trajectories", "traj_plotInitPoint"):
+            traj_initPointColor = myConfig.read("Trajectories", "traj_initPointColor")
+            plot5 = self.mySystem.Phaseplane.Plot.canvas.axes.plot(initial_condition[0],
+                                           initial_condition[1],
+                                           '.',
+                                           color=traj_initPointColor)
+                                
+            plot3d_initpoint = self.mySystem.Txy.Plot.canvas.axes.plot([initial_condition[0]],
+                                                                       [initial_condition[1]],
+                                                                       [0],
+                                                                       '.',
+                                                                       color=traj_initPointColor)
+            traj_stack.append(plot5)
+            traj_stack.append(plot3d_initpoint)
+
+        if len(traj_stack) != 0:
             # mark init:
-            if myConfig.get_boolean("Trajectories", "traj_plotInitPoint"):
-                traj_initPointColor = myConfig.read("Trajectories", "traj_initPointColor")
-                plot5 = self.mySystem.Phaseplane.Plot.canvas.axes.plot(initial_condition[0],
-                                               initial_condition[1],
-                                               '.',
-                                               color=traj_initPointColor)
-                                    
-                plot3d_initpoint = self.mySystem.Txy.Plot.canvas.axes.plot([initial_condition[0]],
-                                                                           [initial_condition[1]],
-                                                                           [0],
-                                                                           '.',
-                                                                           color=traj_initPointColor)
-                traj_stack.append(plot5)
-                traj_stack.append(plot3d_initpoint)
-
-            if len(traj_stack) != 0:
-                # mark init:
-                self.traj_dict[str(initial_condition)] = traj_stack
-
-            self.mySystem.update()
-
-    def filter_values(self, xvalue, yvalue):
-        z = np.column_stack((xvalue, yvalue))
-
-        # put norm of each pair in numpy array
-        normed_z = np.array([np.linalg.norm(v) for v in z])
+            self.traj_dict[key] = traj_stack
 
-        # masking
-        max_norm = self.mySystem.equation.max_norm
-        masked_normed_z = np.ma.masked_greater(normed_z, max_norm)
-        myMask = masked_normed_z.mask
-
-        # new xvalue and yvalue
-        xvalue = np.ma.array(xvalue, mask=myMask)
-        yvalue = np.ma.array(yvalue, mask=myMask)
+    def redraw(self):
+        """ this function draws every trajectory again from the store (e.g.
+            after the colors changed), nothing is integrated
+        """
+        for key in self.store.keys():
+            self.remove_artists(key)
+            self.draw_trajectory(key)
+        self.mySystem.update()
 
-        return xvalue, yvalue
+    def report(self, solution):
+        """ this function logs why the integration of a trajectory ended
+        """
+        direction = "backward" if solution.backward else "forward"
+        myLogger.debug_message("%s trajectory: %s at t = %g (%d steps)"
+                               % (direction, termination_messages[solution.reason],
+                                  solution.t[-1], len(solution.t)))
 
     def create_trajectory(self):
         try:
@@ -242,7 +425,8 @@ class TrajectoryHandler(object):
             cond1 = initial_condition[0] is not None
             cond2 = initial_condition[1] is not None
             # check if trajectory with initial_condition exists already
-            cond3 = not str(initial_condition) in self.traj_dict
+            key = trajectory_key(initial_condition)
+            cond3 = not key in self.traj_dict and not key in self.pending
 
             if cond1 and cond2 and cond3:
                 self.plot_trajectory(initial_condition, forward, backward)
@@ -253,24 +437,106 @@ class TrajectoryHandler(object):
             myLogger.debug_message(str(type(error)))
             myLogger.debug_message(str(error))
 
+    def recompute(self):
+        """ this function integrates every trajectory again (e.g. after the
+            parameters of the system changed)
+        """
+        settings = self.store.settings() + self.cancel()
+        self.remove_all()
+        self.clear_stack()
+
+        for initial_condition, forward, backward in settings:
+            self.plot_trajectory(initial_condition, forward, backward)
+
+    def refine(self):
+        """ this function samples the trajectories in the phase plane again
+            for the current window (e.g. after zooming in). only solutions
+            of adaptive solvers change
+        """
+        xmin, xmax, ymin, ymax = self.mySystem.Phaseplane.Plot.canvas.axes.axis()
+
+        for record, line in self.traj_lines.items():
+            if self.store.dense[record] is not None:
+                t, z = self.store.solution(record).refine((xmin, xmax), (ymin, ymax))
+                t, z = split_segments(t, z, self.mySystem.equation.max_norm)
+                line.set_data(z[:, 0], z[:, 1])
+
+        self.mySystem.Phaseplane.Plot.update()
+
+    def pick(self, point):
+        """ this function returns the initial condition of the trajectory
+            next to point in the phase plane or None if there is none within
+            [Trajectories] traj_pickRadius (see TrajectoryStore.nearest)
+        """
+        xmin, xmax, ymin, ymax = self.mySystem.Phaseplane.Plot.canvas.axes.axis()
+        radius = float(myConfig.read("Trajectories", "traj_pickRadius"))
+
+        key = self.store.nearest(point, ((xmin, xmax), (ymin, ymax)), radius)
+        if key is None:
+            return None
+        return self.store.initial_condition(key)
+
     def remove(self, init):
-        """ this function removes a single trajectory specified by its initial value. not implemented right now
+        """ this function removes a single trajectory specified by its initial value.
+            only the plots showing it are drawn again
         """
-        pass
+        widgets = self.remove_trajectory(trajectory_key(init))
+        for widget in widgets:
+            widget.Plot.canvas.draw_idle()
+        return len(widgets) > 0
+
+    def remove_trajectory(self, key):
+        """ this function removes the artists and solutions (or the running
+            integration) of a trajectory and returns the plots it was shown
+            in (without drawing them)
+        """
+        widgets = set()
+        if key in self.pending:
+            setting, placeholder, partial = self.pending.pop(key)
+            for artist in placeholder:
+                artist.remove()
+            widgets.add(self.mySystem.Phaseplane)
+            if partial:
+                widgets.update((self.mySystem.Xt, self.mySystem.Yt, self.mySystem.Txy))
+
+        if key in self.traj_dict:
+            widgets.update((self.mySystem.Phaseplane, self.mySystem.Txy))
+            if not self.store.records["backward"][self.store.ids(key)].all():
+                # forward solutions are shown in x(t) and y(t)
+                widgets.update((self.mySystem.Xt, self.mySystem.Yt))
+            self.remove_artists(key)
+
+        self.store.remove(key)
+        return widgets
+
+    def remove_artists(self, key):
+        """ this function removes the artists of a trajectory, its solutions
+            stay in the store
+        """
+        for record in self.store.ids(key):
+            self.traj_lines.pop(record, None)
+
+        traj_stack = self.traj_dict.pop(key, [])
+        while traj_stack:
+            try:
+                traj_stack.pop()[0].remove()
+            except Exception as error:
+                myLogger.error_message("Could not delete trajectory")
+                myLogger.debug_message(str(type(error)))
+                myLogger.debug_message(str(error))
 
     def remove_all(self):
         """ this function removes every trajectory in y(x), x(t) and y(t)
         """
-        for i in self.traj_dict:
-            # i is the next key
-            for j in xrange(0, len(self.traj_dict[i])):
-                # j is a list element from the traj_stack
-                try:
-                    self.traj_dict[i].pop()[0].remove()
-                except Exception as error:
-                    myLogger.error_message("Could not delete trajectory")
-                    myLogger.debug_message(str(type(error)))
-                    myLogger.debug_message(str(error))
-        self.mySystem.update()
+        if self.worker is not None:
+            self.worker.cancel()
+
+        widgets = set()
+        for key in list(self.traj_dict) + list(self.pending):
+            widgets.update(self.remove_trajectory(key))
+        self.clear_stack()
+
+        for widget in widgets:
+            widget.Plot.canvas.draw_idle()
 
 #~ myTrajectories = TrajectoryHandler()
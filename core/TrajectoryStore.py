@@ -0,0 +1,360 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2016
+#    by Klemens Fritzsche, pyplane@leckstrom.de
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Storage of integrated trajectories (no widgets needed)
+
+The points of all trajectories are kept in three contiguous columns t, x
+and y, every solution (one direction of a trajectory) is a record with the
+range of its points and its metadata. The artists of TrajectoryHandler are
+drawn from the store, so drawing again (after zooming or a change of the
+colors) and exporting never integrate again.
+
+Example:
+
+    store = TrajectoryStore()
+    store.add([1., 0.], solve_trajectory(equation, [1., 0.]))
+    table = store.table()   # columns id, t, x, y
+
+Trajectories near a point are found with a SegmentGrid (built for the
+window of the phase plane, see TrajectoryStore.nearest).
+"""
+
+from __future__ import division
+
+__author__ = 'Klemens Fritzsche'
+
+import numpy as np
+
+from core.Numerics import Solution
+
+# one record per solution: initial condition, its points t[start:stop],
+# x[start:stop], y[start:stop], direction, solver and termination reason
+# (key of core.Numerics.termination_messages)
+record_dtype = np.dtype([("x0", float), ("y0", float), ("start", int), ("stop", int),
+                         ("backward", bool), ("solver", "U8"), ("reason", "U12")])
+
+
+def trajectory_key(initial_condition):
+    """ this function returns the key of a trajectory (as used for the dicts
+        of TrajectoryHandler)
+    """
+    return str([float(value) for value in initial_condition])
+
+
+class TrajectoryStore(object):
+    """ this class stores solutions (core.Numerics.Solution) by the initial
+        condition of their trajectory. record ids stay valid until the
+        trajectory is removed
+    """
+    def __init__(self, capacity=4096):
+        self.t = np.empty(capacity)
+        self.x = np.empty(capacity)
+        self.y = np.empty(capacity)
+        # number of used points (removed ones included, see compact)
+        self.size = 0
+        self.garbage = 0
+
+        self.records = np.zeros(16, dtype=record_dtype)
+        self.count = 0
+        # dense output of every record (None for odeint or removed records)
+        self.dense = []
+        # key -> record ids of the trajectory
+        self.index = {}
+
+        # SegmentGrid of the stored trajectories (see nearest)
+        self.grid = None
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def keys(self):
+        return list(self.index)
+
+    def grow(self, points):
+        """ this function makes room for points more points (the columns
+            double their size) and one more record
+        """
+        needed = self.size + points
+        if needed > len(self.t):
+            capacity = max(needed, 2 * len(self.t))
+            for name in ("t", "x", "y"):
+                column = np.empty(capacity)
+                column[:self.size] = getattr(self, name)[:self.size]
+                setattr(self, name, column)
+
+        if self.count == len(self.records):
+            records = np.zeros(2 * len(self.records), dtype=record_dtype)
+            records[:self.count] = self.records
+            self.records = records
+
+    def add(self, initial_condition, solution):
+        """ this function stores the solution of the trajectory starting in
+            initial_condition and returns its record id
+        """
+        z = np.asarray(solution.z, dtype=float)
+        n = len(z)
+        self.grow(n)
+
+        start = self.size
+        self.t[start:start + n] = solution.t
+        self.x[start:start + n] = z[:, 0]
+        self.y[start:start + n] = z[:, 1]
+        self.size += n
+
+        record = self.count
+        self.records[record] = (initial_condition[0], initial_condition[1], start, start + n,
+                                solution.backward, solution.solver, solution.reason)
+        self.dense.append(solution.dense)
+        self.count += 1
+
+        self.index.setdefault(trajectory_key(initial_condition), []).append(record)
+        return record
+
+    def ids(self, key):
+        """ this function returns the record ids of a trajectory
+        """
+        return list(self.index.get(key, []))
+
+    def points(self, record):
+        """ this function returns the columns (t, x, y) of a record (views,
+            not copies)
+        """
+        start, stop = self.records["start"][record], self.records["stop"][record]
+        return self.t[start:stop], self.x[start:stop], self.y[start:stop]
+
+    def solution(self, record):
+        """ this function returns the Solution of a record
+        """
+        t, x, y = self.points(record)
+        entry = self.records[record]
+        return Solution(t, np.column_stack((x, y)), bool(entry["backward"]), str(entry["solver"]),
+                        self.dense[record], str(entry["reason"]))
+
+    def solutions(self, key):
+        """ this function returns the Solutions of a trajectory
+        """
+        return [self.solution(record) for record in self.index.get(key, [])]
+
+    def initial_condition(self, key):
+        record = self.index[key][0]
+        return [float(self.records["x0"][record]), float(self.records["y0"][record])]
+
+    def settings(self):
+        """ this function returns (initial condition, forward, backward) of
+            every trajectory, e.g. to integrate them again
+        """
+        settings = []
+        for key, records in self.index.items():
+            backward = self.records["backward"][records]
+            settings.append((self.initial_condition(key), bool((~backward).any()),
+                             bool(backward.any())))
+        return settings
+
+    def remove(self, key):
+        """ this function removes a trajectory and returns the ids of its
+            records. the space of the points is freed by compact
+        """
+        records = self.index.pop(key, [])
+        for record in records:
+            self.garbage += self.records["stop"][record] - self.records["start"][record]
+            self.records["start"][record] = self.records["stop"][record] = 0
+            self.dense[record] = None
+
+        if self.garbage > self.size // 2:
+            self.compact()
+        return records
+
+    def compact(self):
+        """ this function moves the points of the stored trajectories to the
+            front of the columns
+        """
+        records = sorted((record for ids in self.index.values() for record in ids),
+                         key=lambda record: self.records["start"][record])
+        position = 0
+        for record in records:
+            start, stop = self.records["start"][record], self.records["stop"][record]
+            n = stop - start
+            for column in (self.t, self.x, self.y):
+                column[position:position + n] = column[start:stop]
+            self.records["start"][record] = position
+            self.records["stop"][record] = position + n
+            position += n
+
+        self.size = position
+        self.garbage = 0
+
+    def clear(self):
+        self.__init__(len(self.t))
+
+    def nearest(self, point, window, radius):
+        """ this function returns the key of the trajectory closest to point
+            or None if there is none within radius (fraction of the window
+            ((xmin, xmax), (ymin, ymax)))
+        """
+        # the grid is built again for new trajectories, a new window or
+        # radius. removed trajectories are skipped
+        grid = self.grid
+        if grid is None or grid.count != self.count or grid.window != window or \
+                grid.cell != radius:
+            grid = self.grid = SegmentGrid(self, window, radius)
+
+        removed = self.records["stop"] == self.records["start"]
+        record = grid.nearest(point, removed)
+        if record is None:
+            return None
+        return trajectory_key((self.records["x0"][record], self.records["y0"][record]))
+
+    def table(self, keys=None):
+        """ this function returns the points of the trajectories keys (all
+            by default) as a structured array with the columns id (record),
+            t, x and y, e.g. for np.savetxt. times of backward solutions are
+            negative
+        """
+        if keys is None:
+            keys = self.index
+        records = [record for key in keys for record in self.index.get(key, [])]
+        lengths = [self.records["stop"][record] - self.records["start"][record]
+                   for record in records]
+
+        table = np.empty(sum(lengths), dtype=[("id", int), ("t", float), ("x", float),
+                                              ("y", float)])
+        position = 0
+        for record, n in zip(records, lengths):
+            t, x, y = self.points(record)
+            rows = table[position:position + n]
+            rows["id"] = record
+            rows["t"] = -t if self.records["backward"][record] else t
+            rows["x"] = x
+            rows["y"] = y
+            position += n
+
+        return table
+
+
+class SegmentGrid(object):
+    """ this class sorts the line segments between the stored points of the
+        trajectories (the parts that are visible in window) into square bins
+        of the size cell (as fraction of the window, x and y are scaled to
+        the window). long segments are divided into pieces of at most the
+        cell size, every piece is sorted into the bin of its midpoint, so
+        the pieces within cell of a point are in the 5 x 5 bins around it
+    """
+    # pieces of a single segment (segments of blown up trajectories can be
+    # far longer than the window)
+    max_pieces = 1000
+
+    def __init__(self, store, window, cell):
+        self.count = store.count
+        self.window = window
+        self.cell = cell
+        (xmin, xmax), (ymin, ymax) = window
+        self.origin = (float(xmin), float(ymin))
+        self.scale = (float(xmax - xmin), float(ymax - ymin))
+
+        # segments i -> i + 1 of every stored record as it is drawn: the
+        # steps of adaptive solvers are refined with their dense output (see
+        # core.Numerics.Solution.refine), the chords of long steps can be
+        # far from the curve
+        records = np.array([record for ids in store.index.values() for record in ids], dtype=int)
+        dense = np.array([store.dense[record] is not None for record in records], dtype=bool)
+        u0, v0, du, dv, owner = [np.empty(0)] * 5
+
+        starts = store.records["start"][records[~dense]]
+        lengths = np.maximum(store.records["stop"][records[~dense]] - starts - 1, 0)
+        if len(starts) > 0:
+            first = np.cumsum(lengths) - lengths
+            i = np.arange(lengths.sum()) - np.repeat(first, lengths) + np.repeat(starts, lengths)
+            u = (store.x[:store.size] - self.origin[0]) / self.scale[0]
+            v = (store.y[:store.size] - self.origin[1]) / self.scale[1]
+            u0, v0, du, dv = u[i], v[i], u[i + 1] - u[i], v[i + 1] - v[i]
+            owner = np.repeat(records[~dense], lengths)
+
+        parts = [(u0, v0, du, dv, owner)]
+        for record in records[dense]:
+            z = store.solution(record).refine(*window)[1]
+            u = (z[:, 0] - self.origin[0]) / self.scale[0]
+            v = (z[:, 1] - self.origin[1]) / self.scale[1]
+            parts.append((u[:-1], v[:-1], np.diff(u), np.diff(v),
+                          np.full(max(len(u) - 1, 0), record)))
+        u0, v0, du, dv, owner = [np.concatenate(columns) for columns in zip(*parts)]
+        owner = owner.astype(int)
+
+        # visible and finite segments (bounding box crossing the window)
+        with np.errstate(invalid="ignore"):
+            visible = ((np.maximum(u0, u0 + du) >= -cell) & (np.minimum(u0, u0 + du) <= 1 + cell) &
+                       (np.maximum(v0, v0 + dv) >= -cell) & (np.minimum(v0, v0 + dv) <= 1 + cell))
+        u0, v0, du, dv, owner = u0[visible], v0[visible], du[visible], dv[visible], owner[visible]
+
+        # pieces of at most cell, most segments are shorter
+        pieces = np.clip(np.ceil(np.maximum(np.abs(du), np.abs(dv)) / cell), 1,
+                         self.max_pieces).astype(int)
+        du = du / pieces
+        dv = dv / pieces
+        if (pieces > 1).any():
+            segment = np.repeat(np.arange(len(pieces)), pieces)
+            k = np.arange(len(segment)) - np.repeat(np.cumsum(pieces) - pieces, pieces)
+            du, dv, owner = du[segment], dv[segment], owner[segment]
+            u0 = u0[segment] + k * du
+            v0 = v0[segment] + k * dv
+
+        codes = self.codes(u0 + du / 2, v0 + dv / 2)
+        order = np.argsort(codes)
+        self.bins = codes[order]
+        self.u0, self.v0, self.du, self.dv = u0[order], v0[order], du[order], dv[order]
+        self.owner = owner[order]
+
+    def codes(self, u, v):
+        """ this function returns the bin numbers of points (window scaled)
+        """
+        return ((np.floor(u / self.cell).astype(np.int64) << 32) +
+                np.floor(v / self.cell).astype(np.int64))
+
+    def nearest(self, point, removed=None):
+        """ this function returns the record of the segment closest to point
+            or None if there is none within cell. removed flags the records
+            to skip
+        """
+        u = (float(point[0]) - self.origin[0]) / self.scale[0]
+        v = (float(point[1]) - self.origin[1]) / self.scale[1]
+        offsets = np.arange(-2, 3, dtype=np.int64)
+        neighbours = (self.codes(u, v) + (offsets[:, np.newaxis] << 32) +
+                      offsets[np.newaxis, :]).ravel()
+
+        low = np.searchsorted(self.bins, neighbours, side="left")
+        high = np.searchsorted(self.bins, neighbours, side="right")
+        candidates = np.concatenate([np.arange(a, b) for a, b in zip(low, high)])
+        if removed is not None and len(candidates) > 0:
+            candidates = candidates[~removed[self.owner[candidates]]]
+        if len(candidates) == 0:
+            return None
+
+        # distance of point to the pieces
+        u0, v0 = self.u0[candidates], self.v0[candidates]
+        du, dv = self.du[candidates], self.dv[candidates]
+        length = du ** 2 + dv ** 2
+        s = np.clip(((u - u0) * du + (v - v0) * dv) / np.where(length > 0, length, 1.), 0., 1.)
+        distance = np.hypot(u0 + s * du - u, v0 + s * dv - v)
+
+        best = np.argmin(distance)
+        if distance[best] > self.cell:
+            return None
+        return self.owner[candidates[best]]
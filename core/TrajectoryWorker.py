@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2016
+#    by Klemens Fritzsche, pyplane@leckstrom.de
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import division
+
+__author__ = 'Klemens Fritzsche'
+
+import time
+
+import numpy as np
+
+try:
+    import Queue as queue
+except ImportError:
+    # python 3
+    import queue
+
+from PyQt4 import QtCore
+
+from core.TrajectoryCache import myTrajectoryCache
+
+
+class TrajectoryWorker(QtCore.QThread):
+    """ this thread integrates the queued trajectories one after another, so
+        the gui stays responsive while integrating. results, progress and
+        the points of the running trajectory are sent as signals, their
+        slots run in the gui thread. the thread does not log (myLogger
+        writes to widgets), debug messages are sent as signal message
+        (connect it queued, see core.TrajectoryHandler)
+    """
+    # key, list of Solutions
+    trajectory_done = QtCore.pyqtSignal(object, object)
+    # key, fraction of the integration done
+    progress = QtCore.pyqtSignal(object, float)
+    # key, backward, times and points (shape (n, 2)) since the last chunk
+    chunk = QtCore.pyqtSignal(object, bool, object, object)
+    # debug message (e.g. of core.TrajectoryCache)
+    message = QtCore.pyqtSignal(str)
+
+    # minimal time between two progress signals and chunks of a trajectory
+    # (s), the first chunk is sent after the first step
+    interval = 0.1
+
+    def __init__(self, parent=None):
+        QtCore.QThread.__init__(self, parent)
+        self.jobs = queue.Queue()
+        # jobs of older generations are cancelled
+        self.generation = 0
+
+        QtCore.QCoreApplication.instance().aboutToQuit.connect(self.stop)
+
+    def add(self, key, equation, initial_condition, directions, options):
+        """ this function queues a trajectory. directions is a list of
+            backward flags, options are passed to solve_trajectory (they
+            should be complete, see core.Numerics.trajectory_options)
+        """
+        if not self.isRunning():
+            self.start()
+        self.jobs.put((self.generation, key, equation, initial_condition, directions, options))
+
+    def cancel(self):
+        """ this function cancels the running and all queued trajectories
+        """
+        self.generation += 1
+
+    def stop(self):
+        """ this function ends the thread
+        """
+        self.cancel()
+        if self.isRunning():
+            self.jobs.put(None)
+            self.wait()
+
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+
+            generation, key, equation, initial_condition, directions, options = job
+            if generation != self.generation:
+                continue
+
+            solutions = []
+            for part, backward in enumerate(directions):
+                callback = self.callback(generation, key, options["time"], part, len(directions),
+                                         backward, initial_condition)
+                solution = myTrajectoryCache.solve(equation, initial_condition, backward=backward,
+                                                   callback=callback, message=self.message.emit,
+                                                   **options)
+                if generation != self.generation:
+                    break
+                solutions.append(solution)
+            else:
+                self.trajectory_done.emit(key, solutions)
+
+    def callback(self, generation, key, duration, part, parts, backward, initial_condition):
+        """ this function returns the callback of solve_trajectory for part
+            of parts of a trajectory: it stops the integration after cancel
+            and sends the progress and the new points every interval
+        """
+        last = [0.]
+        ts = [0.]
+        zs = [list(initial_condition)]
+
+        def callback(t, z):
+            if generation != self.generation:
+                return False
+
+            ts.append(t)
+            zs.append(z)
+
+            now = time.time()
+            if now - last[0] > self.interval:
+                last[0] = now
+                self.chunk.emit(key, backward, np.array(ts), np.array(zs))
+                self.progress.emit(key, (part + t / duration) / parts)
+                # the next chunk starts with the last point
+                del ts[:-1]
+                del zs[:-1]
+
+        return callback
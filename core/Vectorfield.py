@@ -18,11 +18,11 @@
 
 __author__ = 'Klemens Fritzsche'
 
-import numpy as np
 
 
 from core.ConfigHandler import myConfig
 from core.Logging import myLogger
+from core.Numerics import vectorfield
 
 
 class Vectorfield(object):
@@ -45,23 +45,15 @@ class Vectorfield(object):
             # get axis limits
             xmin, xmax, ymin, ymax = self.myWidget.Plot.canvas.axes.axis()
 
-            N = int(myConfig.read("Vectorfield", "vf_gridPointsInX"))
-            M = int(myConfig.read("Vectorfield", "vf_gridPointsInY"))
             vf_color = str(myConfig.read("Vectorfield", "vf_color"))
             vf_arrowHeadWidth = float(myConfig.read("Vectorfield", "vf_arrowHeadWidth"))
             vf_arrowHeadLength = float(myConfig.read("Vectorfield", "vf_arrowHeadLength"))
             vf_arrowWidth = float(myConfig.read("Vectorfield", "vf_arrowWidth"))
             vf_arrowPivot = str(myConfig.read("Vectorfield", "vf_arrowPivot"))
 
-            a = np.linspace(xmin - xmin / N, xmax - xmax / N, N)
-            b = np.linspace(ymin - ymin / M, ymax - ymax / M, M)
-            X1, Y1 = np.meshgrid(a, b)
-
             try:
-                DX1, DY1 = self.myWidget.mySystem.equation.rhs([X1, Y1])
-                M = np.hypot(DX1, DY1)
-                M[M == 0] = 1.
-                DX1_mix, DY1_mix = DX1 / M, DY1 / M
+                X1, Y1, DX1_mix, DY1_mix = vectorfield(self.myWidget.mySystem.equation,
+                                                       (xmin, xmax), (ymin, ymax))
 
                 quiver = self.myWidget.Plot.canvas.axes.quiver(X1, Y1, DX1_mix, DY1_mix,
                                                   angles='xy',
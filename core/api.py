@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+
+"""
+headless api of pyplane (no Qt needed):
+
+    from core.api import Equation, trajectory, newton, nullclines, vectorfield
+
+see core.Numerics. the names are collected here and not in core/__init__.py:
+classes like Equation would hide their modules (e.g. core.Equation).
+"""
+
+from core.Equation import Equation, parse_parameters, format_parameters
+from core.ParameterSweep import ParameterSweep
+from core.Ensemble import solve_ensemble
+from core.Numerics import integration_time, trajectory, Solution, solve_trajectory, \
+    solve_trajectories, newton, find_roots, find_equilibria, vectorfield, nullcline_grid, nullclines
+from core.TrajectoryStore import TrajectoryStore
+from core.EquilibriumTable import EquilibriumTable
+
+__all__ = ["Equation", "parse_parameters", "format_parameters", "ParameterSweep",
+           "integration_time", "trajectory", "Solution", "solve_trajectory", "solve_trajectories",
+           "solve_ensemble", "newton", "find_roots", "find_equilibria", "vectorfield", "nullcline_grid",
+           "nullclines",
+           "TrajectoryStore", "EquilibriumTable"]
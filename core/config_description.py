@@ -1,6 +1,6 @@
 {
     "sectionlist": ["Logging", "Plotting", "Phaseplane", "x-t-plot", "y-t-plot", "3d-plot", "System", "Vectorfield", "Streamlines",
-                    "Nullclines", "Trajectories", "Functions", "Linearization", "Export", "Test"],
+                    "Nullclines", "Trajectories", "Equilibria", "Functions", "Linearization", "Export", "Test"],
 
     "Logging": "Logging Behaviour",
     "log_showDbg": ["Enable debug mode", False],
@@ -88,6 +88,11 @@
 
     "System": "Settings for Numerical Integration",
     "max_norm": ["Set norm([x,y]) threshold (see documentation)", 1e5],
+    "backend": ["Compile system with numpy or numba (numba has to be installed)", "numpy"],
+    "cache_directory": ["Directory of the cache for compiled systems", "config/kernel_cache"],
+    "cache_maxsize": ["Size of the cache for compiled systems in kB (0 disables the cache)", 2048],
+    "grid_precision": ["Precision for vector field, streamlines and nullclines (float32, float64 or longdouble)", "float32"],
+    "integration_precision": ["Precision for trajectories and equilibria (float32, float64 or longdouble)", "float64"],
 
     "Vectorfield": "Vectorfield Properties",
     "vf_onByDefault": ["Turn on by default", True],
@@ -125,7 +130,30 @@
     "traj_checkForwardByDefault": ["Check forward integration by default", True],
     "traj_checkBackwardByDefault": ["Check backward integration by default", True],
     "traj_integrationtime": ["Integration time (sec)", 10.],
-    "traj_integrationstep": ["Integration step size (sec)", 0.0005],
+    "traj_integrationstep": ["Integration step size (sec, odeint only)", 0.0005],
+    "traj_solver": ["Integration method (odeint, RK45, DOP853, LSODA, Radau or BDF)", "LSODA"],
+    "traj_rtol": ["Relative tolerance (adaptive methods)", 1e-6],
+    "traj_atol": ["Absolute tolerance (adaptive methods)", 1e-9],
+    "traj_stopEarly": ["Stop trajectories outside the window, at equilibria and on periodic orbits (adaptive methods, zooming out does not integrate further)", False],
+    "traj_windowMargin": ["Margin around the window for stopping (fraction of window size)", 0.5],
+    "traj_stopSpeed": ["Speed below which a trajectory has reached an equilibrium", 1e-6],
+    "traj_periodicTolerance": ["Relative distance for closing periodic orbits", 1e-5],
+    "traj_pool": ["Many trajectories at once: process, thread or ensemble (all in one array)", "process"],
+    "traj_workers": ["Number of workers (0: one per cpu)", 0],
+    "traj_ensembleSolver": ["Integration method for ensembles (RK4 or RK45)", "RK45"],
+    "traj_ensembleStep": ["Step size for ensembles (RK4, initial step of RK45)", 0.01],
+    "traj_background": ["Integrate trajectories in the background", True],
+    "traj_frameRate": ["Redraws per second while integrating in the background", 20],
+    "traj_cacheSize": ["Number of integrated trajectories kept in memory (0 disables the cache)", 1000],
+    "traj_cacheDirectory": ["Directory for trajectories dropped from memory", "config/trajectory_cache"],
+    "traj_cacheDiskSize": ["Size of the trajectory directory in kB (0: nothing is written)", 10240],
+    "traj_pickRadius": ["Distance for removing trajectories by right click (fraction of the window)", 0.01],
+
+    "Equilibria": "Equilibrium Points",
+    "eq_gridPointsInX": ["Number of seeds in x direction when searching all equilibria", 30],
+    "eq_gridPointsInY": ["Number of seeds in y direction when searching all equilibria", 30],
+    "eq_tolerance": ["Distance below which two equilibria are the same point", 1e-4],
+    "eq_typeTolerance": ["Tolerance of the boundaries between types of equilibria (relative)", 1e-8],
 
     "Functions": "Function Plotting",
     "fct_gridPointsInX": ["Number of grid points in x direction", 500],
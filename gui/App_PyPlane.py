@@ -37,6 +37,7 @@ from Ui_PyPlane import Ui_pyplane
 from core.Logging import myLogger
 from core.ConfigHandler import myConfig
 from core.System import System
+from core.Equation import parse_parameters, format_parameters
 import core.PyPlaneHelpers as myHelpers
 from gui.Widgets import SettingsWidget
 
@@ -69,6 +70,8 @@ class PyplaneMainWindow(QtGui.QMainWindow, Ui_pyplane):
         # Embed SettingsWidget:
         self.mySettings = SettingsWidget()
         self.SettingsLayout.addWidget(self.mySettings)
+        # new colors and styles for the trajectories (without integrating)
+        self.mySettings.SetupApplyButton.clicked.connect(self.redraw_trajectories)
 
         self.fct_stack = []
         self.linearization_stack = []
@@ -78,6 +81,16 @@ class PyplaneMainWindow(QtGui.QMainWindow, Ui_pyplane):
         self.xDotLabel.setText(u"\u1E8B(x,y) = ")
         self.yDotLabel.setText(u"\u1E8F(x,y) = ")
 
+        # system parameters, e.g. "mu = 1.5, a = 2"
+        self.paramBox = QtGui.QHBoxLayout()
+        self.paramLabel = QtGui.QLabel(self.centralwidget)
+        self.paramLabel.setText("Parameters: ")
+        self.paramBox.addWidget(self.paramLabel)
+        self.paramLineEdit = QtGui.QLineEdit(self.centralwidget)
+        self.paramLineEdit.setPlaceholderText("mu = 1.0, a = 0.5")
+        self.paramBox.addWidget(self.paramLineEdit)
+        self.syst.addLayout(self.paramBox)
+
         try:
             test = myConfig.read("Test", "test_var")
         except:
@@ -105,6 +118,7 @@ class PyplaneMainWindow(QtGui.QMainWindow, Ui_pyplane):
         self.toggle_vectorfield_action.setEnabled(False)
         self.toggle_streamlines_action.setEnabled(False)
         self.toggle_equilibrium_action.setEnabled(False)
+        self.find_equilibria_action.setEnabled(False)
         if hasattr(self, "linearize_action"):
             self.linearize_action.setEnabled(False)
         self.toggle_nullclines_action.setEnabled(False)
@@ -114,6 +128,7 @@ class PyplaneMainWindow(QtGui.QMainWindow, Ui_pyplane):
         self.toggle_vectorfield_action.setEnabled(True)
         self.toggle_streamlines_action.setEnabled(True)
         self.toggle_equilibrium_action.setEnabled(True)
+        self.find_equilibria_action.setEnabled(True)
         self.toggle_nullclines_action.setEnabled(True)
 
         # check items
@@ -130,6 +145,7 @@ class PyplaneMainWindow(QtGui.QMainWindow, Ui_pyplane):
             # equation:
             self.xDotLineEdit.setText(system.equation.x_dot_string)
             self.yDotLineEdit.setText(system.equation.y_dot_string)
+            self.paramLineEdit.setText(format_parameters(system.equation.parameters))
 
     def initialize_ui(self):
         # gets called after submitting a system (updae_ui() cannot be
@@ -156,10 +172,18 @@ class PyplaneMainWindow(QtGui.QMainWindow, Ui_pyplane):
     def close_current_tab(self):
         index = self.tabWidget.currentIndex()
         if index != self.tabWidget.count()-1:
+            # delete the tab contents, otherwise the widgets keep the system
+            # (and its compiled equation) alive
+            contents = self.tabWidget.widget(index)
             self.tabWidget.removeTab(index)
-            self.systems.pop(index)
+            contents.deleteLater()
+            self.systems.pop(index).Trajectories.stop_worker()
         self.update_ui()
 
+    def redraw_trajectories(self):
+        for system in self.systems:
+            system.Trajectories.redraw()
+
     def close_all_tabs(self):
         for i in xrange(self.tabWidget.count()-1):
             self.tabWidget.removeTab(i)
@@ -206,14 +230,35 @@ class PyplaneMainWindow(QtGui.QMainWindow, Ui_pyplane):
                 x_string = str(self.xDotLineEdit.text())
                 y_string = str(self.yDotLineEdit.text())
 
+                try:
+                    parameters = parse_parameters(str(self.paramLineEdit.text()))
+                except ValueError as exc:
+                    myLogger.error_message("Please check parameters (e.g. mu = 1.0, a = 0.5)!")
+                    myLogger.debug_message(str(exc))
+                    return
+
+                # only parameter values changed: no new system is needed
+                system = self.get_current_system()
+                if system is not None:
+                    equation = system.equation
+                    same_system = (equation.x_dot_string, equation.y_dot_string) == (x_string, y_string)
+                    new_values = [name for name in equation.parameters
+                                  if name in parameters and parameters[name] != equation.parameters[name]]
+                    if same_system and len(new_values) > 0:
+                        system.set_parameters(parameters)
+                        self.save_tmp_system()
+                        return
+
                 equation = (x_string, y_string)
-                system = System(self, equation)
+                system = System(self, equation, parameters=parameters)
                 self.systems.insert(0, system)
                 self.save_tmp_system()
 
                 myLogger.message("------ new system created ------")
                 myLogger.message("    x' = " + str(system.equation.what_is_my_system()[0]))
                 myLogger.message("    y' = " + str(system.equation.what_is_my_system()[1]) + "\n", )
+                if len(system.equation.parameters) > 0:
+                    myLogger.message("    " + format_parameters(system.equation.parameters) + "\n", )
 
             else:
                 myLogger.error_message("Please check system!")
@@ -232,8 +277,19 @@ class PyplaneMainWindow(QtGui.QMainWindow, Ui_pyplane):
             #~ self.yDotLineEdit.setText(sysfile.readline().strip())
             xdot_string = str(sysfile.readline())
             ydot_string = str(sysfile.readline())
+            # optional: one parameter per line, e.g. "mu = 1.5"
+            parameter_string = str(sysfile.read())
             self.xDotLineEdit.setText(xdot_string.strip())
             self.yDotLineEdit.setText(ydot_string.strip())
+            try:
+                parameter_string = format_parameters(parse_parameters(parameter_string))
+            except ValueError as exc:
+                # the lines are shown as they are, to be corrected by the user
+                myLogger.error_message("Please check parameters (e.g. mu = 1.0, a = 0.5)!")
+                myLogger.debug_message(str(exc))
+                parameter_string = ", ".join(line.strip() for line in parameter_string.splitlines()
+                                             if line.strip() != "")
+            self.paramLineEdit.setText(parameter_string)
             myLogger.message(file_name + " loaded")
 
     def load_tmp_system(self):
@@ -254,7 +310,8 @@ class PyplaneMainWindow(QtGui.QMainWindow, Ui_pyplane):
             index = self.tabWidget.currentIndex()
             system = self.systems[index]
             file_name = 'library/tmp.ppf'
-            self.save_system(file_name, system.equation.what_is_my_system())
+            self.save_system(file_name, system.equation.what_is_my_system(),
+                             system.equation.parameters)
         else:
             myLogger.error_message("There is no system to save!")
 
@@ -267,23 +324,28 @@ class PyplaneMainWindow(QtGui.QMainWindow, Ui_pyplane):
                                                                            'pyplane file (*.ppf)')
             #~ sys_pickleds = system.pickle(file_name)
             #~ system.equation.what_is_my_system()
-            self.save_system(file_name, system.equation.what_is_my_system())
+            self.save_system(file_name, system.equation.what_is_my_system(),
+                             system.equation.parameters)
         else:
             myLogger.error_message("There is no system to save!")
 
 
-    def save_system(self, file_name, system):
+    def save_system(self, file_name, system, parameters=None):
         x_dot_string = str(system[0])
         y_dot_string = str(system[1])
         f_ending = '.ppf'
         f_len = len(file_name)
 
+        content = x_dot_string + "\n" + y_dot_string
+        if parameters:
+            content = content + "\n" + format_parameters(parameters, "\n")
+
         if file_name[f_len - 4:f_len] == f_ending:
             with open(file_name, 'w') as sysfile:
-                sysfile.write(x_dot_string + "\n" + y_dot_string)
+                sysfile.write(content)
         else:
             with open(file_name + f_ending, 'w') as sysfile:
-                sysfile.write(x_dot_string + "\n" + y_dot_string)
+                sysfile.write(content)
 
         myLogger.message("System saved as " + file_name)
 
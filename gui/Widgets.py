@@ -427,13 +427,14 @@ class PhaseplaneWidget(QtGui.QWidget, Ui_ZoomWidget):
 
     def linearize_system(self):
         eq_identifier = str(self.linBox.currentText())
-        equilibrium = self.Equilibria.get_equilibrium_by_character_identifier(eq_identifier)
-        jac = self.Equilibria.approx_ep_jacobian(equilibrium.coordinates)
+        equilibrium_id = self.Equilibria.get_equilibrium_by_character_identifier(eq_identifier)
+        coordinates = self.Equilibria.table.point(equilibrium_id)
+        jac = self.Equilibria.jacobian(equilibrium_id)
         
         # set system properties
         accuracy = int(myConfig.read("Linearization","lin_round_decimals"))
-        xe = round(equilibrium.coordinates[0], accuracy)
-        ye = round(equilibrium.coordinates[1], accuracy)
+        xe = round(coordinates[0], accuracy)
+        ye = round(coordinates[1], accuracy)
         equilibrium = (xe, ye)
         A00 = str(round(jac[0,0], accuracy))
         A01 = str(round(jac[0,1], accuracy))
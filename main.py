@@ -131,6 +131,11 @@ class MainApp(PyplaneMainWindow):
         #~ self.toggle_equilibrium_action.setChecked(False)
         self.toggle_equilibrium_action.triggered.connect(self.eq_helper_function)
         self.show_menu.addAction(self.toggle_equilibrium_action)
+
+        # every equilibrium in the window
+        self.find_equilibria_action = QtGui.QAction('Find &all Equilibria in the Window', self.show_menu)
+        self.find_equilibria_action.triggered.connect(self.find_all_equilibria)
+        self.show_menu.addAction(self.find_equilibria_action)
         #self.show_menu.addAction('&Find an Equilibrium Point', self.myGraph.toggleEP)
 
         # linearize checkbox
@@ -204,6 +209,11 @@ class MainApp(PyplaneMainWindow):
             system.Phaseplane.Equilibria.toggle()
             self.update_ui()
 
+    def find_all_equilibria(self):
+        system = self.get_current_system()
+        if system != None:
+            system.Phaseplane.Equilibria.find_all_equilibria()
+
     #~ def linearize_helper_function(self):
         #~ system = self.get_current_system()
         #~ if system != None:
@@ -1,11 +1,36 @@
 # -*- coding: utf-8 -*-
 
+import os
 import sys
 sys.path.append('../')
 
 import core.PyPlaneHelpers as pph
+import core.Equation as equation_module
 import unittest
 
+import shutil
+import tempfile
+
+import gc
+
+import numpy as np
+import sympy as sp
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+from core.api import Equation, parse_parameters, ParameterSweep, integration_time, trajectory, solve_trajectory, solve_ensemble, \
+    newton, find_roots, vectorfield, nullclines, find_equilibria, TrajectoryStore, EquilibriumTable
+from core.Equation import interned_kernels, compile_system
+from core.KernelCache import KernelCache, kernel_key
+from core.Codegen import JitKernel
+from core.TrajectoryCache import TrajectoryCache
+from core.PointIndex import PointIndex
+from core.Numerics import equilibrium_types, equilibrium_names, classify_equilibria, Termination, \
+    solve_trajectories, valid_segments, split_segments, merge_roots
+
 
 class CoreTests(unittest.TestCase):
 
@@ -20,6 +45,494 @@ class CoreTests(unittest.TestCase):
         self.assertEqual(res, expected_res)
 
 
+class NumericsTests(unittest.TestCase):
+
+    def setUp(self):
+        self.equation = Equation(("y", "mu*(1-x**2)*y-x"), parameters={"mu": 1.})
+
+    def test_trajectory(self):
+        time = integration_time(1., 0.01)
+        forward = trajectory(self.equation, [1., 0.], time)
+        self.assertEqual(forward.shape, (len(time), 2))
+
+        # integrating the end point backward leads to the initial condition
+        backward = trajectory(self.equation, forward[-1], time, backward=True)
+        np.testing.assert_allclose(backward[-1], [1., 0.], atol=1e-5)
+
+    def test_max_norm(self):
+        # points beyond max_norm are evaluated on the circle with radius
+        # max_norm (z / |z| * max_norm), points inside are not changed
+        equation = Equation(("x**2", "x*y-y"), backend="numpy", precision="float64",
+                            grid_precision="float64", parameters={}, max_norm=10.)
+
+        def expected(x, y):
+            scale = 10. / np.maximum(np.hypot(x, y), 10.)
+            x, y = x * scale, y * scale
+            return np.array([x**2, x * y - y])
+
+        np.testing.assert_allclose(equation.rhs([30., 40.]), [36., 40.])
+        np.testing.assert_allclose(equation.rhs([3., 4.]), [9., 8.])
+        for dtype in ("float64", "longdouble"):
+            integrand = Equation(("x**2", "x*y-y"), backend="numpy", precision=dtype,
+                                 parameters={}, max_norm=10.).integrand()
+            np.testing.assert_allclose(integrand(np.array([30., 40.])), [36., 40.])
+
+        X, Y = np.meshgrid(np.linspace(-20., 20., 5), np.linspace(-5., 5., 3))
+        np.testing.assert_allclose(equation.rhs_grid(X, Y), expected(X, Y))
+
+        # results are written into a given buffer
+        out = np.empty((2,) + X.shape)
+        self.assertTrue(equation.compiled_rhs([X, Y], out=out) is out)
+        np.testing.assert_allclose(out, expected(X, Y))
+        out = np.empty(2)
+        self.assertTrue(equation.compiled_rhs([30., 40.], out=out) is out)
+        np.testing.assert_allclose(out, [36., 40.])
+
+    def test_precisions(self):
+        system = ("y", "mu*(1-x**2)*y-x")
+        X, Y = np.meshgrid(np.linspace(-2., 2., 5), np.linspace(-1., 1., 4))
+        expected = np.array([Y, (1 - X**2) * Y - X])
+        for name, dtype, rtol in [("float32", np.float32, 1e-6), ("longdouble", np.longdouble, 1e-15)]:
+            equation = Equation(system, backend="numpy", precision=name, grid_precision=name,
+                                parameters={"mu": 1.})
+            grid = equation.rhs_grid(X, Y)
+            self.assertEqual(grid.dtype, dtype)
+            np.testing.assert_allclose(grid.astype(float), expected, rtol=rtol, atol=rtol)
+            self.assertEqual(equation.rhs([0.5, 0.2]).dtype, dtype)
+
+        # odeint is limited to double precision: the system is evaluated in
+        # long double, the result is rounded
+        equation = Equation(system, backend="numpy", precision="longdouble", parameters={"mu": 1.})
+        for direction in (1., -1.):
+            f = equation.integrand(direction)(np.array([0.5, 0.2]))
+            self.assertEqual(f.dtype, np.float64)
+            np.testing.assert_allclose(f, direction * np.array([0.2, 0.75 * 0.2 - 0.5]), rtol=1e-15)
+
+        # numba has no long double, its kernels evaluate in float64
+        time = integration_time(5., 0.01)
+        reference = trajectory(Equation(system, backend="numpy", parameters={"mu": 1.}), [1., 0.],
+                               time)
+        for backend in ("numpy", "numba"):
+            equation = Equation(system, backend=backend, precision="longdouble", parameters={"mu": 1.})
+            np.testing.assert_allclose(trajectory(equation, [1., 0.], time), reference, atol=1e-6)
+
+    @unittest.skipIf(numba is None, "numba is not installed")
+    def test_numba_backend(self):
+        system = ("y", "mu*(1-x**2)*y-x")
+        expected = Equation(system, backend="numpy", parameters={"mu": 2.})
+        equation = Equation(system, backend="numba", parameters={"mu": 2.})
+        self.assertTrue(isinstance(equation.kernels.rhs, JitKernel))
+
+        z = np.array([0.5, -1.2])
+        np.testing.assert_allclose(equation.rhs(z), expected.rhs(z), rtol=1e-14)
+        np.testing.assert_allclose(equation.jacobian(z), expected.jacobian(z), rtol=1e-14)
+        for direction in (1., -1.):
+            np.testing.assert_allclose(equation.integrand(direction)(z),
+                                       expected.integrand(direction)(z), rtol=1e-14)
+
+        # grid precision: numba evaluates in float64 before rounding
+        X, Y = np.meshgrid(np.linspace(-2., 2., 5), np.linspace(-1., 1., 4))
+        np.testing.assert_allclose(equation.rhs_grid(X, Y), expected.rhs_grid(X, Y), rtol=1e-6,
+                                   atol=1e-6)
+        np.testing.assert_allclose(equation.jacobian_array(X, Y), expected.jacobian_array(X, Y),
+                                   rtol=1e-14)
+
+        # numba cannot compile piecewise functions (numpy.select): numpy
+        # backend
+        piecewise = Equation(("y", "Piecewise((x, x > 0), (0, True))"), backend="numba",
+                             parameters={})
+        self.assertFalse(isinstance(piecewise.kernels.rhs, JitKernel))
+        np.testing.assert_allclose(piecewise.rhs_grid(X, Y)[1], np.where(X > 0, X, 0.))
+
+    def test_adaptive_trajectory(self):
+        reference = solve_trajectory(self.equation, [1., 0.], 5., solver="odeint", step=0.001)
+        solution = solve_trajectory(self.equation, [1., 0.], 5., solver="LSODA", rtol=1e-8,
+                                    atol=1e-10)
+
+        self.assertTrue(len(solution.t) < len(reference.t) / 10)
+        np.testing.assert_allclose(solution.dense(reference.t[-1]), reference.z[-1], atol=1e-5)
+
+        # the dense output adds points inside the window only
+        t, z = solution.refine((-3., 3.), (-3., 3.))
+        self.assertTrue(len(t) > len(solution.t))
+        np.testing.assert_allclose(z[-1], solution.z[-1])
+
+    def test_termination(self):
+        def reason(system, initial_condition, window=None):
+            equation = Equation(system)
+            stop = Termination(equation.max_norm, window, speed=1e-6, periodic=1e-5)
+            solution = solve_trajectory(equation, initial_condition, 300., solver="DOP853",
+                                        rtol=1e-6, atol=1e-9, stop=stop)
+            return solution.reason
+
+        self.assertEqual(reason(("y", "(1-x**2)*y-x"), [0.5, 0.]), "periodic")
+        self.assertEqual(reason(("y", "-x-0.1*y"), [1., 0.]), "equilibrium")
+        self.assertEqual(reason(("x", "y"), [1., 0.5], ((-5., 5.), (-5., 5.))), "window")
+        self.assertEqual(reason(("x**2", "-y"), [1., 0.5]), "max_norm")
+
+    def test_solve_trajectories(self):
+        initial_conditions = [[1., 0.], [0., 2.], [-1., -1.]]
+        options = {"time": 2., "solver": "RK45", "rtol": 1e-6, "atol": 1e-9}
+
+        for pool in ("thread", "process"):
+            results = dict(solve_trajectories(self.equation, initial_conditions, [False, True, False],
+                                              workers=2, pool=pool, **options))
+            self.assertEqual(sorted(results), [0, 1, 2])
+
+            solution = solve_trajectory(self.equation, [0., 2.], backward=True, **options)
+            np.testing.assert_allclose(results[1].z, solution.z)
+            self.assertTrue(results[1].backward)
+
+    def test_ensemble(self):
+        initial_conditions = [[1., 0.], [0., 2.], [-1., -1.5]]
+
+        for solver in ("RK4", "RK45"):
+            ensemble = solve_ensemble(self.equation, initial_conditions, 5., solver=solver,
+                                      step=0.01, rtol=1e-8, atol=1e-10)
+            for initial_condition, solution in zip(initial_conditions, ensemble.solutions()):
+                reference = solve_trajectory(self.equation, initial_condition, 5., solver="DOP853",
+                                             rtol=1e-10, atol=1e-12)
+                np.testing.assert_allclose(solution.z, reference.dense(solution.t).T, atol=1e-6)
+
+        # blown up and stalled trajectories are masked
+        equation = Equation(("x**2", "-y"))
+        stop = Termination(equation.max_norm, speed=1e-6)
+        ensemble = solve_ensemble(equation, [[1., 0.5], [-1., 0.5], [0., 0.]], 10., step=0.01,
+                                  stop=stop)
+        self.assertEqual(ensemble.reasons, ["max_norm", "time", "equilibrium"])
+        self.assertTrue(np.isnan(ensemble.z[-1, 0]).all())
+        self.assertEqual(ensemble.last[2], 0)
+
+    def test_segments(self):
+        t = np.arange(6.)
+        z = np.array([[0., 0.], [1., 0.], [50., 0.], [np.nan, 0.], [0., 1.], [0., 2.]])
+
+        segments = valid_segments(z, 10.)
+        self.assertEqual(segments, [slice(0, 2), slice(4, 6)])
+
+        t_split, z_split = split_segments(t, z, 10.)
+        np.testing.assert_array_equal(t_split, [0., 1., np.nan, 4., 5.])
+        self.assertTrue(np.isnan(z_split[2]).all())
+
+    def test_trajectory_store(self):
+        store = TrajectoryStore(capacity=10)
+        forward = solve_trajectory(self.equation, [1., 0.], 1., solver="RK45")
+        backward = solve_trajectory(self.equation, [1., 0.], 1., backward=True, solver="RK45")
+        store.add([1., 0.], forward)
+        store.add([1., 0.], backward)
+        store.add([0., 1.], forward)
+
+        self.assertEqual(len(store), 2)
+        self.assertEqual(store.settings()[0], ([1., 0.], True, True))
+        solution = store.solution(store.ids("[1.0, 0.0]")[1])
+        self.assertTrue(solution.backward)
+        np.testing.assert_array_equal(solution.z, backward.z)
+
+        window = ((-3., 3.), (-3., 3.))
+        self.assertEqual(store.nearest(backward.z[-1] + 0.01, window, 0.01), "[1.0, 0.0]")
+        self.assertEqual(store.nearest([2.9, 2.9], window, 0.01), None)
+
+        store.remove("[1.0, 0.0]")
+        store.compact()
+        np.testing.assert_array_equal(store.table()["x"], forward.z[:, 0])
+        self.assertEqual(store.nearest(backward.z[-1] + 0.01, window, 0.01), None)
+
+        # long steps of adaptive solvers: the drawn (refined) curve is picked
+        damped = Equation(("y", "-x-0.2*y"), parameters={})
+        solution = solve_trajectory(damped, [2., 0.], 30., solver="DOP853")
+        store.add([2., 0.], solution)
+        drawn = solution.refine(*window)[1]
+        self.assertTrue(all(store.nearest(point, window, 0.01) == "[2.0, 0.0]"
+                            for point in drawn[::5]))
+
+    def test_trajectory_cache(self):
+        directory = tempfile.mkdtemp()
+        try:
+            cache = TrajectoryCache(1, directory, 1024)
+            first = cache.solve(self.equation, [1., 0.], time=1., solver="RK45")
+            self.assertTrue(cache.solve(self.equation, [1., 0.], time=1., solver="RK45") is first)
+
+            # the first solution is spilled to the directory, messages are
+            # not logged but passed to message
+            messages = []
+            cache.solve(self.equation, [0., 1.], time=1., solver="RK45")
+            spilled = cache.solve(self.equation, [1., 0.], time=1., solver="RK45",
+                                  message=messages.append)
+            self.assertFalse(spilled is first)
+            self.assertEqual(len(messages), 1)
+            np.testing.assert_array_equal(spilled.z, first.z)
+
+            other = cache.solve(self.equation, [1., 0.], time=1., solver="RK45", rtol=1e-10)
+            self.assertNotEqual(len(other.t), len(first.t))
+        finally:
+            shutil.rmtree(directory)
+
+    def test_shared_kernels(self):
+        system = ("y", "-x-0.5*y+a*x**3")
+        first = Equation(system, parameters={"a": 1.})
+        second = Equation(system, parameters={"a": -1.})
+        self.assertTrue(first.kernels is second.kernels)
+
+        # the parameter values are not shared
+        self.assertEqual(first.parameter_values(), (1.,))
+        self.assertEqual(second.parameter_values(), (-1.,))
+        np.testing.assert_allclose(first.rhs([1., 0.]), [0., 0.])
+        np.testing.assert_allclose(second.rhs([1., 0.]), [0., -2.])
+
+        key = kernel_key(system[0], system[1], first.backend, ["a"])
+        self.assertTrue(interned_kernels[key] is first.kernels)
+
+        # the compiled system is released with the last equation
+        del first, second
+        gc.collect()
+        self.assertFalse(key in interned_kernels)
+
+    def test_kernel_cache(self):
+        directory = tempfile.mkdtemp()
+        kernel_cache = equation_module.myKernelCache
+        try:
+            equation_module.myKernelCache = KernelCache(directory, 1024)
+            system = ("y", "-sin(x)-b*y")
+            key = kernel_key(system[0], system[1], "numpy", ["b"])
+
+            generated = compile_system(system[0], system[1], "numpy", ["b"])
+            self.assertTrue(os.path.isfile(equation_module.myKernelCache.path(key)))
+            expected = (generated.x_dot_expr, generated.y_dot_expr, generated.jacobian_expr)
+            del generated
+            gc.collect()
+
+            # cache hit: the expressions are rebuilt from their srepr
+            cached = compile_system(system[0], system[1], "numpy", ["b"])
+            self.assertTrue(cached._x_dot_expr is None)
+            self.assertEqual((cached.x_dot_expr, cached.y_dot_expr, cached.jacobian_expr), expected)
+            self.assertEqual(cached.y_dot_expr, -sp.sin(sp.Symbol("x")) - sp.Symbol("b") * sp.Symbol("y"))
+            np.testing.assert_allclose(cached.rhs(np.pi / 2, 1., 2.), (1., -3.))
+        finally:
+            equation_module.myKernelCache = kernel_cache
+            shutil.rmtree(directory)
+
+    def test_set_parameters(self):
+        equation = Equation(("y", "mu*(1-x**2)*y-x"), parameters={"mu": 1.})
+        kernels = equation.kernels
+        equation.set_parameters({"mu": 3.})
+
+        # the system is not compiled again
+        self.assertTrue(equation.kernels is kernels)
+        self.assertEqual(equation.parameters["mu"], 3.)
+        np.testing.assert_allclose(equation.rhs([0.5, 2.]), [2., 3. * 0.75 * 2. - 0.5])
+        np.testing.assert_allclose(equation.jacobian([0.5, 2.]), [[0., 1.], [-1. - 6., 3. * 0.75]])
+        X, Y = np.meshgrid(np.linspace(-1., 1., 3), np.linspace(-1., 1., 2))
+        np.testing.assert_allclose(equation.rhs_grid(X, Y)[1], 3. * (1 - X**2) * Y - X)
+
+        # unknown names are ignored, missing ones keep their value
+        equation.set_parameters({"nu": 2.})
+        self.assertEqual(list(equation.parameters.items()), [("mu", 3.)])
+
+    def test_parameter_sweep(self):
+        # stiff for large mu: odeint uses the banded jacobian
+        equation = Equation(("y", "mu*(1-x**2)*y-x"), parameters={"mu": 1.})
+        values = [0.5, 20., 100.]
+        sweep = ParameterSweep(equation, "mu", values)
+        time = np.linspace(0., 5., 101)
+        X, Y = np.meshgrid(np.linspace(-2., 2., 5), np.linspace(-2., 2., 4))
+
+        forward = sweep.trajectories([0.5, 0.2], time)
+        backward = sweep.trajectories([0.5, 0.2], np.linspace(0., 0.5, 11), backward=True)
+        grid = sweep.rhs_grid(X, Y)
+        self.assertEqual(forward.shape, (3, 101, 2))
+        self.assertEqual(grid.shape, (3, 2, 4, 5))
+
+        for i, value in enumerate(values):
+            equation.set_parameters({"mu": value})
+            np.testing.assert_allclose(forward[i], trajectory(equation, [0.5, 0.2], time),
+                                       rtol=1e-4, atol=1e-5)
+            np.testing.assert_allclose(backward[i], trajectory(equation, [0.5, 0.2],
+                                                               np.linspace(0., 0.5, 11), True),
+                                       rtol=1e-4, atol=1e-5)
+            np.testing.assert_allclose(grid[i], equation.rhs_grid(X, Y))
+
+        # banded jacobian: 2x2 blocks of every value on the diagonal
+        z = np.array([0.5, 0.2, -1., 0.3, 2., -0.4])
+        band = sweep.banded_jacobian(z, -1.)
+        dense = np.zeros((6, 6))
+        for i in range(6):
+            for j in range(max(0, i - 1), min(6, i + 2)):
+                dense[i, j] = band[i - j + 1, j]
+        for i, value in enumerate(values):
+            equation.set_parameters({"mu": value})
+            np.testing.assert_allclose(dense[2 * i:2 * i + 2, 2 * i:2 * i + 2],
+                                       equation.n_jacobian(z[2 * i:2 * i + 2]))
+        np.testing.assert_array_equal(dense[2:4, 1], 0.)
+
+    def test_newton(self):
+        z, jacobian, converged = newton(self.equation, [0.1, -0.2])
+
+        self.assertTrue(converged)
+        np.testing.assert_allclose(z, [0., 0.], atol=1e-8)
+        np.testing.assert_allclose(jacobian, [[0., 1.], [-1., 1.]])
+
+    def test_find_roots(self):
+        # |f| of hopf2 has a ring of minima (r**2 = 2 + sqrt(2/3)) without
+        # equilibria, the only equilibrium is the origin
+        hopf2 = Equation(("3*x-y-x*(x**2+y**2)", "x+3*y-y*(x**2+y**2)"), parameters={})
+        roots = find_roots(hopf2, [[0.5, 0.3], [1.5, 1.], [0., 0.]])
+
+        self.assertEqual(list(roots["converged"]), [True, False, True])
+        np.testing.assert_allclose(roots["x"][[0, 2]], 0., atol=1e-12)
+        self.assertTrue(roots["residual"][0] < 1e-10)
+        self.assertEqual(roots["iterations"][2], 0)
+        self.assertTrue(roots["iterations"][1] > 0)
+
+        # no fallback: the same roots
+        plain = find_roots(hopf2, [[0.5, 0.3], [1.5, 1.]], fallback=None)
+        self.assertEqual(list(plain["converged"]), [True, False])
+        self.assertEqual(plain["method"][1], "newton")
+
+    def test_find_roots_without_roots(self):
+        # minima of |f| are no roots, however large |f| is elsewhere in the grid
+        for equation, window in [(Equation(("x**2+0.001", "y"), parameters={}), 10.),
+                                 (Equation(("mu+x**2", "-y"), parameters={"mu": 0.005}), 30.)]:
+            points, jacobians = find_equilibria(equation, (-window, window), (-window, window),
+                                                30, 30)
+            self.assertEqual(len(points), 0)
+            self.assertFalse(find_roots(equation, [[0.01, 0.], [5., 1.]])["converged"].any())
+
+    def test_find_multiple_roots(self):
+        # newton's method converges linearly only, a small residual is
+        # reached far from the root
+        for system in [("y", "-x**3"), ("y", "-x**3-y"), ("x**3", "-y"), ("-x**3", "-y**3")]:
+            equation = Equation(system, parameters={})
+            points, jacobians = find_equilibria(equation, (-2., 2.), (-2., 2.), 30, 30)
+            self.assertEqual(len(points), 1)
+            np.testing.assert_allclose(points, [[0., 0.]], atol=1e-10)
+
+        z, jacobian, converged = newton(Equation(("y", "-x**3"), parameters={}), [1., 0.5])
+        self.assertTrue(converged)
+        np.testing.assert_allclose(z, [0., 0.], atol=1e-10)
+
+    def test_merge_roots(self):
+        # points left by a residual test near a triple root: further apart
+        # than the tolerance of core.PointIndex, but the same root
+        cubic = Equation(("y", "-x**3"), parameters={})
+        scattered = np.column_stack((np.linspace(-9e-4, 9e-4, 11), np.zeros(11)))
+        keep = merge_roots(cubic, scattered, 0.1, np.full(11, 1e-9))
+        self.assertEqual(list(np.flatnonzero(keep)), [0])
+
+        # distinct roots close to each other
+        close = Equation(("x**2-1e-6", "y"), parameters={})
+        np.testing.assert_array_equal(merge_roots(close, [[-1e-3, 0.], [1e-3, 0.]], 0.1),
+                                      [True, True])
+
+    def test_find_equilibria(self):
+        duffing = Equation(("y", "x-x**3"), parameters={})
+        points, jacobians = find_equilibria(duffing, (-2., 2.), (-2., 2.), 30, 30)
+
+        order = np.argsort(points[:, 0])
+        np.testing.assert_allclose(points[order], [[-1., 0.], [0., 0.], [1., 0.]], atol=1e-10)
+        self.assertEqual(list(equilibrium_types(jacobians[order])), ["Center", "Saddle", "Center"])
+
+    def test_point_index(self):
+        index = PointIndex(1e-4)
+        first, new = index.insert([1., 0.])
+        self.assertTrue(new)
+        self.assertEqual(index.insert([1. + 5e-5, 0.]), (first, False))
+        second = index.insert([1. + 2e-4, 0.])[0]
+        self.assertNotEqual(first, second)
+
+        # neighbouring cells, ids stay after removing
+        self.assertEqual(index.nearest([1.00015, 0.]), second)
+        self.assertEqual(index.nearest([1. - 9e-5, 9e-6]), first)
+        index.remove(first)
+        self.assertIsNone(index.nearest([1., 0.]))
+        self.assertEqual(index.nearest([1.0002, 0.]), second)
+        self.assertEqual(index.insert([1., 0.])[0], 2)
+
+    def test_classify_equilibria(self):
+        jacobians = [[[0., 1.], [-1., 1e-12]],      # center up to rounding
+                     [[0., 1.], [-1., 0.1]],
+                     [[-1., 1e-13], [0., -1.]],     # equal eigenvalues
+                     [[1., 0.], [0., -2.]],
+                     [[0., 1.], [0., 0.]],
+                     [[-3., 0.], [0., -1.]]]
+        classification = classify_equilibria(jacobians, 1e-8)
+
+        self.assertEqual(list(equilibrium_types(jacobians, 1e-8)),
+                         ["Center", "Spiral Source", "Sink", "Saddle", "Unclassified", "Nodal Sink"])
+        np.testing.assert_allclose(np.sort(classification["eigenvalues"][5].real), [-3., -1.])
+        for jacobian, entry in zip(jacobians, classification):
+            np.testing.assert_allclose(np.dot(jacobian, entry["eigenvectors"]),
+                                       entry["eigenvectors"] * entry["eigenvalues"], atol=1e-12)
+
+    def test_equilibrium_table(self):
+        duffing = Equation(("y", "x-x**3"), parameters={})
+        points, jacobians = find_equilibria(duffing, (-2., 2.), (-2., 2.), 30, 30)
+
+        table = EquilibriumTable(1e-4, capacity=2)
+        ids = [table.add(point, jacobian, "Equilibrium %d" % i, i)
+               for i, (point, jacobian) in enumerate(zip(points, jacobians))]
+        self.assertEqual(ids, [0, 1, 2])
+        self.assertEqual(table.add(points[1] + 1e-6, jacobians[1]), 1)
+        self.assertEqual(len(table), 3)
+
+        self.assertEqual(table.nearest(points[2] - 1e-6), 2)
+        self.assertEqual(table.find("Equilibrium 1"), 1)
+        np.testing.assert_array_equal(table.jacobian(1), jacobians[1])
+        np.testing.assert_array_equal(table.jacobians(), jacobians)
+        np.testing.assert_array_equal(table.points(), points)
+
+        rows = table.table()
+        self.assertEqual(list(equilibrium_types(jacobians)),
+                         list(equilibrium_names[rows["type"]]))
+        np.testing.assert_array_equal(rows["artist"], [0, 1, 2])
+
+        table.clear()
+        self.assertEqual(len(table), 0)
+        self.assertEqual(table.add(points[0], jacobians[0]), 0)
+
+    def test_vectorfield(self):
+        X, Y, U, V = vectorfield(self.equation, (-2., 2.), (-2., 2.), 10, 20)
+
+        self.assertEqual(X.shape, (20, 10))
+        np.testing.assert_allclose(np.hypot(U, V), 1., rtol=1e-6)
+
+    def test_nullclines(self):
+        x_nullclines, y_nullclines = nullclines(self.equation, (-2., 2.), (-2., 2.), 50, 50)
+
+        # x_dot = y: the x-nullcline is the x-axis
+        self.assertEqual(len(x_nullclines), 1)
+        np.testing.assert_allclose(x_nullclines[0][:, 1], 0., atol=1e-6)
+        self.assertTrue(len(y_nullclines) > 0)
+
+
+class LibraryTests(unittest.TestCase):
+    """ equilibria of the systems in library/ in [-10, 10] x [-10, 10]
+    """
+    equilibria = {"competing_species.ppf": 4, "cooperative_species.ppf": 4, "duffing.ppf": 3,
+                  "fitzhugh-nagumo.ppf": 2, "hopf.ppf": 5, "hopf2.ppf": 1,
+                  "linear_system.ppf": 1, "pendulum.ppf": 7, "predator_prey.ppf": 1,
+                  "square_limit_set.ppf": 7, "van_der_pol.ppf": 1, "van_der_pol_mu.ppf": 1,
+                  "vibrating_spring.ppf": 1}
+
+    def load(self, file_name):
+        with open(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                               "library", file_name), 'r') as sysfile:
+            x_dot_string = sysfile.readline().strip()
+            y_dot_string = sysfile.readline().strip()
+            parameters = parse_parameters(sysfile.read())
+        return Equation((x_dot_string, y_dot_string), parameters=parameters)
+
+    def test_equilibria(self):
+        for file_name, number in sorted(self.equilibria.items()):
+            equation = self.load(file_name)
+            points, jacobians = find_equilibria(equation, (-10., 10.), (-10., 10.), 30, 30)
+            self.assertEqual(len(points), number, file_name)
+
+            # every point is a root
+            roots = find_roots(equation, points)
+            self.assertTrue(roots["converged"].all(), file_name)
+            self.assertTrue((roots["iterations"] <= 1).all(), file_name)
+
+
 def main():
     unittest.main()
 